@@ -0,0 +1,96 @@
+"""
+Benchmark: typed reads vs. read + enforce_schema.
+
+Compares, on a local SQLite table:
+  - legacy : ``pd.read_sql`` (object/float64 columns) followed by a full ``enforce_schema`` pass
+  - typed  : ``pd.read_sql(..., dtype_backend="numpy_nullable")`` where ``enforce_schema``
+             only validates the columns that are already typed
+
+and reports wall time and peak traced memory (tracemalloc) of the read and of the
+``enforce_schema`` pass for both paths. Both paths must return the same frame.
+
+Usage:
+    python benchmarks/bench_typed_reads.py --rows 1000000
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine, text
+
+from msfutilspkg.utils.data_utils import enforce_schema
+
+SCHEMA = {
+    "id": "Int64",
+    "account_id": "Int64",
+    "quantity": "Int64",
+    "code": "str",
+    "name": "str",
+    "reference": "str",
+}
+
+
+def build_table(engine, rows: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    quantity = rng.integers(0, 1000, rows).astype("float64")
+    quantity[rng.random(rows) < 0.1] = np.nan
+    codes = np.array([f"CC{i:05d}" for i in range(1000)], dtype=object)
+    df = pd.DataFrame({
+        "id": np.arange(rows),
+        "account_id": rng.integers(0, 5000, rows),
+        "quantity": pd.array(quantity, dtype="Int64"),
+        "code": codes[rng.integers(0, len(codes), rows)],
+        "name": pd.Series(codes[rng.integers(0, len(codes), rows)]).str.lower(),
+        "reference": np.where(rng.random(rows) < 0.2, None, "REF-" + pd.Series(np.arange(rows)).astype(str)),
+    })
+    df.to_sql("journal_items", engine, index=False, chunksize=50_000)
+
+
+def legacy_read(engine):
+    with engine.connect() as conn:
+        return pd.read_sql(text("SELECT * FROM journal_items"), conn)
+
+
+def typed_read(engine):
+    with engine.connect() as conn:
+        return pd.read_sql(text("SELECT * FROM journal_items"), conn, dtype_backend="numpy_nullable")
+
+
+def measure(func, *args):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        build_table(engine, args.rows)
+
+        results = {}
+        for name, read in [("legacy", legacy_read), ("typed", typed_read)]:
+            raw, read_time, read_peak = measure(read, engine)
+            df, enforce_time, enforce_peak = measure(enforce_schema, raw, SCHEMA)
+            del raw
+            results[name] = df
+            print(f"{name:>7}: read {read_time:7.3f} s (peak {read_peak / 1024 ** 2:7.1f} MiB)   "
+                  f"enforce_schema {enforce_time:7.3f} s (peak {enforce_peak / 1024 ** 2:7.1f} MiB)")
+
+        pd.testing.assert_frame_equal(results["legacy"], results["typed"])
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
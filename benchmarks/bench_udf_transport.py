@@ -0,0 +1,88 @@
+"""
+Benchmark: JSON records vs. base64 Arrow IPC transport of the sync User Data Function.
+
+Runs ``sync_dataframes_with_old_new_arrow`` end to end on synthetic data, the way
+Fabric does: client encoding -> JSON request body -> server decoding -> sync ->
+encoding of the four result frames -> JSON response body -> client decoding.
+For each transport it reports request / response sizes and the encode / decode
+times on both sides, and checks every transport returns the same frames.
+
+Usage:
+    python benchmarks/bench_udf_transport.py --rows 100000 --change-rate 0.1
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+from msfutilspkg.utils.data_utils import sync_dataframes_with_old_new
+from msfutilspkg.utils.udf_transport import decode_result, encode_dataframe, sync_dataframes_with_old_new_arrow
+
+
+def build_frames(rows: int, change_rate: float, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    historic = pd.DataFrame({
+        "code": [f"CC{i:07d}" for i in range(rows)],
+        "name": rng.choice(["Brussels", "Geneva", "Paris", "Amsterdam"], rows),
+        "budget": rng.integers(0, 1_000_000, rows),
+        "rate": rng.random(rows),
+        "start_date": pd.Timestamp("2020-01-01") + pd.to_timedelta(rng.integers(0, 2000, rows), unit="D"),
+    })
+    new = historic.copy()
+    changed = rng.random(rows) < change_rate
+    new.loc[changed, "budget"] += 1
+    new = new.drop(index=new.index[-rows // 100:])  # 1% deleted
+    created = historic.tail(rows // 100).assign(code=[f"NEW{i:07d}" for i in range(rows // 100)])
+    return pd.concat([new, created], ignore_index=True), historic
+
+
+def run(transport: str, new: pd.DataFrame, historic: pd.DataFrame) -> dict:
+    timings = {}
+    start = time.perf_counter()
+    if transport == "json-records":
+        arguments = {"newRecords": json.loads(new.to_json(orient="records", date_format="iso")),
+                     "historic": json.loads(historic.to_json(orient="records", date_format="iso"))}
+    else:
+        compression = "zstd" if transport == "arrow-zstd" else None
+        arguments = {"newRecords": encode_dataframe(new, compression=compression),
+                     "historic": encode_dataframe(historic, compression=compression)}
+    request = json.dumps({**arguments, "key": ["code"], "showChangedCol": True})
+    timings["client_encode_s"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    body = json.loads(request)
+    result = sync_dataframes_with_old_new_arrow(**body)
+    response = json.dumps(result, default=str)
+    timings["server_s"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    frames = decode_result(json.loads(response))
+    timings["client_decode_s"] = time.perf_counter() - start
+    return {"transport": transport, "request_mb": len(request) / 1e6, "response_mb": len(response) / 1e6,
+            **timings, "frames": frames}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--change-rate", type=float, default=0.1)
+    args = parser.parse_args()
+
+    new, historic = build_frames(args.rows, args.change_rate)
+    reference = sync_dataframes_with_old_new(new, historic, ["code"], True)
+
+    results = []
+    for transport in ["json-records", "arrow", "arrow-zstd"]:
+        result = run(transport, new, historic)
+        for name, frame in reference.items():
+            assert len(result["frames"][name]) == len(frame), f"{transport}: {name} differs"
+        results.append({k: v for k, v in result.items() if k != "frames"})
+
+    print(f"{args.rows} rows, change rate {args.change_rate}")
+    print(pd.DataFrame(results).round(3).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Seeded synthetic data for the benchmarks.
+
+Every generator takes a ``seed`` and returns the same frames for the same
+arguments, so timings of two runs (or two commits) are comparable.
+"""
+import numpy as np
+import pandas as pd
+
+# Column kinds cycled through when building a frame of ``columns`` columns
+KINDS = ["str", "int", "float", "date", "str_code"]
+
+
+def make_frame(rows: int, columns: int = 8, null_rate: float = 0.05, cardinality: int = 1000,
+               seed: int = 0) -> pd.DataFrame:
+    """
+    Frame with a unique ``code`` key and ``columns`` value columns of mixed kinds.
+
+    Args:
+        rows (int): Number of rows
+        columns (int): Number of value columns (besides ``code``)
+        null_rate (float): Share of missing values in each value column
+        cardinality (int): Number of distinct values of the string columns
+        seed (int): Random seed
+    """
+    rng = np.random.default_rng(seed)
+    words = np.array([f"value_{i:06d}" for i in range(cardinality)], dtype=object)
+    data = {"code": np.array([f"CC{i:09d}" for i in range(rows)], dtype=object)}
+    for i in range(columns):
+        kind = KINDS[i % len(KINDS)]
+        missing = rng.random(rows) < null_rate
+        if kind == "int":
+            # float64 so that nulls are NaN, as read from the sources
+            values = rng.integers(0, 1_000_000, rows).astype("float64")
+            values[missing] = np.nan
+        elif kind == "float":
+            values = rng.random(rows) * 1000
+            values[missing] = np.nan
+        elif kind == "date":
+            values = pd.Timestamp("2020-01-01") + pd.to_timedelta(rng.integers(0, 3650, rows), unit="D")
+            values = pd.Series(values).mask(missing).to_numpy()
+        else:
+            values = words[rng.integers(0, cardinality, rows)].copy()
+            values[missing] = None
+        data[f"{kind}_{i}"] = values
+    return pd.DataFrame(data)
+
+
+def make_sync_pair(rows: int, columns: int = 8, change_rate: float = 0.1, null_rate: float = 0.05,
+                   cardinality: int = 1000, seed: int = 0):
+    """
+    ``(new, historic)`` frames for ``sync_dataframes_with_old_new``: ``change_rate``
+    of the rows get one modified value, and as many rows are created and deleted.
+    """
+    rng = np.random.default_rng(seed + 1)
+    historic = make_frame(rows, columns, null_rate, cardinality, seed)
+    new = historic.copy()
+
+    changed = np.flatnonzero(rng.random(rows) < change_rate)
+    column = new.columns[1 + rng.integers(0, columns, len(changed))]
+    for col in set(column):
+        rows_of_col = changed[column == col]
+        if new[col].dtype == object:
+            new.loc[rows_of_col, col] = "changed"
+        elif new[col].dtype.kind == "M":
+            new.loc[rows_of_col, col] = pd.Timestamp("2030-01-01")
+        else:
+            new.loc[rows_of_col, col] = -1.0
+
+    moved = max(1, int(rows * change_rate / 10))
+    created = make_frame(moved, columns, null_rate, cardinality, seed + 2)
+    created["code"] = [f"NEW{i:09d}" for i in range(moved)]
+    new = pd.concat([new.iloc[moved:], created], ignore_index=True)
+    return new, historic
+
+
+def schema_of(df: pd.DataFrame) -> dict:
+    """``enforce_schema`` / ``write_delta_lake_table`` schema of a ``make_frame`` frame."""
+    schema = {}
+    for col in df.columns:
+        kind = col.rsplit("_", 1)[0] if col != "code" else "str"
+        schema[col] = {"int": "Int64", "float": "float64", "date": "datetime64[ns]"}.get(kind, "str")
+    return schema
@@ -0,0 +1,182 @@
+"""
+Benchmark and regression suite of the package's hot paths.
+
+Each case runs at several scales (rows) on seeded synthetic data (see
+``generators.py``) and records:
+  - seconds : best wall time of ``--repeat`` runs (no tracing)
+  - peak_mb : peak traced memory (tracemalloc) of one extra run
+
+Results are compared with a baseline JSON file: the run fails (exit code 1)
+when a case is slower than ``baseline * (1 + --threshold)`` (and by more than
+``--min-seconds``) or uses more than ``baseline * (1 + --memory-threshold)``.
+Baselines are absolute timings, only meaningful on the machine that recorded
+them, so none is committed (``baselines.json`` is git-ignored): run
+``make bench-baseline`` on the machine (or CI runner) that runs the comparison,
+from the reference commit, then ``make bench`` on the change to check. Without
+a baseline the comparison fails (exit code 2) instead of passing silently.
+
+Usage:
+    python benchmarks/run_benchmarks.py --update-baseline     # record baselines (make bench-baseline)
+    python benchmarks/run_benchmarks.py                       # compare with baselines.json (make bench)
+    python benchmarks/run_benchmarks.py --cases sync enforce_schema --scales 1000 100000
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from generators import make_frame, make_sync_pair, schema_of
+from msfutilspkg.utils.data_utils import enforce_schema, sync_dataframes_with_old_new
+from msfutilspkg.utils.export_utils import (
+    write_delta_lake_table, write_excel_2003_xml_from_df, write_excel_xlsx, write_multiple_sheets_xlsx)
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+DEFAULT_SCALES = [1_000, 10_000, 50_000]
+
+
+def _output(tmp_dir, name):
+    # A new path per run: the writers must not find the previous run's file
+    path = os.path.join(tmp_dir, name)
+    if os.path.isdir(path):
+        shutil.rmtree(path)
+    elif os.path.exists(path):
+        os.remove(path)
+    return path
+
+
+# name -> setup(rows, options, tmp_dir) returning the function to measure (no argument)
+def _sync(rows, options, tmp_dir):
+    new, historic = make_sync_pair(rows, options.columns, options.change_rate, options.null_rate,
+                                   options.cardinality, options.seed)
+    return lambda: sync_dataframes_with_old_new(new, historic, ["code"], True)
+
+
+def _enforce_schema(rows, options, tmp_dir):
+    df = make_frame(rows, options.columns, options.null_rate, options.cardinality, options.seed)
+    schema = schema_of(df)
+    return lambda: enforce_schema(df, schema)
+
+
+def _excel_2003_xml(rows, options, tmp_dir):
+    df = make_frame(rows, options.columns, options.null_rate, options.cardinality, options.seed)
+    return lambda: write_excel_2003_xml_from_df(df, _output(tmp_dir, "bench.xls"))
+
+
+def _xlsx(rows, options, tmp_dir):
+    df = make_frame(rows, options.columns, options.null_rate, options.cardinality, options.seed)
+    return lambda: write_excel_xlsx(df, _output(tmp_dir, "bench.xlsx"))
+
+
+def _multiple_sheets_xlsx(rows, options, tmp_dir):
+    new, historic = make_sync_pair(rows, options.columns, options.change_rate, options.null_rate,
+                                   options.cardinality, options.seed)
+    return lambda: write_multiple_sheets_xlsx([new, historic], _output(tmp_dir, "bench_sheets.xlsx"),
+                                              ["new", "historic"])
+
+
+def _delta(rows, options, tmp_dir):
+    df = make_frame(rows, options.columns, options.null_rate, options.cardinality, options.seed)
+    schema = {col: "string" if dtype == "str" else dtype for col, dtype in schema_of(df).items()}
+    return lambda: write_delta_lake_table(df, _output(tmp_dir, "bench_delta"), schema, mode="append")
+
+
+CASES = {
+    "sync": _sync,
+    "enforce_schema": _enforce_schema,
+    "excel_2003_xml": _excel_2003_xml,
+    "xlsx": _xlsx,
+    "multiple_sheets_xlsx": _multiple_sheets_xlsx,
+    "write_delta_lake_table": _delta,
+}
+
+
+def measure(func, repeat: int) -> dict:
+    seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        seconds.append(time.perf_counter() - start)
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"seconds": min(seconds), "peak_mb": peak / 1024 ** 2}
+
+
+def compare(results: dict, baselines: dict, threshold: float, memory_threshold: float, min_seconds: float) -> list:
+    """Regression messages of ``results`` against ``baselines`` (cases without baseline are skipped)."""
+    regressions = []
+    for key, result in results.items():
+        baseline = baselines.get(key)
+        if baseline is None:
+            continue
+        slower = result["seconds"] - baseline["seconds"]
+        if result["seconds"] > baseline["seconds"] * (1 + threshold) and slower > min_seconds:
+            regressions.append(f"{key}: {result['seconds']:.3f}s vs baseline {baseline['seconds']:.3f}s")
+        if result["peak_mb"] > baseline["peak_mb"] * (1 + memory_threshold):
+            regressions.append(f"{key}: peak {result['peak_mb']:.1f} MiB vs baseline {baseline['peak_mb']:.1f} MiB")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cases", nargs="+", choices=sorted(CASES), default=list(CASES))
+    parser.add_argument("--scales", nargs="+", type=int, default=DEFAULT_SCALES, help="Numbers of rows")
+    parser.add_argument("--columns", type=int, default=8)
+    parser.add_argument("--change-rate", type=float, default=0.1)
+    parser.add_argument("--null-rate", type=float, default=0.05)
+    parser.add_argument("--cardinality", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed relative slowdown")
+    parser.add_argument("--memory-threshold", type=float, default=0.25, help="Allowed relative peak memory growth")
+    parser.add_argument("--min-seconds", type=float, default=0.05, help="Ignore slowdowns below this (noise)")
+    options = parser.parse_args()
+    logging.disable(logging.INFO)  # the writers log every file
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for case in options.cases:
+            for rows in options.scales:
+                key = f"{case}[{rows}]"
+                results[key] = measure(CASES[case](rows, options, tmp_dir), options.repeat)
+                print(f"{key:<36} {results[key]['seconds']:9.3f} s {results[key]['peak_mb']:9.1f} MiB", flush=True)
+
+    baselines = {}
+    if os.path.exists(options.baseline):
+        with open(options.baseline, "r", encoding="utf-8") as f:
+            baselines = json.load(f)
+    machine = f"{platform.platform()} / Python {platform.python_version()}"
+
+    if options.update_baseline:
+        baselines["results"] = {**baselines.get("results", {}), **results}
+        baselines["machine"] = machine
+        with open(options.baseline, "w", encoding="utf-8") as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+        print(f"Baselines written to {options.baseline}")
+        return 0
+
+    if not baselines.get("results"):
+        print(f"No baseline in {options.baseline}: run `make bench-baseline` on this machine first")
+        return 2
+    if baselines.get("machine") != machine:
+        print(f"WARNING baselines recorded on {baselines.get('machine')}, not on this machine ({machine})")
+    regressions = compare(results, baselines.get("results", {}), options.threshold,
+                          options.memory_threshold, options.min_seconds)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    if not regressions:
+        print("No regression")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,28 +1,353 @@
 import logging
-import requests 
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from msfutilspkg.utils.http_cache import HttpCache
 
 logger = logging.getLogger(__name__)
 
+# (connect, read) timeouts in seconds
+DEFAULT_TIMEOUT = (10, 120)
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+# Idempotent verbs only: GET, HEAD, PUT, DELETE, OPTIONS, TRACE
+RETRY_METHODS = Retry.DEFAULT_ALLOWED_METHODS
 
-def call_api(url, auth_key, payload = {}, headers=None, method="GET", cookies=None):
+
+def _retry(backoff_max: float, **kwargs) -> Retry:
+    """``Retry`` capping the backoff at ``backoff_max`` seconds, also on urllib3 < 2 (no ``backoff_max`` keyword)."""
+    try:
+        return Retry(backoff_max=backoff_max, **kwargs)
+    except TypeError:
+        # urllib3 1.26 reads the cap from the class; Retry.new() keeps the subclass
+        capped = type("Retry", (Retry,), {"DEFAULT_BACKOFF_MAX": backoff_max, "BACKOFF_MAX": backoff_max})
+        return capped(**kwargs)
+
+
+class ApiClient:
+    """
+    HTTP client built on a shared ``requests.Session``.
+
+    Connections are kept alive and pooled per host, failed calls (connection
+    errors and 429/5xx answers) are retried with exponential backoff honouring
+    the ``Retry-After`` header, and every call gets a default timeout.
+
+    Args:
+        base_url (str): Optional prefix of relative URLs, e.g. ``"https://api.fabric.microsoft.com/v1"``
+        headers (dict): Headers sent with every request (e.g. ``Authorization``)
+        timeout (float or tuple): Default ``(connect, read)`` timeout in seconds
+        max_retries (int): Maximum number of retries of a call
+        backoff_factor (float): Retries wait ``backoff_factor * 2 ** (retry - 1)`` seconds
+        backoff_max (float): Upper bound of the wait between two retries
+        retry_statuses (tuple): HTTP statuses that are retried
+        retry_methods (iterable): Verbs that are retried, the idempotent ones by default.
+            POST / PATCH are never resent unless listed, e.g.
+            ``RETRY_METHODS | {"POST"}`` for idempotent POST endpoints
+        pool_connections (int): Number of hosts whose connection pools are kept
+        pool_maxsize (int): Connections kept per host (>= number of threads using the client)
+        cache (HttpCache): Optional cache of GET responses (ETag / Last-Modified / max-age)
+
+    Example:
+        >>> with ApiClient("https://api.example.org", headers={"Authorization": key}) as client:
+        ...     positions = client.get("/positions", params={"page": 1}).json()
+    """
+
+    def __init__(self, base_url: str = None, headers: dict = None, timeout=DEFAULT_TIMEOUT, max_retries: int = 5,
+                 backoff_factor: float = 0.5, backoff_max: float = 60, retry_statuses: tuple = RETRY_STATUSES,
+                 retry_methods=RETRY_METHODS, pool_connections: int = 10, pool_maxsize: int = 32, cache: HttpCache = None):
+        self.base_url = base_url.rstrip("/") if base_url else None
+        self.timeout = timeout
+        self.cache = cache
+        self.session = requests.Session()
+        if headers:
+            self.session.headers.update(headers)
+
+        retry = _retry(
+            backoff_max,
+            total=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=retry_statuses,
+            allowed_methods=frozenset(method.upper() for method in retry_methods),
+            respect_retry_after_header=True,
+            raise_on_status=False,  # the last response is returned, then raise_for_status()
+        )
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=retry)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def url(self, url: str) -> str:
+        if self.base_url and not url.startswith(("http://", "https://")):
+            return f"{self.base_url}/{url.lstrip('/')}"
+        return url
+
+    def request(self, method: str, url: str, payload=None, headers: dict = None, params: dict = None,
+                timeout=None, raise_for_status: bool = True, cache_ttl: float = None, use_cache: bool = True,
+                **kwargs) -> requests.Response:
+        """
+        Send a request with any HTTP verb and return the response.
+
+        Args:
+            method (str): HTTP verb (GET, POST, PUT, PATCH, DELETE, HEAD, ...)
+            url (str): Absolute URL, or relative to ``base_url``
+            payload: JSON body of the request
+            headers (dict): Extra headers for this call
+            params (dict): Query string parameters
+            timeout: Timeout of this call, defaults to the client's
+            raise_for_status (bool): Raise ``requests.HTTPError`` on 4xx/5xx answers
+            cache_ttl (float): Freshness of this GET response in the client's cache,
+                overriding the server's ``Cache-Control``
+            use_cache (bool): Set to False to bypass the client's cache
+            **kwargs: Passed to ``requests.Session.request`` (cookies, data, files...)
+        """
+        method, url = method.upper(), self.url(url)
+
+        def send(request_headers):
+            return self.session.request(
+                method,
+                url,
+                json=payload,
+                headers=request_headers,
+                params=params,
+                timeout=self.timeout if timeout is None else timeout,
+                **kwargs,
+            )
+
+        if self.cache is not None and use_cache and method == "GET":
+            authorization = (headers or {}).get("Authorization") or self.session.headers.get("Authorization")
+            key = self.cache.key(method, url, params, payload, {"Authorization": authorization})
+            response = self.cache.request(send, key, headers, cache_ttl)
+        else:
+            response = send(headers)
+        if raise_for_status:
+            response.raise_for_status()
+        return response
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, payload=None, **kwargs) -> requests.Response:
+        return self.request("POST", url, payload=payload, **kwargs)
+
+    def put(self, url: str, payload=None, **kwargs) -> requests.Response:
+        return self.request("PUT", url, payload=payload, **kwargs)
+
+    def patch(self, url: str, payload=None, **kwargs) -> requests.Response:
+        return self.request("PATCH", url, payload=payload, **kwargs)
+
+    def delete(self, url: str, **kwargs) -> requests.Response:
+        return self.request("DELETE", url, **kwargs)
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+_default_client = None
+_default_client_lock = threading.Lock()
+
+
+def get_default_client() -> ApiClient:
+    """Shared ``ApiClient`` used by ``call_api`` (created on first use)."""
+    global _default_client
+    if _default_client is None:
+        with _default_client_lock:
+            if _default_client is None:
+                _default_client = ApiClient()
+    return _default_client
+
+
+def call_api(url, auth_key, payload = {}, headers=None, method="GET", cookies=None, timeout=None, client: ApiClient = None):
 
     if headers is None:
         headers = {
             "Content-Type": "application/json",
-            "Authorization": auth_key, 
+            "Authorization": auth_key,
         }
 
-    if method == "POST":
-        response = requests.post(url, headers=headers, json=payload, cookies=cookies)
-    elif method == "GET":   
-        response = requests.get(url, headers=headers, json=payload, cookies=cookies)
-    elif method == "PUT":   
-        response = requests.put(url, headers=headers, json=payload, cookies=cookies)
+    client = client or get_default_client()
+    return client.request(method, url, payload=payload, headers=headers, cookies=cookies, timeout=timeout)
+
+
+class RateLimiter:
+    """
+    Per-host rate limit: at most ``requests_per_second`` request starts per host,
+    shared by all the threads using the limiter.
+    """
+
+    def __init__(self, requests_per_second: float):
+        self.interval = 1.0 / requests_per_second
+        self._next_slot = {}
+        self._lock = threading.Lock()
+
+    def wait(self, url: str):
+        host = urlsplit(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def call_api_batch(requests_specs: list, client: ApiClient = None, max_workers: int = 8, requests_per_second: float = None) -> dict:
+    """
+    Send many requests concurrently and collect their responses and errors.
+
+    A failing request does not abort the batch: its exception is stored in
+    ``errors`` and the other requests go on.
+
+    Args:
+        requests_specs (list[dict]): Keyword arguments of ``ApiClient.request``
+            for each call, e.g. ``{"method": "GET", "url": "/positions/12"}``
+        client (ApiClient): Client to use, defaults to the shared one
+        max_workers (int): Maximum number of requests in flight
+        requests_per_second (float): Optional per-host rate limit
+
+    Returns:
+        dict: ``{"responses": {index: Response}, "errors": {index: Exception}}``,
+        indexes being positions in ``requests_specs``
+
+    Example:
+        >>> result = call_api_batch([{"method": "GET", "url": f"{base}/employees/{i}"} for i in ids], max_workers=16)
+        >>> employees = [r.json() for r in result["responses"].values()]
+    """
+    client = client or get_default_client()
+    limiter = RateLimiter(requests_per_second) if requests_per_second else None
+
+    def send(spec):
+        spec = dict(spec)
+        method, url = spec.pop("method", "GET"), spec.pop("url")
+        if limiter is not None:
+            limiter.wait(client.url(url))
+        return client.request(method, url, **spec)
+
+    responses, errors = {}, {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(send, spec): i for i, spec in enumerate(requests_specs)}
+        for future, i in futures.items():
+            try:
+                responses[i] = future.result()
+            except Exception as e:
+                errors[i] = e
+    if errors:
+        logger.info(f"{len(errors)} of {len(requests_specs)} API calls failed")
+    return {"responses": responses, "errors": errors}
+
+
+def _next_page(response: requests.Response, body, url: str, params: dict, style: str, page_param: str, records: list):
+    """Return the ``(url, params)`` of the next page, or None on the last page."""
+    params = dict(params or {})
+    if style in ("auto", "odata") and isinstance(body, dict) and body.get("@odata.nextLink"):
+        return body["@odata.nextLink"], None
+    if style in ("auto", "continuation") and isinstance(body, dict):
+        # Fabric REST API style
+        if body.get("continuationUri"):
+            return body["continuationUri"], None
+        if body.get("continuationToken"):
+            params["continuationToken"] = body["continuationToken"]
+            return url, params
+    if style in ("auto", "link") and "next" in response.links:
+        return response.links["next"]["url"], None
+    if style == "page" and records:
+        params[page_param] = int(params.get(page_param, 1)) + 1
+        return url, params
+    return None
+
+
+def iter_api_pages(url: str, client: ApiClient = None, params: dict = None, style: str = "auto",
+                   records_key: str = "value", page_param: str = "page", max_pages: int = None,
+                   rate_limiter: RateLimiter = None, **request_kwargs):
+    """
+    Follow the pagination of an API and yield the records (list of dicts) of each page.
+
+    Args:
+        url (str): First page
+        client (ApiClient): Client to use, defaults to the shared one
+        params (dict): Query string of the first page
+        style (str): ``"odata"`` (``@odata.nextLink``), ``"continuation"``
+            (``continuationUri`` / ``continuationToken``), ``"link"`` (``Link: <...>; rel="next"``
+            header), ``"page"`` (increments ``page_param`` until an empty page) or
+            ``"auto"`` to detect any of the first three
+        records_key (str): Key of the records in the page body (ignored if the body is a list)
+        page_param (str): Page number parameter for ``style="page"``
+        max_pages (int): Optional safety limit
+        rate_limiter (RateLimiter): Optional rate limit applied to every page request
+        **request_kwargs: Passed to ``ApiClient.request`` (headers, timeout...)
+    """
+    client = client or get_default_client()
+    if style == "page":
+        params = {page_param: 1, **(params or {})}
+    pages = 0
+    next_page = (url, params)
+    while next_page is not None and (max_pages is None or pages < max_pages):
+        url, params = next_page
+        if rate_limiter is not None:
+            rate_limiter.wait(client.url(url))
+        response = client.request("GET", url, params=params, **request_kwargs)
+        body = response.json()
+        records = body if isinstance(body, list) else body.get(records_key, [])
+        pages += 1
+        if records:
+            yield records
+        next_page = _next_page(response, body, url, params, style, page_param, records)
+
+
+def iter_api_frames(url: str, as_arrow: bool = False, **kwargs):
+    """
+    Same as ``iter_api_pages`` but yield each page as a pandas DataFrame
+    (or a ``pyarrow.RecordBatch`` with ``as_arrow=True``), so large results can be
+    processed or written page by page.
+    """
+    for records in iter_api_pages(url, **kwargs):
+        if as_arrow:
+            import pyarrow as pa
+            yield pa.RecordBatch.from_pylist(records)
+        else:
+            yield pd.DataFrame.from_records(records)
+
+
+def read_api_to_dataframe(url: str, **kwargs) -> pd.DataFrame:
+    """Read every page of a paginated API into one DataFrame (see ``iter_api_pages``)."""
+    frames = list(iter_api_frames(url, **kwargs))
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, ignore_index=True)
+
+
+def read_api_batch_to_dataframe(urls: list, max_workers: int = 8, requests_per_second: float = None, client: ApiClient = None, **kwargs) -> dict:
+    """
+    Read several paginated endpoints concurrently into one DataFrame.
+
+    Returns:
+        dict: ``{"data": DataFrame of all records, "errors": {url: Exception}}``
+    """
+    client = client or get_default_client()
+    limiter = RateLimiter(requests_per_second) if requests_per_second else None
+
+    def read(url):
+        return read_api_to_dataframe(url, client=client, rate_limiter=limiter, **kwargs)
 
-    response.raise_for_status()
-    return response
+    frames, errors = [], {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(read, url): url for url in urls}
+        for future, url in futures.items():
+            try:
+                frames.append(future.result())
+            except Exception as e:
+                errors[url] = e
+    data = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    return {"data": data, "errors": errors}
 
 
 def test_function():
     print("API utils working correctly.")
-    return True
\ No newline at end of file
+    return True
@@ -1,33 +1,27 @@
-import json
-import inspect
-import importlib
 import logging
 
+from msfutilspkg.utils.udf_utils import build_udf_payload
+
 logger = logging.getLogger(__name__)
 
 
 # === CONFIG ===
-UDF_FUNCTION = "msfutilspkg.utils.data_utils.sync_dataframes_with_old_new"  # module.path.to.function
-DISPLAY_NAME = "sync_dataframes_with_old_new"
-DESCRIPTION = "Synchronize two DataFrames and detect record-level changes."
-OUTPUT_FILE = "udf_payload.json"
+# One entry per Fabric User Data Function item; an item can expose several functions
+UDFS = [
+    {
+        "functions": [  # module.path.to.function
+            "msfutilspkg.utils.data_utils.sync_dataframes_with_old_new",
+            # same function with base64 Arrow IPC DataFrame arguments / results (see udf_transport)
+            "msfutilspkg.utils.udf_transport.sync_dataframes_with_old_new_arrow",
+        ],
+        "display_name": "sync_dataframes_with_old_new",
+        "description": "Synchronize two DataFrames and detect record-level changes.",
+        "output_file": "udf_payload.json",
+    },
+]
 # ==============
 
-module_name, func_name = UDF_FUNCTION.rsplit(".", 1)
-module = importlib.import_module(module_name)
-func = getattr(module, func_name)
-
-script_source = inspect.getsource(func)
-
-payload = {
-    "displayName": DISPLAY_NAME,
-    "description": DESCRIPTION,
-    "source": script_source,
-    "language": "python",
-    "type": "UserDataFunction"
-}
-
-with open(OUTPUT_FILE, "w") as f:
-    json.dump(payload, f, indent=2)
-
-logger.info(f"✅ UDF payload written to {OUTPUT_FILE}")
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    for udf in UDFS:
+        build_udf_payload(udf["functions"], udf["display_name"], udf["description"], udf["output_file"])
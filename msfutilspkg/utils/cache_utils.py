@@ -0,0 +1,173 @@
+import os
+import time
+import hashlib
+import logging
+import pandas as pd
+import pyarrow as pa
+
+logger = logging.getLogger(__name__)
+
+
+class QueryCache:
+    """
+    Opt-in on-disk cache for query results.
+
+    Results are stored as uncompressed Arrow IPC files, so a cache hit is a
+    memory-mapped reload instead of a database round trip. Entries are keyed
+    by connection + normalised SQL (+ bound parameters), expire after
+    ``ttl_seconds`` and the least recently used ones are evicted once the
+    cache grows over ``max_size_bytes``.
+
+    The file modification time is the creation time of an entry (used for
+    the TTL) and the access time is its last hit (used for the LRU eviction).
+
+    Example
+    -------
+    >>> cache = QueryCache("/tmp/msf_query_cache", ttl_seconds=3600)
+    >>> tables = read_msf_tables([...], [...], cache=cache)
+    """
+
+    SUFFIX = ".arrow"
+    # dtype_backend values of pandas.read_sql, each cached under its own key
+    DTYPE_BACKENDS = (None, "numpy_nullable", "pyarrow")
+
+    def __init__(self, cache_dir: str, ttl_seconds: float = 24 * 3600, max_size_bytes: int = 10 * 1024 ** 3):
+        self.cache_dir = cache_dir
+        self.ttl_seconds = ttl_seconds
+        self.max_size_bytes = max_size_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def normalize_sql(sql_query: str) -> str:
+        """Collapse whitespace and drop the trailing semicolon so cosmetic edits still hit."""
+        return " ".join(str(sql_query).split()).rstrip(";").strip()
+
+    @staticmethod
+    def _hash(value: str) -> str:
+        return hashlib.sha256(value.encode("utf-8")).hexdigest()[:32]
+
+    def key(self, connection_id: str, sql_query: str, params: dict = None, dtype_backend: str = None) -> str:
+        """
+        Cache key of a query: ``<connection hash>_<sql + params + dtype_backend hash>``
+        (typed reads of ``PostgresReader`` are cached apart from the untyped ones).
+        """
+        statement = self.normalize_sql(sql_query)
+        if params:
+            statement += "|" + repr(sorted(params.items()))
+        if dtype_backend:
+            statement += f"|dtype_backend={dtype_backend}"
+        return f"{self._hash(connection_id)[:16]}_{self._hash(statement)}"
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + self.SUFFIX)
+
+    def _entries(self) -> list:
+        return [
+            os.path.join(self.cache_dir, name)
+            for name in os.listdir(self.cache_dir)
+            if name.endswith(self.SUFFIX)
+        ]
+
+    def get(self, key: str) -> pd.DataFrame | None:
+        """Return the cached DataFrame for ``key``, or None if missing or expired."""
+        path = self._path(key)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return self._miss(key)
+
+        if self.ttl_seconds is not None and time.time() - stat.st_mtime > self.ttl_seconds:
+            self._remove(path)
+            return self._miss(key, reason="expired")
+
+        try:
+            with pa.memory_map(path, "r") as source:
+                df = pa.ipc.open_file(source).read_all().to_pandas()
+        except (OSError, pa.ArrowInvalid) as e:
+            logger.info(f"Query cache entry {key} is unreadable, dropping it: {e}")
+            self._remove(path)
+            return self._miss(key)
+
+        # Keep the creation time (TTL), refresh the access time (LRU)
+        os.utime(path, (time.time(), stat.st_mtime))
+        self.hits += 1
+        logger.info(f"Query cache hit for {key} (hits: {self.hits}, misses: {self.misses})")
+        return df
+
+    def _miss(self, key: str, reason: str = "missing"):
+        self.misses += 1
+        logger.info(f"Query cache miss ({reason}) for {key} (hits: {self.hits}, misses: {self.misses})")
+        return None
+
+    def put(self, key: str, df: pd.DataFrame):
+        """Store ``df`` under ``key`` then evict old entries if the cache is over its size cap."""
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            with pa.OSFile(tmp_path, "wb") as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+            os.replace(tmp_path, path)
+        except (pa.ArrowException, OSError) as e:
+            # Not every object column converts to Arrow: caching is best effort
+            logger.info(f"Could not cache query result {key}: {e}")
+            self._remove(tmp_path)
+            return
+        self.evict()
+
+    def evict(self):
+        """Drop expired entries, then least recently used ones until under ``max_size_bytes``."""
+        now = time.time()
+        entries = []
+        for path in self._entries():
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            if self.ttl_seconds is not None and now - stat.st_mtime > self.ttl_seconds:
+                self._remove(path)
+            else:
+                entries.append((stat.st_atime, stat.st_size, path))
+
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total_size <= self.max_size_bytes:
+                break
+            self._remove(path)
+            total_size -= size
+            logger.info(f"Query cache evicted {os.path.basename(path)}")
+
+    def invalidate(self, connection_id: str = None, sql_query: str = None, params: dict = None,
+                   dtype_backend: str = None) -> int:
+        """
+        Explicitly drop cache entries.
+
+        - no argument: clear the whole cache
+        - ``connection_id`` only: every query of that connection
+        - ``connection_id`` and ``sql_query``: that single query, read with any
+          ``dtype_backend`` (only the given one if ``dtype_backend`` is set)
+
+        Returns the number of removed entries.
+        """
+        if connection_id is not None and sql_query is not None:
+            backends = self.DTYPE_BACKENDS if dtype_backend is None else (dtype_backend,)
+            paths = [self._path(self.key(connection_id, sql_query, params, backend)) for backend in backends]
+        elif connection_id is not None:
+            prefix = self._hash(connection_id)[:16] + "_"
+            paths = [path for path in self._entries() if os.path.basename(path).startswith(prefix)]
+        else:
+            paths = self._entries()
+        removed = sum(self._remove(path) for path in paths)
+        logger.info(f"Query cache invalidated {removed} entries")
+        return removed
+
+    @staticmethod
+    def _remove(path: str) -> bool:
+        try:
+            os.remove(path)
+            return True
+        except FileNotFoundError:
+            return False
@@ -11,19 +11,25 @@ from pyspark.sql.types import (
     LongType, BooleanType,
     TimestampType, DoubleType
 )
+from msfutilspkg.utils.instrumentation import instrumented
 
 logger = logging.getLogger(__name__)
 
+@instrumented("enforce_schema", rows=lambda result, *args, **kwargs: len(result))
 def enforce_schema(df: pd.DataFrame, schema: Dict[str, str]) -> pd.DataFrame:
     """
     Enforce Lakehouse-compatible schema on a Pandas DataFrame.
 
     Converts nullable integers, booleans, datetimes, and strings safely.
+    Columns that already have the target dtype (e.g. read with
+    ``PostgresReader.query(..., schema=...)``) are only validated, not converted again.
     """
-    df = df.copy()
+    df = df.copy(deep=False)  # Columns are replaced, never modified in place
     for col, dtype in schema.items():
         if col not in df.columns:
             df[col] = pd.NA  # Add missing columns as NULL
+        elif _has_target_dtype(df[col], dtype):
+            continue
         if dtype == "Int64":
             # Convert numeric columns: NaN / Infinity -> pd.NA, then cast
             df[col] = pd.to_numeric(df[col], errors="coerce").replace([np.inf, -np.inf], np.nan).astype("Int64")
@@ -41,12 +47,27 @@ def enforce_schema(df: pd.DataFrame, schema: Dict[str, str]) -> pd.DataFrame:
     return df
 
 
+def _has_target_dtype(series: pd.Series, dtype: str) -> bool:
+    """True if ``series`` already has the dtype ``enforce_schema`` would convert it to."""
+    if dtype == "Int64":
+        return series.dtype.name == "Int64"
+    if dtype in ["boolean", "bool"]:
+        return series.dtype.name == "boolean"
+    if dtype == "datetime64[ns]":
+        return series.dtype.name == "datetime64[ns]"
+    # Float64 still needs infinities turned into NULL and strings their NULLs turned into None
+    return False
 
+
+
+@instrumented("sync_dataframes_with_old_new", rows=lambda result, *args, **kwargs: sum(len(df) for df in result.values()))
 def sync_dataframes_with_old_new(
     newRecords: pd.DataFrame,
     historic: pd.DataFrame,
     key: list, 
     showChangedCol: bool,
+    engine: str = "pandas",
+    **engine_options,
 ) -> dict:
     """
     Synchronize two DataFrames (new vs. historic) and detect record-level changes.
@@ -69,6 +90,15 @@ def sync_dataframes_with_old_new(
         showChangedCol: bool, optional
             If True, the `to_update` DataFrame will include a `changed_columns` column
             listing which non-key fields were modified, as well as show the previous values. Default is False.
+        engine : {"pandas", "duckdb"}, optional
+            ``"duckdb"`` runs the comparison as SQL (see
+            ``msfutilspkg.utils.duckdb_sync.sync_tables_duckdb``): multi-threaded, spilling
+            to disk above ``memory_limit``, and `newRecords` / `historic` may then also be
+            Arrow tables, ``DeltaTable`` objects or Delta / Parquet paths read in place.
+            Default is "pandas".
+        **engine_options
+            Options of the duckdb engine: ``threads``, ``memory_limit``, ``temp_directory``,
+            ``storage_options``, ``connection``.
 
     Returns
     -------
@@ -123,6 +153,12 @@ def sync_dataframes_with_old_new(
     pandas.merge : SQL-style DataFrame joins, useful for alternative diff logic.
 
     """
+    if engine == "duckdb":
+        from msfutilspkg.utils.duckdb_sync import sync_tables_duckdb
+        return sync_tables_duckdb(newRecords, historic, key, showChangedCol, **engine_options)
+    if engine != "pandas":
+        raise ValueError(f"engine must be 'pandas' or 'duckdb', got '{engine}'")
+
     # --- To create ---
     merged_create = newRecords.merge(historic[key], on=key, how="left", indicator=True)
     to_create = merged_create.loc[merged_create["_merge"] == "left_only"].drop(columns=["_merge"])
@@ -2,20 +2,63 @@ from deltalake import DeltaTable
 from deltalake.writer import write_deltalake
 import pandas as pd
 from datetime import datetime
-from functools import wraps
+from functools import wraps, lru_cache
+import atexit
+import threading
 import uuid
 import logging
+from msfutilspkg.utils.instrumentation import collect_spans
+from msfutilspkg.utils.delta_utils import TableMaintainer, maintain_delta_table, maintain_delta_table_spark
 
 logger = logging.getLogger(__name__)
 
 
 # --- Fonction utilitaire pour l'écriture Delta ---
 
-def append_status_to_delta_rust(table_path: str, job_metadata: dict | pd.DataFrame, schema_dtype: dict, mode: str = 'append'):
+DEFAULT_STATUS_SCHEMA = {
+    'job_id': 'str',
+    'job_name': 'str',
+    'start_time': 'datetime64[ns]',
+    'end_time': 'datetime64[ns]',
+    'job_date': 'str',
+    'status': 'str',
+    'records_processed': 'Int64',
+    'records_created': 'Int64',
+    'records_updated': 'Int64',
+    'records_kept': 'Int64',
+    'records_skipped': 'Int64',
+    'error_message': 'str',
+}
+
+# Table fille des statuts : une ligne par span (étape instrumentée) d'un job
+DEFAULT_SPAN_SCHEMA = {
+    'job_id': 'str',
+    'job_name': 'str',
+    'job_date': 'str',
+    'span_name': 'str',
+    'start_time': 'datetime64[ns]',
+    'wall_seconds': 'float64',
+    'cpu_seconds': 'float64',
+    'peak_rss_delta_bytes': 'Int64',
+    'rows': 'Int64',
+    'rows_per_second': 'float64',
+}
+
+
+def append_status_to_delta_rust(table_path: str, job_metadata: dict | list | pd.DataFrame, schema_dtype: dict, mode: str = 'append', partition_by: list = None):
     """
     Ajoute les métadonnées du job à la table Delta spécifiée par table_path.
+
+    job_metadata peut être un seul enregistrement (dict) ou un lot d'enregistrements
+    (liste de dicts ou DataFrame), écrits en une seule transaction.
+    partition_by (ex: ['job_date']) n'est pris en compte qu'à la création de la table.
     """
-    df_new_row = pd.DataFrame([job_metadata])
+    if isinstance(job_metadata, pd.DataFrame):
+        df_new_row = job_metadata.copy()
+    elif isinstance(job_metadata, dict):
+        df_new_row = pd.DataFrame([job_metadata])
+    else:
+        df_new_row = pd.DataFrame(list(job_metadata))
 
     # Application du schéma et nettoyage
     try:
@@ -25,25 +68,284 @@ def append_status_to_delta_rust(table_path: str, job_metadata: dict | pd.DataFra
         logger.info(f"Erreur de conversion de type. Vérifiez que toutes les clés du schéma sont dans le dictionnaire de métadonnées: {e}")
         raise 
 
-    df_new_row['error_message'] = df_new_row['error_message'].fillna('')
+    if 'error_message' in df_new_row.columns:
+        df_new_row['error_message'] = df_new_row['error_message'].fillna('')
 
     # Écriture transactionnelle en mode 'append'
     write_deltalake(
         table_or_uri=table_path, 
         data=df_new_row, 
-        mode=mode
+        mode=mode,
+        partition_by=_partition_by_for(table_path, partition_by)
     )
     
-    logger.info(f"Statut du job '{job_metadata.get('job_name')}' ajouté à la table Delta à {table_path}")
+    logger.info(f"{len(df_new_row)} ligne(s) de statut ({', '.join(df_new_row['job_name'].astype(str).unique())}) ajoutée(s) à la table Delta à {table_path}")
+
+
+def _partition_by_for(table_path: str, partition_by: list = None):
+    """Le partitionnement n'est passé qu'à la création de la table (delta-rs refuse sinon un partitionnement différent)."""
+    if not partition_by:
+        return None
+    try:
+        DeltaTable(table_path)
+        return None
+    except Exception:
+        return partition_by
+
+
+def append_status_to_delta_spark(table_name: str, job_metadata: dict | list, schema_dtype=None):
+    """
+    Ajoute les métadonnées du job (un dict ou une liste de dicts) à la table Delta
+    `table_name` via Spark (saveAsTable). Par défaut, le schéma est celui de la table
+    des statuts.
+    """
+    SparkStatusWriter(table_name, schema_dtype).write(job_metadata)
+
+
+class SparkStatusWriter:
+    """
+    Écrit des enregistrements de statut dans une table Delta via Spark.
+
+    Créé une seule fois par usine de décorateurs : le schéma est construit une fois,
+    la SparkSession est récupérée au premier appel puis réutilisée, et les lignes sont
+    passées directement à createDataFrame sous forme de tuples (sans DataFrame pandas).
+    """
+
+    def __init__(self, table_name: str, schema_dtype=None, partition_by: list = None):
+        from pyspark.sql.types import StringType
+
+        self.table_name = table_name
+        self.partition_by = partition_by
+        self.schema = _status_spark_schema() if schema_dtype is None else schema_dtype
+        self._fields = [field.name for field in self.schema.fields]
+        # Les colonnes StringType doivent recevoir des str (ex: job_id entier)
+        self._string_fields = {field.name for field in self.schema.fields if isinstance(field.dataType, StringType)}
+        self._session = None
+
+    @property
+    def session(self):
+        if self._session is None:
+            from pyspark.sql import SparkSession
+            self._session = SparkSession.builder.getOrCreate()
+        return self._session
+
+    def to_rows(self, job_metadata: dict | list) -> list:
+        records = [job_metadata] if isinstance(job_metadata, dict) else job_metadata
+        rows = []
+        for record in records:
+            values = [record.get(name) for name in self._fields]
+            rows.append(tuple(
+                str(value) if value is not None and name in self._string_fields else value
+                for name, value in zip(self._fields, values)
+            ))
+        return rows
+
+    def write(self, job_metadata: dict | list):
+        rows = self.to_rows(job_metadata)
+        df_new_rows_pyspark = self.session.createDataFrame(rows, schema=self.schema)
+        writer = df_new_rows_pyspark.write.format("delta").mode("append")
+        if self.partition_by:
+            writer = writer.partitionBy(*self.partition_by)
+        writer.saveAsTable(self.table_name)
+
+
+@lru_cache(maxsize=None)
+def _status_spark_schema():
+    from pyspark.sql.types import StructType, StructField, StringType, LongType, TimestampType
+
+    # Define the explicit schema for your log table
+    return StructType([
+        StructField("job_id", StringType(), True),
+        StructField("job_name", StringType(), True),
+        StructField("start_time", TimestampType(), True),
+        StructField("end_time", TimestampType(), True),
+        StructField("job_date", StringType(), True),
+        StructField("status", StringType(), True),
+        StructField("records_processed", LongType(), True),
+        StructField("records_created", LongType(), True),
+        StructField("records_updated", LongType(), True),
+        StructField("records_kept", LongType(), True),
+        StructField("records_skipped", LongType(), True),
+        StructField("error_message", StringType(), True)
+    ])
+
+
+@lru_cache(maxsize=None)
+def _span_spark_schema():
+    from pyspark.sql.types import StructType, StructField, StringType, LongType, TimestampType, DoubleType
+
+    return StructType([
+        StructField("job_id", StringType(), True),
+        StructField("job_name", StringType(), True),
+        StructField("job_date", StringType(), True),
+        StructField("span_name", StringType(), True),
+        StructField("start_time", TimestampType(), True),
+        StructField("wall_seconds", DoubleType(), True),
+        StructField("cpu_seconds", DoubleType(), True),
+        StructField("peak_rss_delta_bytes", LongType(), True),
+        StructField("rows", LongType(), True),
+        StructField("rows_per_second", DoubleType(), True),
+    ])
+
+
+# ----------------------------------------------------------------------
+# --- Journalisation bufferisée (écritures par lots en arrière-plan) ---
+# ----------------------------------------------------------------------
+
+class BufferedStatusLogger:
+    """
+    Met en file d'attente les enregistrements de statut des jobs et les écrit par
+    lots depuis un thread d'arrière-plan, au lieu d'un append Delta par appel.
+
+    Un lot est écrit dès que `max_batch_size` enregistrements sont en attente, au
+    plus tard toutes les `flush_interval` secondes, et à la sortie de l'interpréteur.
+    `log(record, flush=True)` écrit immédiatement (utilisé pour les jobs en échec,
+    afin que leur statut soit persisté même si le processus s'arrête ensuite).
+    Si l'écriture d'un lot échoue, ses enregistrements sont remis en file d'attente.
+
+    Args:
+        write_batch (callable): Fonction qui écrit une liste d'enregistrements (dicts)
+        max_batch_size (int): Taille de lot qui déclenche une écriture
+        flush_interval (float): Délai maximal (secondes) avant l'écriture d'un lot
+    """
+
+    def __init__(self, write_batch, max_batch_size: int = 100, flush_interval: float = 60.0):
+        self.write_batch = write_batch
+        self.max_batch_size = max_batch_size
+        self.flush_interval = flush_interval
+        self._records = []
+        self._lock = threading.Lock()        # protège la file d'attente
+        self._write_lock = threading.Lock()  # une seule écriture à la fois
+        self._wake_up = threading.Event()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="etl-status-logger", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def log(self, record: dict, flush: bool = False):
+        """Ajoute un enregistrement à la file d'attente (et l'écrit tout de suite si flush=True)."""
+        self.log_many([record], flush)
+
+    def log_many(self, records: list, flush: bool = False):
+        """Ajoute plusieurs enregistrements à la file d'attente."""
+        with self._lock:
+            self._records.extend(records)
+            pending = len(self._records)
+        if flush or self._closed:
+            try:
+                self.flush()
+            except Exception as e:
+                # L'enregistrement reste en file d'attente, il sera réécrit au prochain lot
+                logger.info(f"ERREUR lors de l'écriture immédiate du statut ({self.pending()} en attente): {e}")
+        elif pending >= self.max_batch_size:
+            self._wake_up.set()
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._records)
+
+    def flush(self):
+        """Écrit de manière synchrone tous les enregistrements en attente."""
+        with self._write_lock:
+            with self._lock:
+                batch, self._records = self._records, []
+            if not batch:
+                return
+            try:
+                self.write_batch(batch)
+            except Exception:
+                # Remettre le lot en file d'attente pour la prochaine tentative
+                with self._lock:
+                    self._records = batch + self._records
+                raise
+
+    def _run(self):
+        while not self._closed:
+            self._wake_up.wait(self.flush_interval)
+            self._wake_up.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.info(f"ERREUR lors de l'écriture d'un lot de statuts ({self.pending()} en attente): {e}")
+
+    def close(self):
+        """Arrête le thread d'arrière-plan et écrit les derniers enregistrements."""
+        if self._closed:
+            return
+        self._closed = True
+        self._wake_up.set()
+        self._thread.join(timeout=self.flush_interval)
+        self.flush()
+        atexit.unregister(self.close)
 
 # ----------------------------------------------------------------------
 # --- Usine de Décorateurs (Décorateur avec Paramètres) ---
 # ----------------------------------------------------------------------
 
-def log_etl_status_factory(delta_path: str, schema_dtype = None, job_id = uuid.uuid4().int % (10**18), job_name = "", engine="pyspark"):
+def _new_run_id() -> int:
+    """Identifiant unique (et peu coûteux) d'une exécution de job."""
+    return uuid.uuid4().int % (10**18)
+
+
+def log_etl_status_factory(delta_path: str, schema_dtype = None, job_id = None, job_name = "", engine="pyspark", buffered: bool = False, max_batch_size: int = 100, flush_interval: float = 60.0, spans_path: str = None, partition_by: list = None, maintenance: bool = False, maintenance_every: int = 50, retention_hours: int = 7 * 24):
     """
     Ceci est l'usine qui prend le chemin (path) en argument et retourne le décorateur.
+
+    Chaque appel de la fonction décorée reçoit un nouveau job_id, sauf si job_id est
+    fourni explicitement. Les writers (schéma, SparkSession) sont créés une seule fois
+    par usine et réutilisés à chaque appel.
+
+    Avec buffered=True, les statuts ne sont pas écrits dans le bloc finally de chaque
+    appel mais mis en file d'attente dans un BufferedStatusLogger, qui les écrit par
+    lots (max_batch_size / flush_interval, et à la sortie de l'interpréteur). Le statut
+    d'un job en échec est toujours écrit immédiatement.
+
+    Avec spans_path, les spans (voir msfutilspkg.utils.instrumentation) ouverts pendant
+    le job, y compris ceux des fonctions de la librairie (read_msf_tables,
+    enforce_schema, sync_dataframes_with_old_new, écritures...), sont enregistrés dans
+    la table Delta fille spans_path avec le job_id du job. Sans spans_path, les spans
+    ne sont pas collectés et ne coûtent presque rien.
+
+    partition_by (ex: ['job_date']) partitionne les tables de log à leur création :
+    la table des statuts, et celle des spans sur celles de ces colonnes qu'elle
+    contient (job_id, job_name, job_date).
+    Avec maintenance=True, toutes les maintenance_every écritures, la table des statuts
+    (et celle des spans) est compactée, checkpointée et vacuumée (retention_hours) dans
+    un thread d'arrière-plan, sans bloquer le job (voir delta_utils.maintain_delta_table).
     """
+    # Les spans n'ont que certaines colonnes des statuts
+    span_partition_by = [col for col in partition_by or [] if col in DEFAULT_SPAN_SCHEMA] or None
+    if engine == "pyspark":
+        # Utiliser le chemin passé à l'usine de décorateurs (delta_path)
+        write_status = SparkStatusWriter(delta_path, _status_spark_schema(), partition_by).write
+        if spans_path is not None:
+            write_spans = SparkStatusWriter(spans_path, _span_spark_schema(), span_partition_by).write
+
+        def maintain_tables():
+            return [maintain_delta_table_spark(path, retention_hours) for path in (delta_path, spans_path) if path]
+    else:
+        status_schema = DEFAULT_STATUS_SCHEMA if schema_dtype is None else schema_dtype
+
+        def write_status(job_metadata):
+            append_status_to_delta_rust(delta_path, job_metadata, status_schema, partition_by=partition_by)
+
+        def write_spans(span_records):
+            append_status_to_delta_rust(spans_path, span_records, DEFAULT_SPAN_SCHEMA, partition_by=span_partition_by)
+
+        def maintain_tables():
+            return [maintain_delta_table(path, retention_hours=retention_hours) for path in (delta_path, spans_path) if path]
+
+    if maintenance:
+        maintainer = TableMaintainer(maintain_tables, maintenance_every)
+        write_status_only = write_status
+
+        def write_status(job_metadata):
+            write_status_only(job_metadata)
+            maintainer.notify_write()
+
+    status_logger = BufferedStatusLogger(write_status, max_batch_size, flush_interval) if buffered else None
+    span_logger = BufferedStatusLogger(write_spans, max_batch_size, flush_interval) if buffered and spans_path else None
+
     def log_etl_status_decorator(func):
         """
         Ceci est le décorateur qui prend la fonction en argument.
@@ -51,10 +353,12 @@ def log_etl_status_factory(delta_path: str, schema_dtype = None, job_id = uuid.u
         @wraps(func)
         def wrapper(*args, **kwargs):
             
+            run_id = _new_run_id() if job_id is None else job_id
             start_time = datetime.now()
             status = 'FAILURE'
             result = None
             error_message = None
+            spans = []
             
             # Initialiser les métriques
             metrics = {
@@ -66,8 +370,12 @@ def log_etl_status_factory(delta_path: str, schema_dtype = None, job_id = uuid.u
             }
             
             try:
-                logger.info(f"Job '{job_name}' (ID: {job_id}) démarré...")
-                result = func(*args, **kwargs)
+                logger.info(f"Job '{job_name}' (ID: {run_id}) démarré...")
+                if spans_path is not None:
+                    with collect_spans() as spans:
+                        result = func(*args, **kwargs)
+                else:
+                    result = func(*args, **kwargs)
                 
                 if isinstance(result, dict):
                     metrics.update(result)
@@ -86,7 +394,7 @@ def log_etl_status_factory(delta_path: str, schema_dtype = None, job_id = uuid.u
                 end_time = datetime.now()
                 # Créer le dictionnaire de métadonnées complet, en utilisant les valeurs par défaut si besoin
                 job_metadata = {
-                    'job_id': job_id, 
+                    'job_id': run_id, 
                     'job_name': job_name, 
                     'start_time': start_time,
                     'end_time': end_time, 
@@ -99,50 +407,18 @@ def log_etl_status_factory(delta_path: str, schema_dtype = None, job_id = uuid.u
                     'records_skipped': metrics.get('records_skipped', 0),
                     'error_message': error_message,
                 }
-                if engine == "pyspark":
-                    
-                    # Utiliser le chemin passé à l'usine de décorateurs (delta_path)
-                    from pyspark.sql import SparkSession
-                    from pyspark.sql.types import StructType, StructField, StringType, IntegerType, TimestampType, LongType
-
-                    # Define the explicit schema for your log table
-                    from pyspark.sql.types import StructType, StructField, StringType, LongType, TimestampType
-
-                    schema_dtype = StructType([
-                        StructField("job_id", StringType(), True),
-                        StructField("job_name", StringType(), True),
-                        StructField("start_time", TimestampType(), True),
-                        StructField("end_time", TimestampType(), True),
-                        StructField("job_date", StringType(), True),
-                        StructField("status", StringType(), True),
-                        StructField("records_processed", LongType(), True),
-                        StructField("records_created", LongType(), True),
-                        StructField("records_updated", LongType(), True),
-                        StructField("records_kept", LongType(), True),
-                        StructField("records_skipped", LongType(), True),
-                        StructField("error_message", StringType(), True)
-                    ])
-                    spark_session = SparkSession.builder.getOrCreate()
-                    df_new_row_pyspark = spark_session.createDataFrame(pd.DataFrame([job_metadata]), schema=schema_dtype)
-                    df_new_row_pyspark.write.format("delta").mode("append").saveAsTable(delta_path)
+                if status_logger is not None:
+                    status_logger.log(job_metadata, flush=(status == 'FAILURE'))
                 else:
-                    if schema_dtype is None:
-                        schema_dtype = {
-                            'job_id': 'str',
-                            'job_name': 'str',
-                            'start_time': 'datetime64[ns]',
-                            'end_time': 'datetime64[ns]',
-                            'job_date': 'str',
-                            'status': 'str',
-                            'records_processed': 'Int64',
-                            'records_created': 'Int64',
-                            'records_updated': 'Int64',
-                            'records_kept': 'Int64',
-                            'records_skipped': 'Int64',
-                            'error_message': 'str',
-                        }
-                    # Utiliser le chemin passé à l'usine de décorateurs (delta_path)
-                    append_status_to_delta_rust(delta_path, job_metadata, schema_dtype)
+                    write_status(job_metadata)
+
+                if spans:
+                    span_records = [{'job_id': run_id, 'job_name': job_name, 'job_date': job_metadata['job_date'],
+                                     **s.to_dict()} for s in spans]
+                    if span_logger is not None:
+                        span_logger.log_many(span_records, flush=(status == 'FAILURE'))
+                    else:
+                        write_spans(span_records)
             
             return result
 
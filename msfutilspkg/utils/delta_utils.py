@@ -0,0 +1,593 @@
+import os
+import json
+import hashlib
+import threading
+import logging
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+from deltalake import DeltaTable
+
+logger = logging.getLogger(__name__)
+
+
+def count_small_files(dt: DeltaTable, small_file_size: int) -> int:
+    """Number of active data files of ``dt`` smaller than ``small_file_size`` bytes."""
+    add_actions = pa.table(dt.get_add_actions(flatten=True))
+    if add_actions.num_rows == 0:
+        return 0
+    sizes = add_actions.column("size_bytes").to_pylist()
+    return sum(1 for size in sizes if size is not None and size < small_file_size)
+
+
+def maintain_delta_table(
+    table_path: str,
+    small_file_threshold: int = 50,
+    small_file_size: int = 8 * 1024 ** 2,
+    target_size: int = None,
+    retention_hours: int = 7 * 24,
+    vacuum: bool = True,
+    storage_options: dict = None,
+) -> dict:
+    """
+    Compact, checkpoint and vacuum a Delta table written by many small appends
+    (e.g. the job status table of ``log_etl_status_factory``).
+
+    - When at least ``small_file_threshold`` data files are smaller than
+      ``small_file_size``, they are compacted (``optimize.compact``), then a
+      checkpoint is written and expired transaction log files are cleaned up, so
+      readers no longer replay the whole log.
+    - Files no longer referenced since ``retention_hours`` are vacuumed.
+
+    Parameters
+    ----------
+    table_path : str
+        Path / URI of the Delta table.
+    small_file_threshold : int
+        Number of small files that triggers a compaction.
+    small_file_size : int
+        Files under this size (bytes) count as small.
+    target_size : int, optional
+        Target size of the compacted files, delta-rs default if None.
+    retention_hours : int
+        Vacuum retention window. Below 168 hours (the Delta default) the
+        retention check is disabled, make sure no reader needs older versions.
+    vacuum : bool
+        Whether to vacuum unreferenced files.
+    storage_options : dict, optional
+        Storage options passed to ``DeltaTable`` (e.g. OneLake credentials).
+
+    Returns
+    -------
+    dict
+        ``small_files``, ``compacted``, ``compaction_metrics``, ``checkpointed``, ``vacuumed_files``.
+    """
+    dt = DeltaTable(table_path, storage_options=storage_options)
+    report = {
+        "small_files": count_small_files(dt, small_file_size),
+        "compacted": False,
+        "compaction_metrics": None,
+        "checkpointed": False,
+        "vacuumed_files": 0,
+    }
+
+    if report["small_files"] >= small_file_threshold:
+        report["compaction_metrics"] = dt.optimize.compact(target_size=target_size)
+        report["compacted"] = True
+        dt.create_checkpoint()
+        dt.cleanup_metadata()
+        report["checkpointed"] = True
+        logger.info(f"Compacted {report['small_files']} small files of Delta table {table_path}")
+
+    if vacuum:
+        removed = dt.vacuum(
+            retention_hours=retention_hours,
+            dry_run=False,
+            enforce_retention_duration=retention_hours >= 7 * 24,
+        )
+        report["vacuumed_files"] = len(removed)
+        if removed:
+            logger.info(f"Vacuumed {len(removed)} files of Delta table {table_path}")
+
+    return report
+
+
+def maintain_delta_table_spark(table_name: str, retention_hours: int = 7 * 24, zorder_by: list = None) -> dict:
+    """
+    Spark counterpart of ``maintain_delta_table`` for tables written with ``saveAsTable``
+    (or a Delta table path): ``OPTIMIZE`` (bin-packing small files, optionally
+    Z-ordered) then ``VACUUM``. No checkpoint is forced: Delta writes one every
+    ``delta.checkpointInterval`` commits.
+
+    A ``retention_hours`` below 168 (the Delta default) is rejected by Spark's
+    VACUUM unless ``spark.databricks.delta.retentionDurationCheck.enabled`` is
+    ``false``: it is checked before anything runs, and raises ValueError.
+
+    Returns
+    -------
+    dict
+        ``compacted``, ``zordered``, ``vacuumed`` and ``retention_hours``.
+    """
+    from pyspark.sql import SparkSession
+
+    spark_session = SparkSession.builder.getOrCreate()
+    if retention_hours < 7 * 24:
+        check = spark_session.conf.get("spark.databricks.delta.retentionDurationCheck.enabled", "true")
+        if str(check).lower() != "false":
+            raise ValueError(
+                f"VACUUM with retention_hours={retention_hours} (< 168) needs "
+                "spark.databricks.delta.retentionDurationCheck.enabled=false"
+            )
+
+    # Paths (e.g. the log tables of the decorators) are addressed as delta.`path`
+    table = f"delta.`{table_name}`" if "/" in table_name else table_name
+    optimize = f"OPTIMIZE {table}"
+    if zorder_by:
+        optimize += f" ZORDER BY ({', '.join(zorder_by)})"
+    spark_session.sql(optimize)
+    spark_session.sql(f"VACUUM {table} RETAIN {retention_hours} HOURS")
+    logger.info(f"Optimized and vacuumed Delta table {table_name}")
+    return {"compacted": True, "zordered": bool(zorder_by), "vacuumed": True, "retention_hours": retention_hours}
+
+
+class TableMaintainer:
+    """
+    Runs a maintenance function opportunistically in a background thread.
+
+    ``notify_write()`` is called after each write to the table. Every
+    ``every_n_writes`` writes, the maintenance is started in a daemon thread,
+    unless the previous one is still running: the writer never waits for it,
+    and a failed maintenance is only logged.
+
+    Args:
+        maintain (callable): Maintenance to run, e.g. ``lambda: maintain_delta_table(path)``
+        every_n_writes (int): Number of writes between two maintenance runs
+    """
+
+    def __init__(self, maintain, every_n_writes: int = 50):
+        self.maintain = maintain
+        self.every_n_writes = every_n_writes
+        self.last_report = None
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._running = threading.Lock()
+        self._thread = None
+
+    def notify_write(self, count: int = 1):
+        with self._lock:
+            self._writes += count
+            due = self._writes >= self.every_n_writes
+            if due:
+                self._writes = 0
+        if due:
+            self.run_in_background()
+
+    def run_in_background(self) -> bool:
+        """Start a maintenance run; returns False if one is already running."""
+        if not self._running.acquire(blocking=False):
+            return False
+        self._thread = threading.Thread(target=self._run, name="delta-table-maintenance", daemon=True)
+        self._thread.start()
+        return True
+
+    def _run(self):
+        try:
+            self.last_report = self.maintain()
+        except Exception as e:
+            logger.info(f"Delta table maintenance failed: {e}")
+        finally:
+            self._running.release()
+
+    def wait(self, timeout: float = None):
+        """Wait for the running maintenance, if any (mostly for tests and shutdown)."""
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+
+class DeltaSnapshotCache:
+    """
+    Local cache of Delta table reads, pinned to the table version.
+
+    ``read`` checks the current version of the table (a log read, no data
+    file) and, when it is the cached one, memory-maps the local copy instead of
+    downloading the table again. Entries are keyed by table path + projected
+    columns + filters; each entry keeps one uncompressed Arrow IPC file per
+    Delta data file, plus a ``manifest.json`` holding the version and the data
+    files it was built from.
+
+    Data files are immutable in Delta, so when the version has advanced only
+    the files added since are read (with the projection and filters pushed
+    down); the fragments of removed files are dropped and the others reused.
+    A schema change rebuilds the entry.
+
+    Example
+    -------
+    >>> cache = DeltaSnapshotCache("/tmp/msf_delta_cache")
+    >>> historic = cache.read(table_path, columns=["code", "name"], filters=[("country", "=", "CD")])
+    """
+
+    SUFFIX = ".arrow"
+    MANIFEST = "manifest.json"
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+        self.hits = 0
+        self.misses = 0
+        self.last_refresh = None
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def _hash(value: str) -> str:
+        return hashlib.sha256(value.encode("utf-8")).hexdigest()[:32]
+
+    @staticmethod
+    def to_expression(filters):
+        """``filters`` as a pyarrow expression: DNF tuples (as ``DeltaTable.to_pandas``) or an expression."""
+        if filters is None or isinstance(filters, ds.Expression):
+            return filters
+        import pyarrow.parquet as pq
+
+        return pq.filters_to_expression(filters)
+
+    def key(self, table_path: str, columns: list = None, filters=None) -> str:
+        """Cache key of a read: table path + projection + filters."""
+        expression = self.to_expression(filters)
+        read = f"{table_path.rstrip('/')}|{columns!r}|{expression}"
+        return f"{self._hash(table_path.rstrip('/'))[:16]}_{self._hash(read)}"
+
+    def _entry_dir(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key)
+
+    def _load_manifest(self, entry_dir: str) -> dict | None:
+        try:
+            with open(os.path.join(entry_dir, self.MANIFEST), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_manifest(self, entry_dir: str, manifest: dict):
+        path = os.path.join(entry_dir, self.MANIFEST)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, path)
+
+    def _write_fragment(self, path: str, table: pa.Table):
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with pa.OSFile(tmp_path, "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp_path, path)
+
+    def _read_entry(self, entry_dir: str, manifest: dict, schema: pa.Schema) -> pa.Table:
+        tables = []
+        for name in manifest["files"].values():
+            with pa.memory_map(os.path.join(entry_dir, name), "r") as source:
+                tables.append(pa.ipc.open_file(source).read_all())
+        if not tables:
+            return schema.empty_table()
+        return pa.concat_tables(tables)
+
+    def read_table(self, table_path: str, columns: list = None, filters=None, version: int = None,
+                   storage_options: dict = None) -> pa.Table:
+        """
+        Read a Delta table through the cache, as an Arrow table.
+
+        Parameters
+        ----------
+        table_path : str
+            Path / URI of the Delta table.
+        columns : list, optional
+            Columns to read, all by default.
+        filters : list of tuples or pyarrow.dataset.Expression, optional
+            Row filter, e.g. ``[("country", "=", "CD")]``. It prunes the data
+            files on partition values and file statistics, and is applied to
+            the rows read.
+        version : int, optional
+            Version to read (time travel), the latest by default.
+        storage_options : dict, optional
+            Storage options passed to ``DeltaTable`` (e.g. OneLake credentials).
+
+        Returns
+        -------
+        pyarrow.Table
+            Memory-mapped from the local fragments.
+        """
+        dt = DeltaTable(table_path, version=version, storage_options=storage_options)
+        current_version = dt.version()
+        key = self.key(table_path, columns, filters)
+        entry_dir = self._entry_dir(key)
+        os.makedirs(entry_dir, exist_ok=True)
+
+        dataset = dt.to_pyarrow_dataset()
+        schema = dataset.schema if columns is None else pa.schema([dataset.schema.field(c) for c in columns])
+        manifest = self._load_manifest(entry_dir)
+        if manifest is not None and manifest.get("schema") != schema.to_string():
+            manifest = None
+
+        if manifest is not None and manifest["version"] == current_version:
+            self.hits += 1
+            logger.info(f"Delta snapshot cache hit for {table_path} at version {current_version}")
+            return self._read_entry(entry_dir, manifest, schema)
+
+        # Refresh from the data files of the current version
+        self.misses += 1
+        expression = self.to_expression(filters)
+        cached = manifest["files"] if manifest is not None else {}
+        previous_version = manifest["version"] if manifest is not None else None
+        files, added = {}, 0
+        for fragment in dataset.get_fragments(filter=expression):
+            name = cached.get(fragment.path)
+            if name is None or not os.path.exists(os.path.join(entry_dir, name)):
+                name = self._hash(fragment.path) + self.SUFFIX
+                table = fragment.to_table(schema=dataset.schema, columns=columns, filter=expression)
+                self._write_fragment(os.path.join(entry_dir, name), table)
+                added += 1
+            files[fragment.path] = name
+
+        removed = 0
+        for path, name in cached.items():
+            if path not in files:
+                removed += self._remove(os.path.join(entry_dir, name))
+        manifest = {"table_path": table_path, "version": current_version, "schema": schema.to_string(), "files": files}
+        self._write_manifest(entry_dir, manifest)
+
+        self.last_refresh = {
+            "version": current_version,
+            "previous_version": previous_version,
+            "files_read": added,
+            "files_reused": len(files) - added,
+            "files_dropped": removed,
+        }
+        logger.info(f"Delta snapshot cache refreshed {table_path} to version {current_version}: "
+                    f"{added} files read, {len(files) - added} reused, {removed} dropped")
+        return self._read_entry(entry_dir, manifest, schema)
+
+    def read(self, table_path: str, columns: list = None, filters=None, version: int = None,
+             storage_options: dict = None) -> pd.DataFrame:
+        """``read_table`` converted to pandas, a cached drop-in for ``DeltaTable(...).to_pandas()``."""
+        return self.read_table(table_path, columns, filters, version, storage_options).to_pandas()
+
+    def invalidate(self, table_path: str = None) -> int:
+        """Drop the entries of ``table_path`` (every entry by default); returns the number of entries removed."""
+        prefix = self._hash(table_path.rstrip("/"))[:16] + "_" if table_path is not None else ""
+        removed = 0
+        for name in os.listdir(self.cache_dir):
+            entry_dir = os.path.join(self.cache_dir, name)
+            if os.path.isdir(entry_dir) and name.startswith(prefix):
+                for file_name in os.listdir(entry_dir):
+                    self._remove(os.path.join(entry_dir, file_name))
+                os.rmdir(entry_dir)
+                removed += 1
+        logger.info(f"Delta snapshot cache invalidated {removed} entries")
+        return removed
+
+    @staticmethod
+    def _remove(path: str) -> bool:
+        try:
+            os.remove(path)
+            return True
+        except FileNotFoundError:
+            return False
+
+
+SCD2_VALID_FROM = "valid_from"
+SCD2_VALID_TO = "valid_to"
+SCD2_IS_CURRENT = "is_current"
+_SYNC_META_COLUMNS = ("changed_columns", "type_of_change")
+
+
+def _sql_name(name: str) -> str:
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def _attribute_columns(df: pd.DataFrame, key: list) -> list:
+    """Non-key data columns of a sync result frame (without ``old_*`` and sync metadata)."""
+    return [
+        col for col in df.columns
+        if col not in key and col not in _SYNC_META_COLUMNS
+        and not (col.startswith("old_") and col[4:] in df.columns)
+    ]
+
+
+def _is_tracked_change(changed_columns, tracked_columns: list) -> bool:
+    if changed_columns is None or (not isinstance(changed_columns, (list, tuple)) and pd.isna(changed_columns)):
+        return True
+    return any(col in tracked_columns for col in changed_columns)
+
+
+def apply_scd2_changes(
+    table_path: str,
+    sync_result: dict,
+    key: list,
+    tracked_columns: list = None,
+    effective_date=None,
+    storage_options: dict = None,
+) -> dict:
+    """
+    Maintain an SCD Type 2 history table from the output of ``sync_dataframes_with_old_new``.
+
+    The history table holds the key and attribute columns plus ``valid_from``,
+    ``valid_to`` (null while current) and ``is_current``. Only the day's changes
+    are written, in a single Delta MERGE transaction:
+
+    - ``to_create``: a new current version is inserted.
+    - ``to_update``: the current version is closed (``valid_to = effective_date``,
+      ``is_current = false``) and the new one inserted.
+    - ``to_delete``: the current version is closed.
+    - ``to_keep`` is ignored.
+
+    The source of the merge holds each closed key twice: once with its merge
+    keys set, matching the current row to close, and once with null merge keys,
+    which never match and are inserted (the usual SCD2 merge trick). Only the
+    data files holding matched rows are rewritten, and delta-rs skips the files
+    whose key statistics exclude the source keys.
+
+    Parameters
+    ----------
+    table_path : str
+        Path / URI of the history table, created by the first call.
+    sync_result : dict of {str: pandas.DataFrame}
+        Output of ``sync_dataframes_with_old_new``.
+    key : list
+        Columns identifying a record.
+    tracked_columns : list, optional
+        Attributes whose changes create a new version. Updates changing only
+        other attributes overwrite the current version in place (SCD Type 1).
+        Needs the ``changed_columns`` of ``showChangedCol=True``. All attributes
+        are tracked by default.
+    effective_date : datetime-like, optional
+        Start of the new versions and end of the closed ones, now by default.
+    storage_options : dict, optional
+        Storage options passed to ``DeltaTable`` (e.g. OneLake credentials).
+
+    Returns
+    -------
+    dict
+        ``inserted``, ``closed``, ``overwritten`` (row counts), ``version`` of the
+        table after the write and ``metrics`` of the merge (None on creation).
+    """
+    from deltalake.exceptions import TableNotFoundError
+    from deltalake.writer import write_deltalake
+
+    effective_date = pd.Timestamp(effective_date if effective_date is not None else pd.Timestamp.now())
+    to_create = sync_result.get("to_create", pd.DataFrame())
+    to_update = sync_result.get("to_update", pd.DataFrame())
+    to_delete = sync_result.get("to_delete", pd.DataFrame())
+    # to_create always has the columns of the new records (to_update lacks the key when nothing matched)
+    reference = next((df for df in (to_create, to_update, to_delete) if all(k in df.columns for k in key)), to_create)
+    attributes = _attribute_columns(reference, key)
+
+    if tracked_columns is not None and len(to_update) and "changed_columns" not in to_update.columns:
+        raise ValueError("tracked_columns needs the changed_columns of sync_dataframes_with_old_new(showChangedCol=True)")
+    if tracked_columns is None or not len(to_update):
+        versioned, overwritten = to_update, to_update.iloc[0:0]
+    else:
+        is_tracked = to_update["changed_columns"].map(lambda changed: _is_tracked_change(changed, tracked_columns))
+        versioned, overwritten = to_update[is_tracked.astype(bool)], to_update[~is_tracked.astype(bool)]
+
+    def rows(df, action, merge_keys):
+        df = df.reindex(columns=key + attributes).copy()
+        for k in key:
+            df["_merge_" + k] = df[k] if merge_keys else None
+        df["_action"] = action
+        return df
+
+    parts = [
+        rows(versioned, "close", True),
+        rows(to_delete, "close", True),
+        rows(overwritten, "overwrite", True),
+        rows(to_create, "insert", False),
+        rows(versioned, "insert", False),
+    ]
+    # Empty parts would turn integer columns into float / object
+    source = pd.concat([part for part in parts if len(part)] or parts[:1], ignore_index=True)
+    report = {
+        "inserted": len(to_create) + len(versioned),
+        "closed": len(versioned) + len(to_delete),
+        "overwritten": len(overwritten),
+        "version": None,
+        "metrics": None,
+    }
+    if source.empty:
+        logger.info(f"No SCD2 change to apply to {table_path}")
+        return report
+
+    source[SCD2_VALID_FROM] = effective_date
+    source[SCD2_VALID_FROM] = source[SCD2_VALID_FROM].astype("datetime64[us]")
+
+    try:
+        dt = DeltaTable(table_path, storage_options=storage_options)
+    except TableNotFoundError:
+        dt = None
+    if dt is None:
+        if report["closed"] or report["overwritten"]:
+            raise ValueError(f"No SCD2 history table at {table_path} to close or overwrite rows in")
+        history = source[source["_action"] == "insert"][key + attributes + [SCD2_VALID_FROM]].copy()
+        history[SCD2_VALID_TO] = pd.Series(pd.NaT, index=history.index, dtype="datetime64[us]")
+        history[SCD2_IS_CURRENT] = True
+        write_deltalake(table_path, history, storage_options=storage_options)
+        report["version"] = 0
+        logger.info(f"SCD2 history table created at {table_path} with {len(history)} rows")
+        return report
+
+    predicate = " AND ".join(
+        [f"target.{_sql_name(k)} = source.{_sql_name('_merge_' + k)}" for k in key]
+        + [f"target.{_sql_name(SCD2_IS_CURRENT)}"]
+    )
+    merger = dt.merge(source, predicate=predicate, source_alias="source", target_alias="target")
+    merger = merger.when_matched_update(
+        updates={_sql_name(SCD2_VALID_TO): f"source.{_sql_name(SCD2_VALID_FROM)}", _sql_name(SCD2_IS_CURRENT): "false"},
+        predicate="source._action = 'close'",
+    )
+    if len(overwritten):
+        merger = merger.when_matched_update(
+            updates={_sql_name(col): f"source.{_sql_name(col)}" for col in attributes},
+            predicate="source._action = 'overwrite'",
+        )
+    merger = merger.when_not_matched_insert(
+        updates={
+            **{_sql_name(col): f"source.{_sql_name(col)}" for col in key + attributes},
+            _sql_name(SCD2_VALID_FROM): f"source.{_sql_name(SCD2_VALID_FROM)}",
+            _sql_name(SCD2_VALID_TO): "NULL",
+            _sql_name(SCD2_IS_CURRENT): "true",
+        },
+        predicate="source._action = 'insert'",
+    )
+    report["metrics"] = merger.execute()
+    report["version"] = dt.version()
+    logger.info(f"SCD2 changes applied to {table_path}: {report['inserted']} inserted, "
+                f"{report['closed']} closed, {report['overwritten']} overwritten")
+    return report
+
+
+def read_scd2_as_of(
+    table_path: str,
+    as_of=None,
+    columns: list = None,
+    filters=None,
+    storage_options: dict = None,
+    cache: DeltaSnapshotCache = None,
+) -> pd.DataFrame:
+    """
+    Versions of an SCD2 history table (see ``apply_scd2_changes``) valid at ``as_of``.
+
+    The validity condition (``valid_from <= as_of`` and ``valid_to`` null or
+    after ``as_of``; ``is_current`` when ``as_of`` is None) is pushed down to
+    the Delta scan, so files whose statistics exclude the date are not read.
+
+    Parameters
+    ----------
+    table_path : str
+        Path / URI of the history table.
+    as_of : datetime-like, optional
+        Date to read the table at, the current versions by default.
+    columns : list, optional
+        Columns to return, all by default.
+    filters : list of tuples or pyarrow.dataset.Expression, optional
+        Additional row filter, e.g. ``[("country", "=", "CD")]``.
+    storage_options : dict, optional
+        Storage options passed to ``DeltaTable``.
+    cache : DeltaSnapshotCache, optional
+        Read through this cache (one entry per ``as_of``).
+
+    Returns
+    -------
+    pandas.DataFrame
+    """
+    import pyarrow.compute as pc
+
+    if as_of is None:
+        expression = pc.field(SCD2_IS_CURRENT) == True  # noqa: E712
+    else:
+        as_of = pa.scalar(pd.Timestamp(as_of).to_datetime64().astype("datetime64[us]"))
+        expression = (pc.field(SCD2_VALID_FROM) <= as_of) & (
+            pc.field(SCD2_VALID_TO).is_null() | (pc.field(SCD2_VALID_TO) > as_of))
+    extra = DeltaSnapshotCache.to_expression(filters)
+    if extra is not None:
+        expression = expression & extra
+
+    if cache is not None:
+        return cache.read(table_path, columns=columns, filters=expression, storage_options=storage_options)
+    dataset = DeltaTable(table_path, storage_options=storage_options).to_pyarrow_dataset()
+    return dataset.to_table(columns=columns, filter=expression).to_pandas()
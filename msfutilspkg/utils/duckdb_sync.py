@@ -0,0 +1,187 @@
+import os
+import logging
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+from deltalake import DeltaTable
+
+logger = logging.getLogger(__name__)
+
+
+def _import_duckdb():
+    try:
+        import duckdb
+    except ImportError as e:
+        raise ImportError("The DuckDB sync engine needs duckdb: pip install msfutilspkg[duckdb]") from e
+    return duckdb
+
+
+def _quote(name: str) -> str:
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def _literal(value) -> str:
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def _register(con, name: str, source, storage_options: dict = None):
+    """
+    Expose ``source`` to DuckDB as the view ``name``, without copying it.
+
+    ``source`` is a DataFrame, an Arrow table / dataset, a ``DeltaTable``, or the
+    path of a Delta table (directory holding ``_delta_log``) or of Parquet files
+    (a file, a directory or a glob).
+    """
+    if isinstance(source, str):
+        if os.path.isdir(os.path.join(source, "_delta_log")) or "://" in source:
+            source = DeltaTable(source, storage_options=storage_options)
+        else:
+            path = os.path.join(source, "**", "*.parquet") if os.path.isdir(source) else source
+            con.execute(f"CREATE OR REPLACE TEMP VIEW {name}_source AS SELECT * FROM read_parquet({_literal(path)})")
+            source = None
+    if isinstance(source, DeltaTable):
+        source = source.to_pyarrow_dataset()
+    if source is not None:
+        if not isinstance(source, (pd.DataFrame, pa.Table, pa.RecordBatchReader, ds.Dataset)):
+            raise ValueError(f"Unsupported sync source: {type(source).__name__}")
+        con.register(f"{name}_source", source)
+    # Input order, used to return rows in the same order as the pandas engine
+    con.execute(f"CREATE OR REPLACE TEMP VIEW {name} AS SELECT *, row_number() OVER () AS _sync_row FROM {name}_source")
+    return [column[0] for column in con.execute(f"SELECT * FROM {name}_source LIMIT 0").description]
+
+
+def _fetch(con, sql: str, dtypes: dict) -> pd.DataFrame:
+    df = con.execute(sql).df()
+    if "changed_columns" in df.columns:
+        df["changed_columns"] = [list(value) if value is not None else None for value in df["changed_columns"]]
+    # Back to the dtypes of the input DataFrames (e.g. object vs. string)
+    for col, dtype in dtypes.items():
+        if col in df.columns and df[col].dtype != dtype:
+            try:
+                df[col] = df[col].astype(dtype)
+            except (TypeError, ValueError):
+                pass
+    return df
+
+
+def sync_tables_duckdb(newRecords, historic, key: list, showChangedCol: bool = False, threads: int = None,
+                       memory_limit: str = None, temp_directory: str = None, storage_options: dict = None,
+                       connection=None) -> dict:
+    """
+    DuckDB engine of ``sync_dataframes_with_old_new``.
+
+    The classification runs as SQL over the sources, read in place: anti joins
+    give the created and deleted rows, an inner join compares every non-key
+    column with ``IS DISTINCT FROM`` for the updated / unchanged ones. Only the
+    four result categories are materialised, as pandas DataFrames with the same
+    columns, order and values as the pandas engine.
+
+    Parameters
+    ----------
+    newRecords, historic : pandas.DataFrame, pyarrow.Table, pyarrow.dataset.Dataset, DeltaTable or str
+        Inputs; a str is the path / URI of a Delta table, or the path of Parquet
+        files (file, directory or glob).
+    key : list
+        Columns identifying a record.
+    showChangedCol : bool
+        Include ``old_*`` values and ``changed_columns`` in ``to_update``.
+    threads : int, optional
+        DuckDB threads, all cores by default.
+    memory_limit : str, optional
+        e.g. ``"4GB"``: above it, joins and sorts spill to ``temp_directory``.
+    temp_directory : str, optional
+        Spill directory, DuckDB's default (``.tmp`` / in-memory database) otherwise.
+    storage_options : dict, optional
+        Storage options of Delta tables given by URI (e.g. OneLake credentials).
+    connection : duckdb.DuckDBPyConnection, optional
+        Connection to use instead of a new in-memory one; the views and tables
+        created on it are dropped before returning (``threads``, ``memory_limit`` and
+        ``temp_directory`` stay set on it).
+
+    Returns
+    -------
+    dict of {str: pandas.DataFrame}
+        ``to_create``, ``to_update``, ``to_delete`` and ``to_keep``, as ``sync_dataframes_with_old_new``.
+
+    Notes
+    -----
+    Two missing values compare equal (``IS DISTINCT FROM``), whereas the pandas
+    engine reports NaN vs. NaN in float columns as a change. Keys never match on NULL.
+    """
+    duckdb = _import_duckdb()
+    con = connection or duckdb.connect()
+    try:
+        if threads:
+            con.execute(f"SET threads = {int(threads)}")
+        if memory_limit:
+            con.execute(f"SET memory_limit = {_literal(memory_limit)}")
+        if temp_directory:
+            con.execute(f"SET temp_directory = {_literal(temp_directory)}")
+
+        new_cols = _register(con, "_sync_new", newRecords, storage_options)
+        old_cols = _register(con, "_sync_historic", historic, storage_options)
+        new_dtypes = newRecords.dtypes.to_dict() if isinstance(newRecords, pd.DataFrame) else {}
+        old_dtypes = historic.dtypes.to_dict() if isinstance(historic, pd.DataFrame) else {}
+
+        non_key_cols = [col for col in new_cols if col not in key]
+        old_non_key_cols = ["old_" + col for col in non_key_cols]
+        on = " AND ".join(f"n.{_quote(k)} = h.{_quote(k)}" for k in key)
+        using = ", ".join(_quote(k) for k in key)
+        distinct = [f"n.{_quote(col)} IS DISTINCT FROM h.{_quote(col)}" for col in non_key_cols]
+        changed_list = ", ".join(f"CASE WHEN {d} THEN {_literal(col)} END"
+                                 for d, col in zip(distinct, non_key_cols))
+
+        # --- To create / to delete ---
+        to_create = _fetch(con, f"SELECT {', '.join(_quote(c) for c in new_cols)} FROM _sync_new "
+                                f"ANTI JOIN _sync_historic USING ({using}) ORDER BY _sync_row", new_dtypes)
+        to_create["changed_columns"] = None
+        to_create["type_of_change"] = "Create"
+
+        to_delete = _fetch(con, f"SELECT {', '.join(_quote(c) for c in old_cols)} FROM _sync_historic "
+                                f"ANTI JOIN _sync_new USING ({using}) ORDER BY _sync_row", old_dtypes)
+        to_delete["type_of_change"] = "Delete"
+        to_delete["changed_columns"] = None
+
+        for col in old_non_key_cols:
+            to_create[col] = None
+            to_delete[col] = None
+
+        # --- Matched rows, compared column by column ---
+        con.execute(f"""
+            CREATE OR REPLACE TEMP TABLE _sync_matched AS
+            SELECT {', '.join(f'n.{_quote(k)}' for k in key)},
+                   {', '.join([f'n.{_quote(c)}' for c in non_key_cols] + [f'h.{_quote(c)} AS {_quote("old_" + c)}' for c in non_key_cols]) or 'NULL AS _none'},
+                   {f'list_filter([{changed_list}], x -> x IS NOT NULL)' if non_key_cols else '[]::VARCHAR[]'} AS changed_columns,
+                   {' OR '.join(distinct) or 'FALSE'} AS _has_change,
+                   n._sync_row
+            FROM _sync_new n JOIN _sync_historic h ON {on}
+        """)
+        matched = con.execute("SELECT count(*) FROM _sync_matched").fetchone()[0]
+        if matched == 0:
+            empty = pd.DataFrame(columns=non_key_cols + old_non_key_cols)
+            return {"to_create": to_create, "to_update": empty, "to_delete": to_delete, "to_keep": empty.copy()}
+
+        to_keep = _fetch(con, f"SELECT {', '.join(_quote(c) for c in key + non_key_cols)} FROM _sync_matched "
+                              f"WHERE NOT _has_change ORDER BY _sync_row", new_dtypes)
+        to_keep["type_of_change"] = "No change"
+        to_keep["changed_columns"] = None
+
+        if showChangedCol:
+            update_cols = key + [c for col in non_key_cols for c in ("old_" + col, col)] + ["changed_columns"]
+        else:
+            update_cols = key + non_key_cols
+        to_update = _fetch(con, f"SELECT {', '.join(_quote(c) for c in update_cols)} FROM _sync_matched "
+                                f"WHERE _has_change ORDER BY _sync_row",
+                           {**new_dtypes, **{"old_" + c: old_dtypes[c] for c in non_key_cols if c in old_dtypes}})
+        to_update["type_of_change"] = "Update"
+
+        logger.info(f"DuckDB sync: {len(to_create)} created, {len(to_update)} updated, "
+                    f"{len(to_delete)} deleted, {len(to_keep)} unchanged")
+        return {"to_create": to_create, "to_update": to_update, "to_delete": to_delete, "to_keep": to_keep}
+    finally:
+        # Leave a caller's connection as it was given (registrations hold references to the inputs)
+        con.execute("DROP TABLE IF EXISTS _sync_matched")
+        for name in ("_sync_new", "_sync_historic", "_sync_new_source", "_sync_historic_source"):
+            con.execute(f"DROP VIEW IF EXISTS {name}")
+        if connection is None:
+            con.close()
@@ -1,15 +1,18 @@
 import pandas as pd
 import datetime
 import numpy as np
+import io
 import os, shutil
 from deltalake import DeltaTable
 from deltalake.writer import write_deltalake
 import logging
+from msfutilspkg.utils.instrumentation import instrumented
 
 logger = logging.getLogger(__name__)
 
 
 
+@instrumented("write_delta_lake_table", rows=lambda result, df, *args, **kwargs: len(df))
 def write_delta_lake_table(df: pd.DataFrame, table_path: str, schema_dtype: dict, mode: str = 'append'):
     """
     Ajoute les métadonnées du job à la table Delta spécifiée par table_path.
@@ -39,14 +42,8 @@ def write_delta_lake_table(df: pd.DataFrame, table_path: str, schema_dtype: dict
     
     logger.info(f"Statut du job '{df.get('job_name')}' ajouté à la table Delta à {table_path}")
 
-def write_excel_2003_xml_from_df(df, filename, sheet_name="Sheet1"):
-    """
-    Write a pandas DataFrame to Excel 2003 XML (.xls) with:
-      - Dates displayed as DD/MM/YYYY
-      - NaT, NaN, None handled as blank cells
-      - Array-like cells skipped safely
-    """
-    xml_header = f"""<?xml version="1.0"?>
+def _excel_2003_xml_header(columns, sheet_name: str) -> str:
+    header = f"""<?xml version="1.0"?>
 <Workbook xmlns="urn:schemas-microsoft-com:office:spreadsheet"
           xmlns:o="urn:schemas-microsoft-com:office:office"
           xmlns:x="urn:schemas-microsoft-com:office:excel"
@@ -59,19 +56,23 @@ def write_excel_2003_xml_from_df(df, filename, sheet_name="Sheet1"):
   <Worksheet ss:Name="{sheet_name}">
     <Table>
 """
-    xml_footer = """    </Table>
+    # Headers
+    xml_rows = ["      <Row>\n"]
+    for header_name in columns:
+        xml_rows.append(f'        <Cell><Data ss:Type="String">{header_name}</Data></Cell>\n')
+    xml_rows.append("      </Row>\n")
+    return header + "".join(xml_rows)
+
+
+_EXCEL_2003_XML_FOOTER = """    </Table>
   </Worksheet>
 </Workbook>"""
 
-    # Headers
-    xml_rows = "      <Row>\n"
-    for header in df.columns:
-        xml_rows += f'        <Cell><Data ss:Type="String">{header}</Data></Cell>\n'
-    xml_rows += "      </Row>\n"
-
-    # Data rows
-    for _, row in df.iterrows():
-        xml_rows += "      <Row>\n"
+
+def _excel_2003_xml_rows(df: pd.DataFrame, rows_per_chunk: int = 1000):
+    xml_rows = []
+    for i, (_, row) in enumerate(df.iterrows(), start=1):
+        xml_rows.append("      <Row>\n")
         for col, value in row.items():
             # Skip missing values and array-like objects
             if isinstance(value, (list, np.ndarray, pd.Series)):
@@ -83,28 +84,65 @@ def write_excel_2003_xml_from_df(df, filename, sheet_name="Sheet1"):
 
             # Numeric
             if isinstance(value, (int, float)):
-                xml_rows += f'        <Cell><Data ss:Type="Number">{value}</Data></Cell>\n'
+                xml_rows.append(f'        <Cell><Data ss:Type="Number">{value}</Data></Cell>\n')
 
             # Dates
             elif isinstance(value, (datetime.date, datetime.datetime, pd.Timestamp)):
                 if isinstance(value, datetime.date) and not isinstance(value, datetime.datetime):
                     value = datetime.datetime.combine(value, datetime.time(0, 0, 0))
                 date_value = value.strftime("%Y-%m-%dT%H:%M:%S.000")
-                xml_rows += f'        <Cell ss:StyleID="sDate"><Data ss:Type="DateTime">{date_value}</Data></Cell>\n'
+                xml_rows.append(f'        <Cell ss:StyleID="sDate"><Data ss:Type="DateTime">{date_value}</Data></Cell>\n')
 
             # Strings / other
             else:
-                xml_rows += f'        <Cell><Data ss:Type="String">{value}</Data></Cell>\n'
+                xml_rows.append(f'        <Cell><Data ss:Type="String">{value}</Data></Cell>\n')
 
-        xml_rows += "      </Row>\n"
+        xml_rows.append("      </Row>\n")
+        if i % rows_per_chunk == 0:
+            yield "".join(xml_rows)
+            xml_rows = []
 
-    # Save XML file
-    with open(filename, "w", encoding="utf-8") as f:
-        f.write(xml_header + xml_rows + xml_footer)
+    yield "".join(xml_rows)
 
-    logger.info(f"File saved as '{filename}'.")
 
-    
+def iter_excel_2003_xml(df: pd.DataFrame, sheet_name: str = "Sheet1", rows_per_chunk: int = 1000):
+    """
+    Render a pandas DataFrame as Excel 2003 XML, yielding the document as string
+    chunks of ``rows_per_chunk`` rows, so the whole workbook never has to be held
+    in memory (see ``write_excel_2003_xml_from_df``).
+    """
+    yield _excel_2003_xml_header(df.columns, sheet_name)
+    yield from _excel_2003_xml_rows(df, rows_per_chunk)
+    yield _EXCEL_2003_XML_FOOTER
+
+
+@instrumented("write_excel_2003_xml_from_df", rows=lambda result, df, *args, **kwargs: len(df))
+def write_excel_2003_xml_from_df(df, filename, sheet_name="Sheet1"):
+    """
+    Write a pandas DataFrame to Excel 2003 XML (.xls) with:
+      - Dates displayed as DD/MM/YYYY
+      - NaT, NaN, None handled as blank cells
+      - Array-like cells skipped safely
+
+    ``filename`` is a path, or a file-like object: text streams receive str,
+    binary streams (e.g. ``io.BytesIO``) the UTF-8 encoded document, written
+    chunk by chunk without touching the disk.
+    """
+    if isinstance(filename, (str, os.PathLike)):
+        # Save XML file
+        with open(filename, "w", encoding="utf-8") as f:
+            for chunk in iter_excel_2003_xml(df, sheet_name):
+                f.write(chunk)
+        logger.info(f"File saved as '{filename}'.")
+        return
+
+    text = isinstance(filename, io.TextIOBase)
+    for chunk in iter_excel_2003_xml(df, sheet_name):
+        filename.write(chunk if text else chunk.encode("utf-8"))
+    logger.info(f"Excel 2003 XML of {len(df)} rows written to {type(filename).__name__}.")
+
+
+@instrumented("write_excel_xlsx", rows=lambda result, df, *args, **kwargs: len(df))
 def write_excel_xlsx(df: pd.DataFrame, filename: str, sheet_name: str = "Sheet1"):
     """
     Write a pandas DataFrame to a simple Excel .xlsx file.
@@ -123,6 +161,7 @@ def write_excel_xlsx(df: pd.DataFrame, filename: str, sheet_name: str = "Sheet1"
     logger.info(f"File saved as '{filename}' in .xlsx format.")
 
 
+@instrumented("write_multiple_sheets_xlsx", rows=lambda result, dfs, *args, **kwargs: sum(len(df) for df in dfs))
 def write_multiple_sheets_xlsx(
     dfs: list[pd.DataFrame],
     filename: str,
@@ -177,3 +216,277 @@ def write_multiple_sheets_xlsx(
         logger.info("Mode: appended to existing file.")
     else:
         logger.info("Mode: created new file.")
+
+
+# --- Streaming exports -------------------------------------------------------
+
+DEFAULT_ROW_GROUP_SIZE = 100_000
+
+
+def _iter_tables(data, row_group_size: int, schema=None):
+    """
+    Normalise ``data`` (DataFrame, Arrow table, or iterable of DataFrames /
+    Arrow tables / record batches) into Arrow tables of at most
+    ``row_group_size`` rows, all with the same schema: ``schema`` if given,
+    else the first chunk's. A DataFrame is converted slice by slice, never as
+    a whole, with the types inferred from the whole frame (so a column that is
+    null in the first slice only is not typed ``null``).
+
+    Later chunks are safely cast to that schema (e.g. an all-null column, or
+    int to float); a chunk that does not fit raises ValueError.
+    """
+    import pyarrow as pa
+
+    if isinstance(data, (pd.DataFrame, pa.Table, pa.RecordBatch)):
+        data = [data]
+    given_schema = schema
+    empty = True
+    for i, chunk in enumerate(data):
+        chunk_schema = given_schema
+        if isinstance(chunk, pd.DataFrame) and chunk_schema is None:
+            chunk_schema = pa.Schema.from_pandas(chunk, preserve_index=False)
+        # An empty chunk only matters as the first one: it gives the schema
+        stop = len(chunk) if len(chunk) or schema is not None else 1
+        for start in range(0, stop, row_group_size):
+            piece = chunk.iloc[start:start + row_group_size] if isinstance(chunk, pd.DataFrame) \
+                else chunk.slice(start, row_group_size)
+            if isinstance(piece, pd.DataFrame):
+                piece = pa.Table.from_pandas(piece, schema=chunk_schema, preserve_index=False)
+            elif isinstance(piece, pa.RecordBatch):
+                piece = pa.Table.from_batches([piece])
+            if schema is None:
+                schema = piece.schema
+            elif not piece.schema.equals(schema, check_metadata=False):
+                try:
+                    piece = piece.select(schema.names).cast(schema)
+                except (pa.ArrowInvalid, pa.ArrowNotImplementedError, KeyError) as e:
+                    raise ValueError(
+                        f"Chunk {i} does not fit the schema of the first chunk ({e}); "
+                        f"pass the full schema with schema=pyarrow.schema([...])"
+                    ) from e
+            empty = False
+            yield piece
+    if empty:
+        yield _empty_input(given_schema).empty_table()
+
+
+def _empty_input(schema):
+    """Schema of an empty chunk iterator: the given one, as there is no chunk to infer it from."""
+    if schema is None:
+        raise ValueError("No data to export (empty chunk iterator): pass schema= to write an empty file")
+    return schema
+
+
+def _iter_frames(data, row_group_size: int, schema=None):
+    """``_iter_tables`` for the pandas based writers: DataFrames are sliced as they are."""
+    import pyarrow as pa
+
+    if isinstance(data, (pd.DataFrame, pa.Table, pa.RecordBatch)):
+        data = [data]
+    empty = True
+    for i, chunk in enumerate(data):
+        if not isinstance(chunk, pd.DataFrame):
+            chunk = chunk.to_pandas()
+        for start in range(0, len(chunk) if len(chunk) or i else 1, row_group_size):
+            empty = False
+            yield chunk.iloc[start:start + row_group_size]
+    if empty:
+        yield _empty_input(schema).empty_table().to_pandas()
+
+
+def _write_parquet(data, destination, row_group_size, compression=None, schema=None, **options):
+    import pyarrow.parquet as pq
+
+    rows, writer = 0, None
+    try:
+        for table in _iter_tables(data, row_group_size, schema):
+            if writer is None:
+                writer = pq.ParquetWriter(destination, table.schema, compression=compression or "zstd", **options)
+            writer.write_table(table, row_group_size=row_group_size)
+            rows += table.num_rows
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+
+def _write_arrow_ipc(data, destination, row_group_size, compression=None, schema=None, **options):
+    import pyarrow.ipc as ipc
+
+    # IPC file format (= Feather v2). Uncompressed by default, so readers can
+    # memory-map it without copying (pyarrow.memory_map + ipc.open_file).
+    rows, writer = 0, None
+    try:
+        for table in _iter_tables(data, row_group_size, schema):
+            if writer is None:
+                writer = ipc.new_file(destination, table.schema,
+                                      options=ipc.IpcWriteOptions(compression=compression, **options))
+            writer.write_table(table, max_chunksize=row_group_size)
+            rows += table.num_rows
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+
+def _write_csv(data, destination, row_group_size, compression=None, schema=None, **options):
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+
+    path = isinstance(destination, (str, os.PathLike))
+    if compression is None and path:
+        compression = _CSV_COMPRESSIONS.get(os.path.splitext(str(destination))[1].lower())
+    if compression is not None and not path:
+        raise ValueError("Compressed CSV exports need a path as destination")
+    if compression is not None:
+        sink = pa.CompressedOutputStream(destination, compression)
+    elif path:
+        sink = pa.OSFile(str(destination), "wb")
+    else:
+        sink = destination
+    rows, writer = 0, None
+    try:
+        for table in _iter_tables(data, row_group_size, schema):
+            if writer is None:
+                writer = pacsv.CSVWriter(sink, table.schema, write_options=pacsv.WriteOptions(**options))
+            writer.write_table(table)
+            rows += table.num_rows
+    finally:
+        if writer is not None:
+            writer.close()
+        if sink is not destination:
+            sink.close()
+    return rows
+
+
+def _write_xlsx(data, destination, row_group_size, sheet_name="Sheet1", schema=None, **options):
+    from openpyxl import Workbook
+
+    # write_only workbooks stream rows to disk instead of keeping cell objects
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(sheet_name)
+    rows = 0
+    for i, df in enumerate(_iter_frames(data, row_group_size, schema)):
+        if i == 0:
+            sheet.append(list(df.columns))
+        df = df.astype(object).where(df.notna(), None)
+        for row in df.itertuples(index=False, name=None):
+            sheet.append(row)
+        rows += len(df)
+    workbook.save(destination)
+    return rows
+
+
+def _write_excel_2003_xml(data, destination, row_group_size, sheet_name="Sheet1", schema=None, **options):
+    rows = 0
+    path = isinstance(destination, (str, os.PathLike))
+    out = open(destination, "w", encoding="utf-8") if path else destination
+    text = isinstance(out, io.TextIOBase)
+    try:
+        for i, df in enumerate(_iter_frames(data, row_group_size, schema)):
+            chunks = _excel_2003_xml_rows(df)
+            if i == 0:
+                chunks = [_excel_2003_xml_header(df.columns, sheet_name), *chunks]
+            for chunk in chunks:
+                out.write(chunk if text else chunk.encode("utf-8"))
+            rows += len(df)
+        out.write(_EXCEL_2003_XML_FOOTER if text else _EXCEL_2003_XML_FOOTER.encode("utf-8"))
+    finally:
+        if path:
+            out.close()
+    return rows
+
+
+_CSV_COMPRESSIONS = {".gz": "gzip", ".zst": "zstd", ".bz2": "bz2", ".lz4": "lz4"}
+
+# format name -> (file extensions, writer(data, destination, row_group_size, **options) -> rows)
+EXPORT_FORMATS = {
+    "parquet": ((".parquet", ".pq"), _write_parquet),
+    "arrow": ((".arrow", ".feather", ".ipc"), _write_arrow_ipc),
+    "csv": ((".csv", ".csv.gz", ".csv.zst", ".csv.bz2", ".csv.lz4"), _write_csv),
+    "xlsx": ((".xlsx",), _write_xlsx),
+    "xls": ((".xls", ".xml"), _write_excel_2003_xml),
+}
+_FORMAT_ALIASES = {"feather": "arrow", "ipc": "arrow", "excel": "xlsx", "excel_2003_xml": "xls"}
+
+
+def register_export_format(name: str, extensions: tuple, writer):
+    """
+    Add (or replace) a format of ``export_table``.
+
+    ``writer(data, destination, row_group_size, **options)`` writes ``data``
+    (see ``export_table``) and returns the number of rows written.
+    """
+    EXPORT_FORMATS[name] = (tuple(ext.lower() for ext in extensions), writer)
+
+
+def _resolve_format(destination, format: str | None) -> str:
+    if format is not None:
+        name = _FORMAT_ALIASES.get(format.lower(), format.lower())
+        if name not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown export format '{format}', expected one of {sorted(EXPORT_FORMATS)}")
+        return name
+    if not isinstance(destination, (str, os.PathLike)):
+        raise ValueError("format is required when the destination is not a path")
+    filename = str(destination).lower()
+    # Longest extension first, so ".csv.gz" wins over ".gz"
+    matches = [(len(ext), name) for name, (extensions, _) in EXPORT_FORMATS.items()
+               for ext in extensions if filename.endswith(ext)]
+    if not matches:
+        raise ValueError(f"Cannot infer the export format of '{destination}', pass format=")
+    return max(matches)[1]
+
+
+@instrumented("export_table", rows=lambda result, *args, **kwargs: result)
+def export_table(data, destination, format: str | None = None, row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
+                 **options) -> int:
+    """
+    Write ``data`` to a file in a columnar, CSV or Excel format, streaming it.
+
+    Parameters
+    ----------
+    data : pandas.DataFrame, pyarrow.Table or iterable of them
+        A frame, or an iterator of chunks (e.g. ``PostgresReader.iter_query``):
+        only one chunk of at most ``row_group_size`` rows is converted at a time.
+        Chunks must share their columns; they are cast to the first chunk's schema,
+        and a chunk that cannot be cast safely (e.g. floats after an int chunk)
+        raises ValueError: pass ``schema=`` for such streams.
+    destination : str, os.PathLike or file-like
+        Output path, or binary file object (``format`` is then required).
+    format : str, optional
+        ``"parquet"``, ``"arrow"`` (Arrow IPC file / Feather v2, memory-mappable),
+        ``"csv"`` (gzip / zstd compressed with ``compression=`` or a ``.gz`` /
+        ``.zst`` extension), ``"xlsx"``, ``"xls"`` (Excel 2003 XML), or a format
+        added with ``register_export_format``. Inferred from the extension of
+        ``destination`` by default.
+    row_group_size : int, optional
+        Rows per Parquet row group / Arrow record batch / conversion chunk.
+    **options
+        Format options, e.g. ``compression`` (parquet: "zstd" by default; arrow:
+        None by default, "zstd" or "lz4"; csv: "gzip" or "zstd"), ``schema``
+        (pyarrow.Schema of the columnar formats; for an empty chunk iterator, the
+        columns of the header-only file, any format), ``sheet_name`` (Excel).
+        An empty chunk iterator without ``schema`` raises ValueError.
+
+    Returns
+    -------
+    int
+        Number of rows written.
+
+    Examples
+    --------
+    >>> export_table(df, "positions.parquet")
+    >>> export_table(reader.iter_query(sql, chunksize=50_000), "positions.csv.gz")
+    >>> export_table(df, buffer, format="arrow", compression="zstd")
+    """
+    name = _resolve_format(destination, format)
+    _, writer = EXPORT_FORMATS[name]
+    try:
+        rows = writer(data, destination, row_group_size, **options)
+    except Exception:
+        # No partial file (e.g. an XML footer without header) is left behind
+        if isinstance(destination, (str, os.PathLike)) and os.path.isfile(destination):
+            os.remove(destination)
+        raise
+    logger.info(f"{rows} rows exported as {name} to '{destination}'.")
+    return rows
@@ -0,0 +1,200 @@
+import os
+import re
+import json
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+import requests
+from requests.structures import CaseInsensitiveDict
+
+logger = logging.getLogger(__name__)
+
+_MAX_AGE = re.compile(r"(?:^|,)\s*max-age\s*=\s*(\d+)", re.IGNORECASE)
+
+
+class HttpCache:
+    """
+    Cache of GET responses for ``ApiClient``, for reference endpoints that rarely change.
+
+    Responses are kept in an in-memory LRU and, optionally, in ``cache_dir`` so
+    they survive between runs. A response is fresh for its ``Cache-Control:
+    max-age`` (or the per-call / default TTL); once stale it is revalidated with
+    ``If-None-Match`` / ``If-Modified-Since`` when the server sent an ``ETag`` /
+    ``Last-Modified``, so an unchanged resource costs a bodyless ``304``.
+
+    Counters: ``hits`` (served without a request), ``revalidations`` (``304``
+    answers) and ``misses`` (full downloads).
+
+    Args:
+        max_entries (int): Size of the in-memory LRU
+        cache_dir (str): Optional directory of the on-disk store
+        default_ttl (float): Freshness in seconds of responses without ``max-age``
+            (0: always revalidate)
+
+    Example:
+        >>> client = ApiClient("https://api.fabric.microsoft.com/v1", cache=HttpCache(cache_dir="/tmp/http_cache"))
+        >>> client.get(f"/workspaces/{workspace_id}", cache_ttl=3600)
+    """
+
+    def __init__(self, max_entries: int = 512, cache_dir: str = None, default_ttl: float = 0):
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self.default_ttl = default_ttl
+        self.hits = 0
+        self.revalidations = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def key(method: str, url: str, params: dict = None, payload=None, vary: dict = None) -> str:
+        """Cache key of a request (verb, URL, query string, JSON body and varying headers such as Authorization)."""
+        parts = [method.upper(), url, json.dumps(params, sort_keys=True, default=str),
+                 json.dumps(payload, sort_keys=True, default=str), json.dumps(vary, sort_keys=True, default=str)]
+        return hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()
+
+    def _count(self, counter: str):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "revalidations": self.revalidations, "misses": self.misses}
+
+    # --- storage ---
+
+    def _paths(self, key: str):
+        return os.path.join(self.cache_dir, key + ".json"), os.path.join(self.cache_dir, key + ".body")
+
+    def get(self, key: str) -> dict | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry
+        if not self.cache_dir:
+            return None
+        meta_path, body_path = self._paths(key)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            with open(body_path, "rb") as f:
+                entry["content"] = f.read()
+        except (OSError, ValueError):
+            return None
+        self._remember(key, entry)
+        return entry
+
+    def put(self, key: str, entry: dict):
+        self._remember(key, entry)
+        if self.cache_dir:
+            meta_path, body_path = self._paths(key)
+            suffix = f".{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(body_path + suffix, "wb") as f:
+                f.write(entry["content"])
+            with open(meta_path + suffix, "w", encoding="utf-8") as f:
+                json.dump({k: v for k, v in entry.items() if k != "content"}, f)
+            os.replace(body_path + suffix, body_path)
+            os.replace(meta_path + suffix, meta_path)
+
+    def _remember(self, key: str, entry: dict):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drop every cached response (memory and disk)."""
+        with self._lock:
+            self._entries.clear()
+        if self.cache_dir:
+            for name in os.listdir(self.cache_dir):
+                if name.endswith((".json", ".body")):
+                    os.remove(os.path.join(self.cache_dir, name))
+
+    # --- HTTP logic ---
+
+    def _freshness(self, response: requests.Response, ttl: float = None) -> float | None:
+        """Seconds the response stays fresh, or None if it must not be stored."""
+        cache_control = response.headers.get("Cache-Control", "")
+        if "no-store" in cache_control.lower():
+            return None
+        if ttl is not None:
+            return ttl
+        if "no-cache" in cache_control.lower():
+            return 0
+        max_age = _MAX_AGE.search(cache_control)
+        if max_age:
+            return int(max_age.group(1))
+        return self.default_ttl
+
+    def request(self, send, key: str, headers: dict = None, ttl: float = None) -> requests.Response:
+        """
+        Serve a GET from the cache, revalidate it or download it.
+
+        Args:
+            send (callable): ``send(headers) -> requests.Response`` performing the actual request
+            key (str): Cache key of the request (see ``HttpCache.key``)
+            headers (dict): Headers of the request
+            ttl (float): Per-call freshness override, in seconds
+        """
+        headers = dict(headers or {})
+        entry = self.get(key)
+        now = time.time()
+
+        # A per-call TTL applies from the last time the response was validated
+        if entry is not None and ttl is not None:
+            fresh = entry["validated_at"] + ttl > now
+        else:
+            fresh = entry is not None and entry["expires_at"] > now
+
+        if fresh:
+            self._count("hits")
+            logger.debug(f"HTTP cache hit for {entry['url']} ({self.stats()})")
+            return _to_response(entry)
+
+        if entry is not None:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        response = send(headers)
+
+        if entry is not None and response.status_code == 304:
+            self._count("revalidations")
+            freshness = self._freshness(response, ttl)
+            entry = dict(entry, validated_at=now, expires_at=now + (freshness or 0))
+            self.put(key, entry)
+            logger.debug(f"HTTP cache revalidated {entry['url']} ({self.stats()})")
+            return _to_response(entry)
+
+        self._count("misses")
+        freshness = self._freshness(response, ttl)
+        if response.status_code == 200 and freshness is not None:
+            self.put(key, {
+                "url": response.url,
+                "status_code": response.status_code,
+                "headers": dict(response.headers),
+                "content": response.content,
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "validated_at": now,
+                "expires_at": now + freshness,
+            })
+        return response
+
+
+def _to_response(entry: dict) -> requests.Response:
+    response = requests.Response()
+    response.status_code = entry["status_code"]
+    response.headers = CaseInsensitiveDict(entry["headers"])
+    response._content = entry["content"]
+    response.url = entry["url"]
+    response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+    response.reason = "OK"
+    return response
@@ -1,7 +1,14 @@
 
 from typing import List
+from concurrent.futures import ThreadPoolExecutor
+import datetime
 import pandas as pd
-from sqlalchemy import create_engine, text
+import numpy as np
+from sqlalchemy import create_engine, text, bindparam
+
+from msfutilspkg.utils.cache_utils import QueryCache
+from msfutilspkg.utils.data_utils import enforce_schema
+from msfutilspkg.utils.instrumentation import instrumented
 
 import logging
 
@@ -9,7 +16,7 @@ logger = logging.getLogger(__name__)
 
 
 class PostgresReader:
-    def __init__(self, host, port, dbname, user, password, **kwargs):
+    def __init__(self, host, port, dbname, user, password, cache: QueryCache = None, **kwargs):
         """
         Initialize the PostgresReader using SQLAlchemy engine.
 
@@ -19,46 +26,356 @@ class PostgresReader:
             dbname (str): Database name
             user (str): Username
             password (str): Password
+            cache (QueryCache): Optional on-disk cache of query results
         """
         connection_string = f"postgresql+psycopg2://{user}:{password}@{host}:{port}/{dbname}"
         self.engine = create_engine(connection_string)
+        self.connection_id = f"{user}@{host}:{port}/{dbname}"
+        self.cache = cache
+
+    def _cached(self, sql_query, params, read, dtype_backend=None):
+        """Serve ``sql_query`` from the cache if possible, else call ``read()`` and cache its result."""
+        if self.cache is None:
+            return read()
+        key = self.cache.key(self.connection_id, sql_query, params, dtype_backend)
+        df = self.cache.get(key)
+        if df is None:
+            df = read()
+            if df is not None:
+                self.cache.put(key, df)
+        return df
 
-    def query(self, sql_query):
+    def query(self, sql_query, params: dict = None, schema: dict = None, dtype_backend: str = None):
         """
         Execute a SQL query and return the results as a pandas DataFrame.
 
         Args:
             sql_query (str): The SQL query to execute
+            params (dict): Values of the ``:name`` bound parameters of the query.
+                List/tuple values are expanded, e.g. for ``col IN :values``.
+            schema (dict): Optional target schema, as taken by ``enforce_schema``.
+                Columns are then decoded straight into nullable dtypes
+                (``Int64``, ``boolean``, ``string``...) and ``enforce_schema`` only
+                converts the columns that still differ from the schema.
+            dtype_backend (str): ``"numpy_nullable"`` or ``"pyarrow"``, passed to
+                ``pandas.read_sql``. Defaults to ``"numpy_nullable"`` when a schema is given.
 
         Returns:
             pd.DataFrame: Query results
         """
+        if schema is not None and dtype_backend is None:
+            dtype_backend = "numpy_nullable"
+        df = self._cached(sql_query, params, lambda: self._read(sql_query, params, dtype_backend), dtype_backend)
+        if df is not None and schema is not None:
+            df = enforce_schema(df, schema)
+        return df
+
+    def _read(self, sql_query, params: dict = None, dtype_backend: str = None):
         try:
             with self.engine.connect() as conn:
-                df = pd.read_sql(text(sql_query), conn)
+                if dtype_backend is None:
+                    df = pd.read_sql(_statement(sql_query, params), conn, params=_expand_params(params))
+                else:
+                    df = pd.read_sql(_statement(sql_query, params), conn, params=_expand_params(params), dtype_backend=dtype_backend)
             return df
         except Exception as e:
             logger.info(f"Error querying database: {e}")
             return None
-        
+
+    def iter_query(self, sql_query, params: dict = None, chunksize: int = 50_000, schema: dict = None, dtype_backend: str = None):
+        """
+        Execute a SQL query and yield the results as DataFrames of ``chunksize`` rows.
+
+        The rows are fetched with a server-side cursor, so only one chunk is held
+        in memory at a time (see ``pipeline.Pipeline``). Unlike ``query``, errors
+        are raised, and results are not cached.
+
+        Args:
+            sql_query (str): The SQL query to execute
+            params (dict): Values of the bound parameters of the query
+            chunksize (int): Rows per DataFrame
+            schema (dict), dtype_backend (str): Typed reads, see ``query``
+        """
+        if schema is not None and dtype_backend is None:
+            dtype_backend = "numpy_nullable"
+        kwargs = {} if dtype_backend is None else {"dtype_backend": dtype_backend}
+        try:
+            with self.engine.connect() as conn:
+                conn = conn.execution_options(stream_results=True)
+                for df in pd.read_sql(_statement(sql_query, params), conn, params=_expand_params(params), chunksize=chunksize, **kwargs):
+                    yield df if schema is None else enforce_schema(df, schema)
+        except Exception as e:
+            logger.info(f"Error querying database: {e}")
+            raise
+
+    def query_partitioned(self, sql_query, partition_column, num_partitions=4, lower_bound=None, upper_bound=None, max_workers=None, params: dict = None, schema: dict = None, dtype_backend: str = None):
+        """
+        Execute a SQL query as several range-partitioned queries run in parallel
+        connections, and return the concatenated results as a pandas DataFrame.
+
+        Works like Spark's JDBC ``partitionColumn``/``numPartitions``: the range
+        ``[lower_bound, upper_bound]`` is split into ``num_partitions`` strides over
+        ``partition_column``. The bounds only decide the strides, they never filter
+        rows: the first partition also takes values below ``lower_bound`` and NULLs,
+        the last one takes values above ``upper_bound``.
+
+        Args:
+            sql_query (str): The SQL query to execute
+            partition_column (str): Numeric or date/timestamp column returned by the query
+            num_partitions (int): Number of ranges to read in parallel
+            lower_bound, upper_bound: Range of the partition column. When omitted,
+                they are found with a ``min/max`` probe on the query.
+            max_workers (int): Number of parallel connections, defaults to num_partitions
+            params (dict): Values of the bound parameters of the query
+            schema (dict), dtype_backend (str): Typed reads, see ``query``
+
+        Returns:
+            pd.DataFrame: Query results, in partition (key range) order
+        """
+        if schema is not None and dtype_backend is None:
+            dtype_backend = "numpy_nullable"
+
+        def read():
+            frames = []
+            for df in self.iter_query_partitioned(sql_query, partition_column, num_partitions, lower_bound, upper_bound, max_workers, params, dtype_backend=dtype_backend):
+                if df is None:
+                    return None
+                frames.append(df)
+            if not frames:
+                return None
+            return pd.concat(frames, ignore_index=True)
+
+        df = self._cached(sql_query, params, read, dtype_backend)
+        if df is not None and schema is not None:
+            df = enforce_schema(df, schema)
+        return df
+
+    def iter_query_partitioned(self, sql_query, partition_column, num_partitions=4, lower_bound=None, upper_bound=None, max_workers=None, params: dict = None, dtype_backend: str = None):
+        """
+        Same as ``query_partitioned`` but yield one DataFrame per partition, in key
+        order, as soon as it is available. Yields None if a partition failed.
+        """
+        column = _quote_identifier(partition_column)
+        if lower_bound is None or upper_bound is None:
+            bounds = self._read(
+                f"SELECT MIN({column}) AS lower_bound, MAX({column}) AS upper_bound FROM ({sql_query}) AS _partition_probe", params
+            )
+            if bounds is None:
+                yield None
+                return
+            lower_bound = bounds["lower_bound"].iloc[0] if lower_bound is None else lower_bound
+            upper_bound = bounds["upper_bound"].iloc[0] if upper_bound is None else upper_bound
+
+        if pd.isna(lower_bound) or pd.isna(upper_bound):
+            # Empty table or only NULLs in the partition column: nothing to split
+            yield self._read(sql_query, params, dtype_backend)
+            return
+
+        ranges = _partition_ranges(lower_bound, upper_bound, num_partitions)
+        queries = []
+        for i, (lower, upper) in enumerate(ranges):
+            conditions, partition_params = [], dict(params or {})
+            if i > 0:
+                conditions.append(f"{column} >= :_partition_lower")
+                partition_params["_partition_lower"] = lower
+            if i < len(ranges) - 1:
+                conditions.append(f"{column} < :_partition_upper")
+                partition_params["_partition_upper"] = upper
+            where = " AND ".join(conditions) if conditions else "TRUE"
+            if i == 0:
+                where = f"({where} OR {column} IS NULL)"
+            queries.append((f"SELECT * FROM ({sql_query}) AS _partition WHERE {where}", partition_params))
+
+        logger.info(f"Reading query in {len(queries)} partitions over column '{partition_column}' ({lower_bound} -> {upper_bound})")
+        with ThreadPoolExecutor(max_workers=max_workers or len(queries)) as executor:
+            futures = [executor.submit(self._read, query, partition_params, dtype_backend) for query, partition_params in queries]
+            for future in futures:
+                yield future.result()
+
+
+def _statement(sql_query: str, params: dict = None):
+    """Build the SQLAlchemy statement, marking list parameters as expanding (``IN :values``)."""
+    statement = text(sql_query)
+    for name, value in (params or {}).items():
+        if isinstance(value, (list, tuple, set, frozenset)):
+            statement = statement.bindparams(bindparam(name, expanding=True))
+    return statement
+
+
+def _expand_params(params: dict = None):
+    if not params:
+        return None
+    return {name: list(value) if isinstance(value, (tuple, set, frozenset)) else value for name, value in params.items()}
+
+
+def _quote_identifier(name: str) -> str:
+    """Quote a (possibly dotted) SQL identifier, e.g. ``schema.table`` -> ``"schema"."table"``."""
+    return ".".join('"' + part.strip('"').replace('"', '""') + '"' for part in name.split("."))
+
+
+_FILTER_OPERATORS = {
+    "=": "=", "==": "=", "!=": "<>", "<>": "<>",
+    "<": "<", "<=": "<=", ">": ">", ">=": ">=",
+    "like": "LIKE", "ilike": "ILIKE",
+    "in": "IN", "not in": "NOT IN",
+    "between": "BETWEEN",
+    "is null": "IS NULL", "is not null": "IS NOT NULL",
+}
+
+
+def build_select_query(table_name: str, columns: List[str] = None, filters: list = None) -> tuple:
+    """
+    Build a parameterised ``SELECT`` over one table.
+
+    Args:
+        table_name (str): Table to read, e.g. ``"public.account_move_line"``
+        columns (list[str]): Columns to project, all columns (``*``) if None
+        filters (list): Conditions combined with ``AND``. Each one is a
+            ``(column, op, value)`` tuple (``(column, op)`` for null checks) or a
+            ``{"column": ..., "op": ..., "value": ...}`` dict. Supported operators:
+            =, !=, <, <=, >, >=, like, ilike, in, not in, between, is null, is not null.
+            Values are always sent as bound parameters, never interpolated.
+
+    Returns:
+        tuple[str, dict]: The SQL query and its parameters
+
+    Example:
+        >>> build_select_query("cost_center", ["code", "name"], [("active", "=", True), ("code", "in", ["A", "B"])])
+        ('SELECT "code", "name" FROM cost_center WHERE "active" = :_filter_0 AND "code" IN :_filter_1',
+         {'_filter_0': True, '_filter_1': ['A', 'B']})
+    """
+    projection = ", ".join(_quote_identifier(column) for column in columns) if columns else "*"
+    query = f"SELECT {projection} FROM {table_name}"
+
+    conditions, params = [], {}
+    for i, condition in enumerate(filters or []):
+        if isinstance(condition, dict):
+            column, op, value = condition["column"], condition["op"], condition.get("value")
+        elif len(condition) == 2:
+            (column, op), value = condition, None
+        else:
+            column, op, value = condition
+        operator = _FILTER_OPERATORS.get(str(op).strip().lower())
+        if operator is None:
+            raise ValueError(f"Unsupported filter operator '{op}' for column '{column}'")
+
+        name = f"_filter_{i}"
+        if operator in ("IS NULL", "IS NOT NULL"):
+            conditions.append(f"{_quote_identifier(column)} {operator}")
+        elif operator == "BETWEEN":
+            lower, upper = value
+            conditions.append(f"{_quote_identifier(column)} BETWEEN :{name}_lower AND :{name}_upper")
+            params[f"{name}_lower"], params[f"{name}_upper"] = lower, upper
+        elif operator in ("IN", "NOT IN"):
+            conditions.append(f"{_quote_identifier(column)} {operator} :{name}")
+            params[name] = list(value)
+        else:
+            conditions.append(f"{_quote_identifier(column)} {operator} :{name}")
+            params[name] = value
+
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    return query, params
+
+
+def _plain_bound(bound):
+    """Python value of a partition bound given as a pandas / numpy scalar (e.g. ``df[col].min()``)."""
+    if isinstance(bound, np.datetime64):
+        bound = pd.Timestamp(bound)  # .item() gives an int for nanosecond datetimes
+    if isinstance(bound, pd.Timestamp):
+        return bound.to_pydatetime()
+    if isinstance(bound, np.generic):
+        return bound.item()
+    return bound
+
+
+def _partition_ranges(lower_bound, upper_bound, num_partitions: int) -> list:
+    """
+    Split ``[lower_bound, upper_bound]`` into at most ``num_partitions`` contiguous
+    ``(lower, upper)`` ranges. Works for integers, floats, decimals, dates and timestamps.
+    """
+    if num_partitions < 1:
+        raise ValueError("num_partitions must be at least 1.")
+    lower_bound, upper_bound = _plain_bound(lower_bound), _plain_bound(upper_bound)
+    if upper_bound < lower_bound:
+        raise ValueError(f"upper_bound ({upper_bound}) is lower than lower_bound ({lower_bound}).")
+
+    span = upper_bound - lower_bound
+    if isinstance(span, int):
+        step = max(span // num_partitions, 1)
+    elif isinstance(lower_bound, datetime.date) and not isinstance(lower_bound, datetime.datetime):
+        step = max(datetime.timedelta(days=span.days // num_partitions), datetime.timedelta(days=1))
+    else:
+        step = span / num_partitions
+
+    boundaries = [lower_bound]
+    for i in range(1, num_partitions):
+        boundary = lower_bound + step * i
+        if boundary >= upper_bound:
+            break
+        if boundary > boundaries[-1]:
+            boundaries.append(boundary)
+    boundaries.append(upper_bound)
+    return list(zip(boundaries[:-1], boundaries[1:])) or [(lower_bound, upper_bound)]
+
+
 def get_connection_informations(connection_name, path_to_connections=None, environment: str = "test") -> dict:
     connections = pd.read_json(path_to_connections)
     return connections[environment][connection_name]
 
-def read_msf_tables(connection_names: List[str], table_names: List[str], table_filters: List[str] = None, path_to_connections=None, environment: str = "test") -> dict:
+@instrumented("read_msf_tables", rows=lambda result, *args, **kwargs: sum(len(df) for df in result.values()))
+def read_msf_tables(connection_names: List[str], table_names: List[str], table_filters: list = None, path_to_connections=None, environment: str = "test", table_partitions: List[dict] = None, cache: QueryCache = None, table_columns: List[List[str]] = None, table_schemas: List[dict] = None) -> dict:
+    """
+    Read MSF tables, one per (connection, table) pair.
+
+    ``table_filters`` gives, per table, either a raw SQL suffix (e.g. ``"WHERE active"``)
+    or a list of structured filters as accepted by ``build_select_query``
+    (e.g. ``[("active", "=", True)]``), which are sent as bound parameters.
+
+    ``table_columns`` restricts, per table, the columns that are read. ``table_schemas``
+    gives, per table, a schema dict as taken by ``enforce_schema``: only its columns
+    are read (unless ``table_columns`` says otherwise) and they are returned typed.
+
+    ``table_partitions`` optionally gives, per table, the arguments of
+    ``PostgresReader.query_partitioned`` (e.g. ``{"partition_column": "id", "num_partitions": 8}``)
+    so a big table is read as parallel range queries. Use None for tables read in one query.
+
+    ``cache`` is an optional ``QueryCache``: identical queries are then reloaded
+    from local disk instead of the database until the cache entry expires.
+    """
+    if table_filters is None:
+        table_filters = [None] * len(table_names)
+    if table_partitions is None:
+        table_partitions = [None] * len(table_names)
+    if table_columns is None:
+        table_columns = [None] * len(table_names)
+    if table_schemas is None:
+        table_schemas = [None] * len(table_names)
     tables = {}
-    for connection, table_name, table_filter in zip(
+    for connection, table_name, table_filter, table_partition, columns, schema in zip(
         connection_names, 
         table_names,
-        table_filters
+        table_filters,
+        table_partitions,
+        table_columns,
+        table_schemas
     ):
         connection_info = get_connection_informations(connection, path_to_connections=path_to_connections, environment=environment)
-        
-        query = f"SELECT * FROM {table_name} "
-        if table_filter is not None:
-            query += table_filter
 
-        df = PostgresReader(**connection_info).query(query)
+        if columns is None and schema is not None:
+            columns = list(schema)
+        if isinstance(table_filter, str):
+            # Raw SQL suffix, kept for backward compatibility
+            query, params = build_select_query(table_name, columns)
+            query += " " + table_filter
+        else:
+            query, params = build_select_query(table_name, columns, table_filter)
+
+        reader = PostgresReader(**connection_info, cache=cache)
+        if table_partition:
+            df = reader.query_partitioned(query, params=params, schema=schema, **table_partition)
+        else:
+            df = reader.query(query, params=params, schema=schema)
         if df is not None:
             logger.info(f"Successfully read table: {table_name} from connection: {connection} and environment : {environment}")
             tables[table_name] = df
@@ -0,0 +1,175 @@
+import sys
+import time
+import logging
+from datetime import datetime
+from functools import wraps
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+# Spans are only recorded inside ``collect_spans()``; everywhere else ``span`` and
+# ``instrumented`` cost a single ContextVar lookup.
+_collector: ContextVar = ContextVar("msfutilspkg_spans", default=None)
+
+# ru_maxrss is in kilobytes on Linux and in bytes on macOS
+_RSS_UNIT = 1 if sys.platform == "darwin" else 1024
+
+
+def _peak_rss() -> int | None:
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * _RSS_UNIT
+
+
+class Span:
+    """
+    Timing of one stage of a job: wall time, CPU time, peak RSS growth and throughput.
+
+    Use it through ``span(...)`` or ``instrumented(...)``. Set ``rows`` inside the
+    block to get ``rows_per_second``.
+
+    Notes
+    -----
+    - ``cpu_seconds`` is the CPU time of the whole process (all threads) during the span.
+    - ``peak_rss_delta_bytes`` is how much the process' peak RSS grew during the span,
+      i.e. 0 when the stage stayed below an earlier peak. None where unavailable (Windows).
+    """
+
+    __slots__ = ("name", "rows", "start_time", "wall_seconds", "cpu_seconds", "peak_rss_delta_bytes",
+                 "_start", "_cpu_start", "_rss_start", "_spans")
+
+    def __init__(self, name: str, rows: int = None, spans: list = None):
+        self.name = name
+        self.rows = rows
+        self.start_time = None
+        self.wall_seconds = None
+        self.cpu_seconds = None
+        self.peak_rss_delta_bytes = None
+        self._spans = spans
+
+    def __enter__(self):
+        self.start_time = datetime.now()
+        self._rss_start = _peak_rss()
+        self._cpu_start = time.process_time()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.wall_seconds = time.perf_counter() - self._start
+        self.cpu_seconds = time.process_time() - self._cpu_start
+        if self._rss_start is not None:
+            self.peak_rss_delta_bytes = _peak_rss() - self._rss_start
+        if self._spans is not None:
+            self._spans.append(self)
+        logger.debug(f"Span '{self.name}': {self.wall_seconds:.3f}s wall, {self.cpu_seconds:.3f}s CPU, "
+                     f"{self.rows} rows")
+        return False
+
+    @property
+    def rows_per_second(self) -> float | None:
+        if self.rows is None or not self.wall_seconds:
+            return None
+        return self.rows / self.wall_seconds
+
+    def to_dict(self) -> dict:
+        return {
+            "span_name": self.name,
+            "start_time": self.start_time,
+            "wall_seconds": self.wall_seconds,
+            "cpu_seconds": self.cpu_seconds,
+            "peak_rss_delta_bytes": self.peak_rss_delta_bytes,
+            "rows": self.rows,
+            "rows_per_second": self.rows_per_second,
+        }
+
+
+class _NullSpan:
+    """Shared no-op span returned when no collector is active."""
+
+    __slots__ = ()
+
+    rows = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def __setattr__(self, name, value):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(name: str, rows: int = None):
+    """
+    Context manager timing a block of code inside a job.
+
+    Example
+    -------
+    >>> with span("read_positions") as s:
+    ...     df = reader.query(sql)
+    ...     s.rows = len(df)
+    """
+    spans = _collector.get()
+    if spans is None:
+        return _NULL_SPAN
+    return Span(name, rows, spans)
+
+
+def instrumented(name: str = None, rows=None):
+    """
+    Decorator recording a span around each call of the decorated function.
+
+    Args:
+        name (str): Span name, defaults to ``module.function``
+        rows (callable): Optional ``rows(result, *args, **kwargs) -> int`` giving the
+            number of rows processed by the call, used for ``rows_per_second``
+    """
+    def decorator(func):
+        span_name = name or f"{func.__module__.rsplit('.', 1)[-1]}.{func.__qualname__}"
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            spans = _collector.get()
+            if spans is None:
+                return func(*args, **kwargs)
+            with Span(span_name, spans=spans) as s:
+                result = func(*args, **kwargs)
+                if rows is not None:
+                    try:
+                        s.rows = rows(result, *args, **kwargs)
+                    except Exception as e:
+                        logger.debug(f"Could not count rows of span '{span_name}': {e}")
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+@contextmanager
+def collect_spans():
+    """
+    Record every span opened in this context (same thread / task) into the yielded list.
+
+    Example
+    -------
+    >>> with collect_spans() as spans:
+    ...     run_job()
+    >>> pd.DataFrame([s.to_dict() for s in spans])
+    """
+    spans = []
+    token = _collector.set(spans)
+    try:
+        yield spans
+    finally:
+        _collector.reset(token)
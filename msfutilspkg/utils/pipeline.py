@@ -0,0 +1,355 @@
+import time
+import queue
+import logging
+import threading
+import contextvars
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from msfutilspkg.utils.data_utils import sync_dataframes_with_old_new
+
+logger = logging.getLogger(__name__)
+
+_END = object()
+_STOPPED = object()
+
+
+def rows_of(batch) -> int:
+    """Number of rows of a batch: DataFrame, Arrow table / record batch, or dict / list of them."""
+    if isinstance(batch, (pd.DataFrame, pa.Table, pa.RecordBatch)):
+        return batch.num_rows if isinstance(batch, (pa.Table, pa.RecordBatch)) else len(batch)
+    if isinstance(batch, dict):
+        return sum(rows_of(value) for value in batch.values())
+    if isinstance(batch, (list, tuple)):
+        return sum(rows_of(value) for value in batch)
+    return 0
+
+
+def concat_batches(batches: list):
+    """Concatenate pandas or Arrow batches into one frame / table."""
+    if not batches:
+        return None
+    if isinstance(batches[0], (pa.Table, pa.RecordBatch)):
+        return pa.concat_tables([pa.Table.from_batches([b]) if isinstance(b, pa.RecordBatch) else b for b in batches])
+    return pd.concat(batches, ignore_index=True)
+
+
+class Stage:
+    """
+    Step of a ``Pipeline``: ``process`` turns the iterator of input batches into
+    an iterator of output batches.
+
+    ``full_view`` names what the stage holds entirely in memory (None for
+    streaming stages): the memory of the pipeline is bounded by the queue depth
+    except for these stages.
+    """
+
+    full_view = None
+
+    def __init__(self, name: str, func=None, workers: int = 1):
+        self.name = name
+        self.func = func
+        self.workers = workers
+
+    def process(self, batches):
+        for batch in batches:
+            result = self.func(batch)
+            if result is not None:
+                yield result
+
+
+class SourceStage(Stage):
+    """First stage: ``func()`` returns an iterator of batches (e.g. ``PostgresReader.iter_query``)."""
+
+    def process(self, batches):
+        yield from self.func()
+
+
+class CollectStage(Stage):
+    """Stage needing the full input: batches are concatenated, then ``func(full)`` returns a batch or an iterator of batches."""
+
+    full_view = "input"
+
+    def process(self, batches):
+        full = concat_batches(list(batches))
+        if full is None:
+            return
+        result = self.func(full)
+        if result is None:
+            return
+        if isinstance(result, (pd.DataFrame, pa.Table, pa.RecordBatch, dict)):
+            yield result
+        else:
+            yield from result
+
+
+class SinkStage(Stage):
+    """Last stage: ``func(batch)`` writes each batch (e.g. ``write_delta_lake_table`` in append mode)."""
+
+    def process(self, batches):
+        for batch in batches:
+            self.func(batch)
+        return
+        yield
+
+
+class SyncStage(Stage):
+    """
+    Streaming ``sync_dataframes_with_old_new``: the new records arrive in batches,
+    the historic side is a full view (DataFrame, or a callable loading it in the
+    stage's thread, overlapping the upstream stages).
+
+    Each batch is compared with the historic rows of its keys and yields the
+    ``to_create`` / ``to_update`` / ``to_keep`` dict of ``sync_dataframes_with_old_new``
+    (with an empty ``to_delete``). Once the input is exhausted, a last dict holds
+    the ``to_delete`` rows: historic keys seen in no batch. Keys must be unique
+    across batches.
+    """
+
+    full_view = "historic"
+
+    def __init__(self, name: str, historic, key: list, showChangedCol: bool = False):
+        super().__init__(name)
+        self.historic = historic
+        self.key = key
+        self.showChangedCol = showChangedCol
+
+    def _empty_result(self, template: pd.DataFrame) -> dict:
+        """
+        Empty frames with the columns ``sync_dataframes_with_old_new`` gives
+        when rows match, so every yielded dict has the same layout.
+        """
+        empty = template.iloc[0:0]
+        non_key_cols = [col for col in empty.columns if col not in self.key]
+        meta = pd.DataFrame({"changed_columns": pd.Series(dtype=object), "type_of_change": pd.Series(dtype=object)})
+        old = pd.DataFrame({"old_" + col: pd.Series(dtype=object) for col in non_key_cols})
+
+        to_create = pd.concat([empty, meta, old], axis=1)
+        if self.showChangedCol:
+            old_values = empty[non_key_cols].rename(columns=lambda col: "old_" + col)
+            to_update = pd.concat([empty[self.key], old_values, empty[non_key_cols], meta], axis=1)
+            to_update = to_update[self.key + [c for col in non_key_cols for c in ("old_" + col, col)]
+                                  + ["changed_columns", "type_of_change"]]
+        else:
+            to_update = pd.concat([empty[self.key + non_key_cols], meta[["type_of_change"]]], axis=1)
+        to_keep = pd.concat([empty[self.key + non_key_cols], meta[["type_of_change", "changed_columns"]]], axis=1)
+        to_delete = pd.concat([empty, meta[["type_of_change", "changed_columns"]], old], axis=1)
+        return {"to_create": to_create, "to_update": to_update, "to_delete": to_delete, "to_keep": to_keep}
+
+    def process(self, batches):
+        historic = self.historic() if callable(self.historic) else self.historic
+        historic_keys = pd.MultiIndex.from_frame(historic[self.key])
+        seen = np.zeros(len(historic), dtype=bool)
+
+        for batch in batches:
+            positions = historic_keys.get_indexer(pd.MultiIndex.from_frame(batch[self.key]))
+            positions = positions[positions >= 0]
+            seen[positions] = True
+            result = sync_dataframes_with_old_new(batch, historic.iloc[positions], self.key, self.showChangedCol)
+            # A batch without matched rows gets degenerate to_update / to_keep frames
+            empty = self._empty_result(batch)
+            yield {name: frame if len(frame) else empty[name] for name, frame in result.items()}
+
+        deleted = historic.iloc[np.flatnonzero(~seen)].copy()
+        deleted["type_of_change"] = "Delete"
+        deleted["changed_columns"] = None
+        for col in historic.columns:
+            if col not in self.key:
+                deleted["old_" + col] = None
+        result = self._empty_result(historic)
+        result["to_delete"] = deleted
+        yield result
+
+
+class _StageRunner:
+    """Threads of one stage, with its throughput counters."""
+
+    def __init__(self, stage: Stage, inbox: queue.Queue, outbox: queue.Queue, stop: threading.Event):
+        self.stage = stage
+        self.inbox = inbox
+        self.outbox = outbox
+        self.stop = stop
+        self.error = None
+        self.lock = threading.Lock()
+        self.batches_in = self.batches_out = self.rows_in = self.rows_out = 0
+        self.wait_seconds = 0.0
+        self.wall_seconds = 0.0
+        self._finished_workers = 0
+
+    def _get(self):
+        while not self.stop.is_set():
+            try:
+                return self.inbox.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _STOPPED
+
+    def _put(self, item) -> bool:
+        """Put ``item`` downstream; False when the pipeline was stopped first."""
+        while not self.stop.is_set():
+            try:
+                self.outbox.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _inputs(self):
+        if self.inbox is None:
+            return
+        while not self.stop.is_set():
+            start = time.perf_counter()
+            batch = self._get()
+            with self.lock:
+                self.wait_seconds += time.perf_counter() - start
+            if batch is _STOPPED:
+                return
+            if batch is _END:
+                try:
+                    self.inbox.put_nowait(_END)  # for the other workers of the stage
+                except queue.Full:
+                    pass
+                return
+            with self.lock:
+                self.batches_in += 1
+                self.rows_in += rows_of(batch)
+            yield batch
+
+    def run(self):
+        start = time.perf_counter()
+        outputs = self.stage.process(self._inputs())
+        try:
+            for batch in outputs:
+                with self.lock:
+                    self.batches_out += 1
+                    self.rows_out += rows_of(batch)
+                if self.outbox is not None:
+                    put_start = time.perf_counter()
+                    sent = self._put(batch)
+                    with self.lock:
+                        self.wait_seconds += time.perf_counter() - put_start
+                    if not sent:
+                        break
+                if self.stop.is_set():
+                    break
+        except Exception as e:
+            logger.info(f"Pipeline stage '{self.stage.name}' failed: {e}")
+            self.error = e
+            self.stop.set()
+        finally:
+            # Stops the source (GeneratorExit), e.g. releasing a server-side cursor
+            close = getattr(outputs, "close", None)
+            if close is not None:
+                close()
+            with self.lock:
+                self.wall_seconds = max(self.wall_seconds, time.perf_counter() - start)
+                self._finished_workers += 1
+                last = self._finished_workers == self.stage.workers
+            if last and self.outbox is not None:
+                self._put(_END)
+
+    def stats(self) -> dict:
+        busy = max(self.wall_seconds * self.stage.workers - self.wait_seconds, 0.0)
+        rows = self.rows_out if self.inbox is None else self.rows_in
+        return {
+            "stage": self.stage.name,
+            "workers": self.stage.workers,
+            "full_view": self.stage.full_view,
+            "batches_in": self.batches_in,
+            "batches_out": self.batches_out,
+            "rows_in": self.rows_in,
+            "rows_out": self.rows_out,
+            "wall_seconds": self.wall_seconds,
+            "busy_seconds": busy,
+            "rows_per_second": rows / busy if busy else None,
+        }
+
+
+class Pipeline:
+    """
+    Chain of stages running in their own threads, connected by bounded queues.
+
+    Stages overlap: while a batch is being written, the next ones are enforced and
+    read. A queue holds at most ``queue_size`` batches, so a slow stage blocks its
+    upstream stages instead of letting batches pile up, and memory is bounded by
+    the queue depths and batch size, except in stages declaring a ``full_view``.
+
+    Batches can be pandas DataFrames, Arrow tables / record batches, or dicts of
+    them (e.g. the output of a sync stage).
+
+    Notes:
+        - A map stage with ``workers > 1`` does not preserve the batch order.
+        - Each stage thread runs in a copy of the caller's context, so spans of
+          ``instrumented`` functions are recorded by an enclosing ``collect_spans()``
+          (threads do not inherit ContextVars otherwise).
+        - The first failing stage stops the pipeline, and ``run`` raises its exception.
+
+    Example:
+        >>> stats = (Pipeline(queue_size=4)
+        ...     .source("extract", lambda: reader.iter_query(sql, chunksize=50_000))
+        ...     .map("enforce_schema", lambda df: enforce_schema(df, schema), workers=2)
+        ...     .sync("sync", historic=lambda: read_historic(), key=["code"])
+        ...     .sink("write", lambda result: write_delta_lake_table(result["to_create"], path, schema))
+        ...     .run())
+    """
+
+    def __init__(self, queue_size: int = 4):
+        self.queue_size = queue_size
+        self.stages = []
+        self.last_stats = None
+
+    def add(self, stage: Stage) -> "Pipeline":
+        if stage.workers > 1 and stage.full_view is not None:
+            raise ValueError(f"Stage '{stage.name}' holds a full view and cannot have several workers")
+        self.stages.append(stage)
+        return self
+
+    def source(self, name: str, func) -> "Pipeline":
+        return self.add(SourceStage(name, func))
+
+    def map(self, name: str, func, workers: int = 1) -> "Pipeline":
+        return self.add(Stage(name, func, workers))
+
+    def collect(self, name: str, func) -> "Pipeline":
+        return self.add(CollectStage(name, func))
+
+    def sync(self, name: str, historic, key: list, showChangedCol: bool = False) -> "Pipeline":
+        return self.add(SyncStage(name, historic, key, showChangedCol))
+
+    def sink(self, name: str, func, workers: int = 1) -> "Pipeline":
+        return self.add(SinkStage(name, func, workers))
+
+    def run(self) -> pd.DataFrame:
+        """
+        Run the pipeline until the source is exhausted.
+
+        Returns:
+            pd.DataFrame: One row per stage: batches and rows in / out, wall and busy
+                seconds (time not spent waiting on the queues), rows per busy second
+        """
+        if not self.stages or not isinstance(self.stages[0], SourceStage):
+            raise ValueError("A pipeline starts with a source stage")
+        stop = threading.Event()
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in self.stages[1:]]
+        runners = [
+            _StageRunner(stage, queues[i - 1] if i > 0 else None, queues[i] if i < len(queues) else None, stop)
+            for i, stage in enumerate(self.stages)
+        ]
+        threads = [
+            threading.Thread(target=contextvars.copy_context().run, args=(runner.run,),
+                             name=f"pipeline-{runner.stage.name}-{worker}", daemon=True)
+            for runner in runners for worker in range(runner.stage.workers)
+        ]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.last_stats = pd.DataFrame([runner.stats() for runner in runners])
+        errors = [runner.error for runner in runners if runner.error is not None]
+        if errors:
+            raise errors[0]
+        logger.info(f"Pipeline of {len(self.stages)} stages done in {time.perf_counter() - start:.2f}s")
+        return self.last_stats
@@ -0,0 +1,132 @@
+import io
+import json
+import base64
+import logging
+from functools import wraps
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+
+from msfutilspkg.utils.data_utils import sync_dataframes_with_old_new
+
+logger = logging.getLogger(__name__)
+
+ARROW_FORMAT = "arrow-ipc"
+JSON_FORMAT = "json"
+
+
+def _is_envelope(value) -> bool:
+    return isinstance(value, dict) and value.get("format") in (ARROW_FORMAT, JSON_FORMAT) and "data" in value
+
+
+def encode_dataframe(df: pd.DataFrame, format: str = ARROW_FORMAT, compression: str | None = "zstd") -> dict:
+    """
+    Encode a DataFrame for a User Data Function call.
+
+    Args:
+        df (pd.DataFrame): Frame to send
+        format (str): ``"arrow-ipc"`` (base64 Arrow IPC stream) or ``"json"`` (pandas
+            ``orient="table"``, which keeps the dtypes)
+        compression (str): Arrow IPC body compression, ``"zstd"``, ``"lz4"`` or None
+
+    Returns:
+        dict: ``{"format", "compression", "data"}``, JSON serialisable. Frames Arrow
+            cannot represent (e.g. object columns mixing types) fall back to JSON.
+    """
+    if format == ARROW_FORMAT:
+        try:
+            table = pa.Table.from_pandas(df)
+        except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError) as e:
+            logger.info(f"DataFrame not representable in Arrow ({e}), falling back to JSON")
+        else:
+            sink = pa.BufferOutputStream()
+            options = ipc.IpcWriteOptions(compression=compression)
+            with ipc.new_stream(sink, table.schema, options=options) as writer:
+                writer.write_table(table)
+            return {
+                "format": ARROW_FORMAT,
+                "compression": compression,
+                "data": base64.b64encode(sink.getvalue()).decode("ascii"),
+            }
+    elif format != JSON_FORMAT:
+        raise ValueError(f"format must be '{ARROW_FORMAT}' or '{JSON_FORMAT}', got '{format}'")
+    return {"format": JSON_FORMAT, "compression": None, "data": json.loads(df.to_json(orient="table", date_format="iso"))}
+
+
+def decode_dataframe(value) -> pd.DataFrame:
+    """
+    Decode an ``encode_dataframe`` envelope; a list of records (the plain JSON
+    arguments of the UDF) or a DataFrame are accepted as well.
+    """
+    if isinstance(value, pd.DataFrame):
+        return value
+    if isinstance(value, list):
+        return pd.DataFrame.from_records(value)
+    if not _is_envelope(value):
+        raise ValueError(f"Not an encoded DataFrame: {type(value).__name__}")
+    if value["format"] == ARROW_FORMAT:
+        # The compression is stored in the IPC stream itself
+        with ipc.open_stream(pa.py_buffer(base64.b64decode(value["data"]))) as reader:
+            return reader.read_all().to_pandas()
+    return pd.read_json(io.StringIO(json.dumps(value["data"])), orient="table")
+
+
+def encode_result(result, format: str = ARROW_FORMAT, compression: str | None = "zstd"):
+    """Encode the DataFrames of a result (a DataFrame, or a dict / list holding DataFrames)."""
+    if isinstance(result, pd.DataFrame):
+        return encode_dataframe(result, format, compression)
+    if isinstance(result, dict):
+        return {key: encode_result(value, format, compression) for key, value in result.items()}
+    if isinstance(result, (list, tuple)):
+        return [encode_result(value, format, compression) for value in result]
+    return result
+
+
+def decode_result(result):
+    """Client-side counterpart of ``encode_result``: envelopes back to DataFrames."""
+    if _is_envelope(result):
+        return decode_dataframe(result)
+    if isinstance(result, dict):
+        return {key: decode_result(value) for key, value in result.items()}
+    if isinstance(result, list):
+        return [decode_result(value) for value in result]
+    return result
+
+
+def call_with_transport(func, *args, **kwargs):
+    """
+    Call ``func`` with its encoded DataFrame arguments decoded, and encode the
+    DataFrames of its result the same way as the first encoded argument
+    (format and compression), so a JSON caller gets JSON back.
+    """
+    envelopes = [value for value in (*args, *kwargs.values()) if _is_envelope(value)]
+    format = envelopes[0]["format"] if envelopes else JSON_FORMAT
+    compression = envelopes[0].get("compression") if envelopes else None
+    args = [decode_dataframe(value) if _is_envelope(value) else value for value in args]
+    kwargs = {key: decode_dataframe(value) if _is_envelope(value) else value for key, value in kwargs.items()}
+    return encode_result(func(*args, **kwargs), format, compression)
+
+
+def arrow_transport(func):
+    """Decorator applying ``call_with_transport`` to every call of ``func``."""
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        return call_with_transport(func, *args, **kwargs)
+    return wrapper
+
+
+def sync_dataframes_with_old_new_arrow(newRecords: dict, historic: dict, key: list, showChangedCol: bool = False) -> dict:
+    """
+    User Data Function entry point of ``sync_dataframes_with_old_new`` taking and
+    returning encoded DataFrames (see ``encode_dataframe``).
+
+    Example (client side):
+        >>> result = call_udf(newRecords=encode_dataframe(new), historic=encode_dataframe(old),
+        ...                   key=["code"], showChangedCol=True)
+        >>> frames = decode_result(result)  # {"to_create": DataFrame, ...}
+    """
+    if isinstance(newRecords, list) and isinstance(historic, list):
+        # plain JSON records: answer with JSON envelopes
+        newRecords, historic = pd.DataFrame.from_records(newRecords), pd.DataFrame.from_records(historic)
+    return call_with_transport(sync_dataframes_with_old_new, newRecords, historic, key, showChangedCol)
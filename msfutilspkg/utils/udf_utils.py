@@ -0,0 +1,376 @@
+import re
+import ast
+import json
+import time
+import copy
+import base64
+import hashlib
+import inspect
+import logging
+import builtins
+import importlib
+
+from msfutilspkg.utils.api_utils import ApiClient, iter_api_pages
+
+logger = logging.getLogger(__name__)
+
+PACKAGE = "msfutilspkg"
+HASH_MARKER = "# udf-content-hash: "
+_HASH_LINE = re.compile(r"^# udf-content-hash: ([0-9a-f]{64})$", re.MULTILINE)
+DEFAULT_MAIN_FILE = "udf_source.py"
+# Library-internal decorators dropped from bundled definitions (no use inside a UDF)
+STRIPPED_DECORATORS = ("instrumented",)
+
+
+def _resolve(path):
+    """'package.module.function' -> function (callables are returned as is)."""
+    if not isinstance(path, str):
+        return path
+    module_name, name = path.rsplit(".", 1)
+    return getattr(importlib.import_module(module_name), name)
+
+
+def _in_package(module_name: str) -> bool:
+    return module_name == PACKAGE or module_name.startswith(PACKAGE + ".")
+
+
+class _ModuleIndex:
+    """
+    Top-level definitions (def, class, assignment) and import statements of a
+    module, by bound name, with their source.
+    """
+
+    def __init__(self, module):
+        self.module = module
+        self.source = inspect.getsource(module)
+        self.lines = self.source.splitlines(keepends=True)
+        self.nodes = {}
+        self.imports = {}
+        for node in ast.parse(self.source).body:
+            if isinstance(node, (ast.Import, ast.ImportFrom)):
+                self.imports.update(_import_statements(node))
+            elif isinstance(node, ast.Try):
+                # e.g. try: import resource / except ImportError: resource = None
+                for child in node.body:
+                    if isinstance(child, (ast.Import, ast.ImportFrom)):
+                        for name in _import_statements(child):
+                            self.imports[name] = self.segment(node).rstrip("\n")
+            elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                self.nodes[node.name] = node
+            elif isinstance(node, (ast.Assign, ast.AnnAssign)):
+                targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+                for target in targets:
+                    if isinstance(target, ast.Name):
+                        self.nodes[target.id] = node
+
+    def segment(self, node, decorators=None) -> str:
+        """Source of ``node``, with only ``decorators`` (all of them by default)."""
+        decorators = getattr(node, "decorator_list", []) if decorators is None else decorators
+        lines = [line for d in decorators for line in self.lines[d.lineno - 1:d.end_lineno]]
+        return "".join(lines + self.lines[node.lineno - 1:node.end_lineno]).rstrip() + "\n"
+
+
+def _decorator_name(decorator) -> str | None:
+    """``name`` of ``@name``, ``@name(...)`` or ``@module.name(...)``."""
+    if isinstance(decorator, ast.Call):
+        decorator = decorator.func
+    if isinstance(decorator, ast.Attribute):
+        return decorator.attr
+    return decorator.id if isinstance(decorator, ast.Name) else None
+
+
+def _strip_decorators(node, names):
+    """Copy of a def / class node without the decorators named in ``names``."""
+    decorators = getattr(node, "decorator_list", None)
+    if not decorators:
+        return node
+    stripped = copy.copy(node)
+    stripped.decorator_list = [d for d in decorators if _decorator_name(d) not in names]
+    return stripped
+
+
+def _import_statements(node) -> dict:
+    """One import statement per name bound by an ``import`` / ``from ... import`` node (relative ones excluded)."""
+    statements = {}
+    for alias in node.names:
+        alias_suffix = f" as {alias.asname}" if alias.asname else ""
+        if isinstance(node, ast.Import):
+            statements[alias.asname or alias.name.split(".")[0]] = f"import {alias.name}{alias_suffix}"
+        elif node.level == 0 and alias.name != "*":
+            statements[alias.asname or alias.name] = f"from {node.module} import {alias.name}{alias_suffix}"
+    return statements
+
+
+def _free_names(node) -> list:
+    """Names read by a definition and not bound inside it, in order of appearance."""
+    if isinstance(node, (ast.Assign, ast.AnnAssign)):
+        node = node.value
+        if node is None:
+            return []
+    bound, read = set(), []
+    for child in ast.walk(node):
+        if isinstance(child, ast.Name):
+            if isinstance(child.ctx, ast.Load):
+                read.append(child.id)
+            else:
+                bound.add(child.id)
+        elif isinstance(child, ast.arg):
+            bound.add(child.arg)
+        elif isinstance(child, ast.ExceptHandler) and child.name:
+            bound.add(child.name)
+        elif isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)) and child is not node:
+            bound.add(child.name)
+        elif isinstance(child, (ast.Import, ast.ImportFrom)):
+            bound.update((alias.asname or alias.name).split(".")[0] for alias in child.names)
+    return list(dict.fromkeys(name for name in read if name not in bound))
+
+
+def _import_line(name: str, value) -> str:
+    """Import statement binding ``name`` to the (out of package) object ``value``."""
+    if inspect.ismodule(value):
+        if value.__name__ == name:
+            return f"import {name}"
+        return f"import {value.__name__} as {name}"
+    module_name = getattr(value, "__module__", None)
+    qualname = getattr(value, "__qualname__", getattr(value, "__name__", None))
+    if module_name and qualname and "." not in qualname:
+        try:
+            if getattr(importlib.import_module(module_name), qualname) is value:
+                return f"from {module_name} import {qualname}" + (f" as {name}" if qualname != name else "")
+        except (ImportError, AttributeError):
+            pass
+    raise ValueError(f"Cannot bundle '{name}' ({type(value).__name__}): import it from a module instead")
+
+
+def bundle_functions(functions: list, strip_decorators=STRIPPED_DECORATORS) -> str:
+    """
+    Build a self-contained Python source holding ``functions`` and the in-package
+    helpers they depend on.
+
+    Starting from each function, the names it reads are resolved through its
+    module's globals, i.e. through the imports of that module: functions, classes
+    and module-level constants of ``msfutilspkg`` are bundled (recursively, after
+    their own dependencies), anything else becomes an import statement.
+
+    Decorators named in ``strip_decorators`` (``instrumented`` by default) are
+    removed from the bundled definitions, so the instrumentation module is not
+    bundled with them.
+
+    Args:
+        functions (list): Functions, or their dotted paths
+            (e.g. ``"msfutilspkg.utils.data_utils.sync_dataframes_with_old_new"``)
+        strip_decorators (iterable): Names of the decorators to drop
+
+    Returns:
+        str: Imports followed by the definitions, in dependency order
+    """
+    indexes, imports, definitions = {}, {}, {}
+    visiting = set()
+
+    def index_of(module_name):
+        if module_name not in indexes:
+            indexes[module_name] = _ModuleIndex(importlib.import_module(module_name))
+        return indexes[module_name]
+
+    def add_definition(module_name, name):
+        if (module_name, name) in visiting:
+            return
+        visiting.add((module_name, name))
+        index = index_of(module_name)
+        node = index.nodes.get(name)
+        if node is None:
+            raise ValueError(f"No top-level definition of '{name}' in {module_name}")
+        node = _strip_decorators(node, set(strip_decorators))
+        for free_name in _free_names(node):
+            add_reference(index, free_name)
+        source = index.segment(node, getattr(node, "decorator_list", None))
+        if definitions.get(name, source) != source:
+            raise ValueError(f"Two bundled definitions are named '{name}' (second one in {module_name})")
+        definitions[name] = source
+
+    def add_reference(index, name):
+        if name in index.nodes:
+            add_definition(index.module.__name__, name)
+            return
+        if name.startswith("__") and name.endswith("__"):
+            return  # __name__, __file__...: defined in the bundle's own module
+        if name not in vars(index.module):
+            if hasattr(builtins, name):
+                return
+            raise ValueError(f"Unresolved name '{name}' in {index.module.__name__}")
+        value = vars(index.module)[name]
+        module_name = value.__name__ if inspect.ismodule(value) else getattr(value, "__module__", None) or ""
+        if inspect.ismodule(value) and _in_package(module_name):
+            raise ValueError(f"Module attribute access '{name}.*' of {index.module.__name__} cannot be bundled, "
+                             f"import the names instead")
+        if _in_package(module_name) and (inspect.isfunction(value) or inspect.isclass(value)):
+            original = getattr(inspect.unwrap(value), "__name__", name)
+            add_definition(module_name, original)
+            if original != name:
+                definitions[name] = f"{name} = {original}\n"
+            return
+        line = index.imports.get(name) or _import_line(name, value)
+        if imports.get(name, line) != line:
+            raise ValueError(f"'{name}' is imported from two different places: {imports[name]} / {line}")
+        imports[name] = line
+
+    for function in functions:
+        function = _resolve(function)
+        add_definition(function.__module__, inspect.unwrap(function).__name__)
+
+    return "\n".join(sorted(set(imports.values()))) + "\n\n\n" + "\n\n".join(definitions.values())
+
+
+def content_hash(source: str) -> str:
+    """SHA-256 of a bundled source, ignoring an embedded hash marker."""
+    return hashlib.sha256(_HASH_LINE.sub("", source).strip().encode("utf-8")).hexdigest()
+
+
+def read_content_hash(source: str) -> str | None:
+    """Hash embedded in a source by ``build_udf_payload``, or None."""
+    match = _HASH_LINE.search(source or "")
+    return match.group(1) if match else None
+
+
+def build_udf_payload(functions: list, display_name: str, description: str = "", output_file: str = None) -> dict:
+    """
+    Bundle ``functions`` into a UDF payload whose source starts with its content hash.
+
+    When ``output_file`` already holds a payload with the same hash, it is left
+    untouched, so unchanged functions do not produce a new build artifact.
+
+    Args:
+        functions (list): Functions (or dotted paths) exposed by the UDF item
+        display_name (str): Name of the Fabric User Data Function item
+        description (str): Description of the item
+        output_file (str): Optional JSON file the payload is written to
+
+    Returns:
+        dict: displayName, description, source, language, type and contentHash
+    """
+    source = bundle_functions(functions)
+    digest = content_hash(source)
+    payload = {
+        "displayName": display_name,
+        "description": description,
+        "source": f"{HASH_MARKER}{digest}\n{source}",
+        "language": "python",
+        "type": "UserDataFunction",
+        "contentHash": digest,
+    }
+    if output_file:
+        try:
+            with open(output_file, "r", encoding="utf-8") as f:
+                unchanged = json.load(f).get("contentHash") == digest
+        except (OSError, ValueError):
+            unchanged = False
+        if unchanged:
+            logger.info(f"UDF payload {output_file} is up to date ({digest[:12]})")
+        else:
+            with open(output_file, "w", encoding="utf-8") as f:
+                json.dump(payload, f, indent=2)
+            logger.info(f"UDF payload written to {output_file} ({digest[:12]})")
+    return payload
+
+
+def _wait_operation(client: ApiClient, response, poll_interval: float = 2.0, timeout: float = 300):
+    """Follow a Fabric long running operation (``202`` + ``Location``) and return its result, if any."""
+    if response.status_code != 202 or "Location" not in response.headers:
+        return response.json() if response.content else None
+    location = response.headers["Location"]
+    deadline = time.monotonic() + timeout
+    while True:
+        time.sleep(float(response.headers.get("Retry-After", poll_interval)))
+        response = client.get(location, use_cache=False)
+        status = response.json().get("status") if response.content else None
+        if status == "Succeeded":
+            result = client.get(f"{location}/result", raise_for_status=False, use_cache=False)
+            return result.json() if result.ok and result.content else None
+        if status in ("Failed", "Cancelled"):
+            raise ValueError(f"Fabric operation {location} {status.lower()}: {response.text}")
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"Fabric operation {location} still {status} after {timeout}s")
+
+
+def find_or_create_udf_item(client: ApiClient, workspace_id: str, display_name: str, description: str = "") -> str:
+    """Id of the User Data Function item named ``display_name``, created if missing."""
+    for items in iter_api_pages(f"workspaces/{workspace_id}/items", client=client,
+                                params={"type": "UserDataFunction"}, use_cache=False):
+        for item in items:
+            if item.get("displayName") == display_name:
+                return item["id"]
+
+    response = client.post(f"workspaces/{workspace_id}/items", {
+        "displayName": display_name, "description": description, "type": "UserDataFunction"})
+    item = _wait_operation(client, response)
+    logger.info(f"Created UDF item {display_name} ({item['id']})")
+    return item["id"]
+
+
+def get_deployed_hash(client: ApiClient, workspace_id: str, item_id: str, main_file: str = DEFAULT_MAIN_FILE) -> str | None:
+    """Content hash embedded in the deployed source of a UDF item, or None."""
+    response = client.post(f"workspaces/{workspace_id}/items/{item_id}/getDefinition")
+    definition = (_wait_operation(client, response) or {}).get("definition", {})
+    for part in definition.get("parts", []):
+        if part.get("path") == main_file:
+            return read_content_hash(base64.b64decode(part["payload"]).decode("utf-8"))
+    return None
+
+
+def deploy_udf_payload(client: ApiClient, workspace_id: str, payload: dict, item_id: str = None,
+                       main_file: str = DEFAULT_MAIN_FILE, force: bool = False) -> dict:
+    """
+    Deploy a payload of ``build_udf_payload``, unless the deployed source already has its hash.
+
+    Args:
+        client (ApiClient): Client of the Fabric REST API (base URL and Authorization set)
+        workspace_id (str): Fabric workspace
+        payload (dict): Output of ``build_udf_payload``
+        item_id (str): UDF item id, looked up (or created) by display name if None
+        main_file (str): Path of the source in the item definition
+        force (bool): Deploy even when the hashes match
+
+    Returns:
+        dict: displayName, item_id, contentHash and deployed (False when skipped)
+    """
+    item_id = item_id or find_or_create_udf_item(client, workspace_id, payload["displayName"], payload["description"])
+    report = {"displayName": payload["displayName"], "item_id": item_id,
+              "contentHash": payload["contentHash"], "deployed": False}
+    if not force and get_deployed_hash(client, workspace_id, item_id, main_file) == payload["contentHash"]:
+        logger.info(f"UDF {payload['displayName']} is up to date, deployment skipped")
+        return report
+
+    response = client.post(f"workspaces/{workspace_id}/items/{item_id}/updateDefinition", {
+        "definition": {"parts": [{
+            "path": main_file,
+            "payload": base64.b64encode(payload["source"].encode("utf-8")).decode("ascii"),
+            "payloadType": "InlineBase64",
+        }]}
+    })
+    _wait_operation(client, response)
+    report["deployed"] = True
+    logger.info(f"UDF {payload['displayName']} deployed ({payload['contentHash'][:12]})")
+    return report
+
+
+def deploy_udfs(client: ApiClient, workspace_id: str, udfs: list, force: bool = False) -> list:
+    """
+    Build and deploy several UDF items in one run, skipping the unchanged ones.
+
+    Args:
+        client (ApiClient): Client of the Fabric REST API
+        workspace_id (str): Fabric workspace
+        udfs (list): Dicts with ``functions``, ``display_name`` and optionally
+            ``description``, ``item_id``, ``output_file`` and ``main_file``
+        force (bool): Deploy even when the hashes match
+
+    Returns:
+        list: One report of ``deploy_udf_payload`` per item
+    """
+    reports = []
+    for udf in udfs:
+        payload = build_udf_payload(udf["functions"], udf["display_name"], udf.get("description", ""),
+                                    udf.get("output_file"))
+        reports.append(deploy_udf_payload(client, workspace_id, payload, udf.get("item_id"),
+                                          udf.get("main_file", DEFAULT_MAIN_FILE), force))
+    return reports
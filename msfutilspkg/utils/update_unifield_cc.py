@@ -1,48 +1,406 @@
 #! /usr/bin/env python
 # -*- encoding: utf-8 -*-
+import io
+import re
+import os
+import shutil
 import xmlrpc.client
 import base64
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+from msfutilspkg.utils.export_utils import write_excel_2003_xml_from_df
 
 logger = logging.getLogger(__name__)
 
+IMPORT_MODEL = 'msf.import.export'
+SUMMARY_FIELDS = ['state', 'info_message', 'error_message', 'warning_message']
+MODEL_LIST_SELECTIONS = {'update': 'cost_centers_update', 'create': 'cost_centers'}
+# Bookkeeping columns added by ``sync_dataframes_with_old_new``, not part of the import files
+SYNC_COLUMNS = ['type_of_change', 'changed_columns']
+# Row errors of the import wizard summary: "Line 3: ...", the header being line 1
+_LINE_ERROR = re.compile(r'^\s*(?:Line|Row)\s+(\d+)\s*:\s*(.*)$', re.IGNORECASE | re.MULTILINE)
+FIRST_DATA_LINE = 2
+
+
+class Base64Writer(io.RawIOBase):
+    """
+    Binary file-like object base64-encoding what is written to it, as it is written.
+
+    Only the encoded text is kept (plus at most 2 bytes awaiting a complete 3-byte
+    group), so rendering a file into it costs one copy of the base64 payload.
+
+    Example:
+        >>> writer = Base64Writer()
+        >>> write_excel_2003_xml_from_df(df, writer)
+        >>> writer.getvalue()  # base64 str of the workbook
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._pending = b''
+        self._encoded = io.StringIO()
+        self.size = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        buffered = self._pending + data
+        complete = len(buffered) - len(buffered) % 3
+        self._encoded.write(base64.b64encode(buffered[:complete]).decode('ascii'))
+        self._pending = buffered[complete:]
+        self.size += len(data)
+        return len(data)
+
+    def getvalue(self) -> str:
+        """Base64 text of everything written so far."""
+        return self._encoded.getvalue() + base64.b64encode(self._pending).decode('ascii')
+
+
+class _KeepAliveTransport(xmlrpc.client.Transport):
+    """HTTP/1.1 transport with a socket timeout; the connection is kept open between calls."""
+
+    def __init__(self, timeout: float = None):
+        super().__init__()
+        self.timeout = timeout
+
+    def make_connection(self, host):
+        connection = super().make_connection(host)
+        connection.timeout = self.timeout
+        return connection
+
+
+class UnifieldClient:
+    """
+    XML-RPC client of a Unifield instance running ``msf.import.export`` imports.
+
+    The client logs in once and keeps one ``ServerProxy`` per thread and service,
+    so consecutive calls reuse the same keep-alive HTTP connection instead of
+    opening a new one (``ServerProxy`` is not thread-safe, hence per thread).
+
+    Args:
+        host (str): Unifield server
+        port (int): XML-RPC port (8069 on prod instances)
+        dbname (str): Database name, e.g. 'OCBHQ'
+        user (str): Unifield user
+        password (str): Password of the user
+        lang (str): Language of the import messages ('en_MF' or 'fr_MF')
+        max_workers (int): Default number of concurrent imports of ``import_files``
+        timeout (float): Socket timeout in seconds (None: no timeout)
+
+    Example:
+        >>> with UnifieldClient(host, 8069, 'OCBHQ', user, password) as client:
+        ...     summary = client.import_files([('cc_create.xls', 'create'), ('cc_update.xls', 'update')])
+    """
+
+    def __init__(self, host: str, port: int, dbname: str, user: str, password: str,
+                 lang: str = 'en_MF', max_workers: int = 2, timeout: float = None):
+        self.url = 'http://%s:%s/xmlrpc/' % (host, port)
+        self.dbname = dbname
+        self.user = user
+        self.password = password
+        self.lang_context = {'lang': lang}
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.user_id = None
+        self._local = threading.local()
+        self._login_lock = threading.Lock()
+        self._proxies = []  # Proxies of all threads, closed by close()
+        self._proxies_lock = threading.Lock()
+        self._generation = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def _proxy(self, service: str) -> xmlrpc.client.ServerProxy:
+        proxies = getattr(self._local, 'proxies', None)
+        if proxies is None or self._local.generation != self._generation:
+            # First call of this thread, or its proxies were closed since
+            proxies = self._local.proxies = {}
+            self._local.generation = self._generation
+        if service not in proxies:
+            proxy = xmlrpc.client.ServerProxy(
+                self.url + service, allow_none=True, transport=_KeepAliveTransport(self.timeout))
+            with self._proxies_lock:
+                self._proxies.append(proxy)
+            proxies[service] = proxy
+        return proxies[service]
+
+    def close(self):
+        """Close the connections opened by every thread (worker threads of ``import_files`` included)."""
+        with self._proxies_lock:
+            proxies, self._proxies = self._proxies, []
+            self._generation += 1
+        for proxy in proxies:
+            proxy('close')()
+
+    def login(self) -> int:
+        """Log in (once) and return the user id."""
+        with self._login_lock:
+            if self.user_id is None:
+                # http://<host>:<xmlrpcport>/xmlrpc/common
+                user_id = self._proxy('common').login(self.dbname, self.user, self.password)
+                if not user_id:
+                    raise ValueError(f"Unifield login failed for user '{self.user}' on database '{self.dbname}'")
+                self.user_id = user_id
+        return self.user_id
+
+    def execute(self, model: str, method: str, *args):
+        """Call ``method`` of ``model`` through http://<host>:<xmlrpcport>/xmlrpc/object."""
+        user_id = self.login()
+        return self._proxy('object').execute(self.dbname, user_id, self.password, model, method, *args)
+
+    def import_file(self, file_to_import, context: str = 'update') -> dict:
+        """
+        Import one file with the ``msf.import.export`` wizard.
+
+        Args:
+            file_to_import (str | bytes | file-like | Base64Writer): Path of the file, its
+                content, a binary stream (read and encoded chunk by chunk) or a
+                ``Base64Writer`` the file was rendered into
+            context (str): 'update' (cost_centers_update) or 'create' (cost_centers)
+
+        Returns:
+            dict: state, info_message, error_message and warning_message of the wizard
+        """
+        if context not in MODEL_LIST_SELECTIONS:
+            raise ValueError(f"context must be one of {list(MODEL_LIST_SELECTIONS)}, got '{context}'")
+        if isinstance(file_to_import, Base64Writer):
+            b64_file_content = file_to_import.getvalue()
+        elif isinstance(file_to_import, (bytes, bytearray, memoryview)):
+            b64_file_content = base64.b64encode(file_to_import).decode('ascii')
+        else:
+            writer = Base64Writer()
+            if isinstance(file_to_import, (str, os.PathLike)):
+                with open(file_to_import, 'rb') as f:
+                    shutil.copyfileobj(f, writer)
+            else:
+                shutil.copyfileobj(file_to_import, writer)
+            b64_file_content = writer.getvalue()
+
+        # create and populate the wizard, the content of the file must be base64 encoded
+        wiz_id = self.execute(IMPORT_MODEL, 'create', {
+            'model_list_selection': MODEL_LIST_SELECTIONS[context],
+            'import_file': b64_file_content,
+        }, self.lang_context)
+
+        # launch the import
+        self.execute(IMPORT_MODEL, 'button_import_xml', wiz_id, self.lang_context)
+
+        # get the summary
+        result = self.execute(IMPORT_MODEL, 'read', wiz_id, SUMMARY_FIELDS, self.lang_context)
+        if isinstance(result, list):
+            result = result[0]
+        return {field: result.get(field) for field in SUMMARY_FIELDS}
+
+    def import_dataframe(self, df: pd.DataFrame, context: str = 'update', sheet_name: str = 'Sheet1') -> dict:
+        """
+        Import the rows of ``df`` as an Excel 2003 XML file (see ``import_file``).
+
+        The workbook is rendered straight into a ``Base64Writer``: no temporary
+        file, and only the base64 payload is held in memory.
+        """
+        writer = Base64Writer()
+        write_excel_2003_xml_from_df(df, writer, sheet_name=sheet_name)
+        return self.import_file(writer, context)
+
+    def import_files(self, files: list, context: str = 'update', max_workers: int = None) -> pd.DataFrame:
+        """
+        Import several files with at most ``max_workers`` imports running at once.
+
+        A failing file does not stop the others: its exception is reported in the summary.
+
+        Args:
+            files (list): Paths, or ``(path, context)`` tuples to mix creations and updates
+            context (str): Context of the files given without one
+            max_workers (int): Concurrent imports, defaults to the client's ``max_workers``
+
+        Returns:
+            pd.DataFrame: One row per file (in input order) with file, context, state,
+                info_message, error_message, warning_message and exception
+        """
+        jobs = [f if isinstance(f, tuple) else (f, context) for f in files]
+        self.login()
+
+        def run(job):
+            file_to_import, file_context = job
+            name = file_to_import if isinstance(file_to_import, (str, os.PathLike)) else '<content>'
+            row = {'file': str(name), 'context': file_context, **dict.fromkeys(SUMMARY_FIELDS), 'exception': None}
+            try:
+                row.update(self.import_file(file_to_import, file_context))
+            except Exception as e:
+                row['exception'] = f"{type(e).__name__}: {e}"
+            logger.info(f"Unifield import of {row['file']} ({file_context}): state={row['state']}, "
+                        f"error={row['error_message'] or row['exception']}")
+            return row
+
+        with ThreadPoolExecutor(max_workers=max_workers or self.max_workers) as executor:
+            rows = list(executor.map(run, jobs))
+
+        summary = pd.DataFrame(rows, columns=['file', 'context', *SUMMARY_FIELDS, 'exception'])
+        failed = summary.apply(lambda row: _import_failed(row, row['exception']), axis=1)
+        logger.info(f"Unifield imports: {len(summary) - failed.sum()} succeeded, {failed.sum()} failed")
+        return summary
+
+
+def _import_failed(result, exception=None) -> bool:
+    """An import failed if it raised, ended in the 'error' state or reported an error message."""
+    return bool(exception) or result['state'] == 'error' or bool(result['error_message'])
+
+
+def _line_errors(error_message: str, rows: int) -> dict:
+    """
+    Per-row errors of an import summary: ``{row position: error}`` from its
+    ``Line <n>: <error>`` lines, where line ``FIRST_DATA_LINE`` is the first data
+    row of the file. Empty if the message names no line or a line outside the file.
+    """
+    errors = {}
+    for match in _LINE_ERROR.finditer(error_message or ''):
+        position = int(match.group(1)) - FIRST_DATA_LINE
+        if not 0 <= position < rows:
+            return {}
+        errors.setdefault(position, match.group(2).strip())
+    return errors
+
+
+def prepare_cost_center_changes(sync_result: dict) -> dict:
+    """
+    Keep the ``to_create`` / ``to_update`` frames of ``sync_dataframes_with_old_new``
+    without its bookkeeping columns (``type_of_change``, ``changed_columns``, ``old_*``),
+    i.e. only the columns of the Unifield import files.
+    """
+    changes = {}
+    for context, frame in (('create', sync_result['to_create']), ('update', sync_result['to_update'])):
+        drop = [col for col in frame.columns if col in SYNC_COLUMNS or str(col).startswith('old_')]
+        changes[context] = frame.drop(columns=drop).reset_index(drop=True)
+    return changes
+
+
+def push_cost_center_changes(client: UnifieldClient, sync_result: dict, chunk_size: int = 200,
+                             max_retries: int = 1, max_workers: int = 1, sheet_name: str = 'Sheet1') -> dict:
+    """
+    Push only the created and updated cost centers to Unifield, in chunks of ``chunk_size`` rows.
+
+    Each chunk is one ``button_import_xml`` call, so the duration of a call no longer
+    grows with the size of the diff. A chunk raising an exception (timeout, dropped
+    connection) is retried up to ``max_retries`` times on its own.
+
+    Accepted rows are never sent again:
+
+    - When the error message names the failing rows (``Line <n>: ...``), those rows
+      are rejected. With the 'done' state the other rows were imported and are
+      accepted; with the 'error' state the file was rolled back and only the other
+      rows are sent again.
+    - Otherwise, a chunk in the 'error' state (or still raising) was rolled back as
+      a whole: it is split in two halves imported separately, recursively, until
+      the failing rows are isolated. A chunk in the 'done' state with an error
+      naming no row may be partially imported: it is rejected as a whole, without
+      being sent again.
+
+    Creations are pushed before updates (an update may reference a new parent).
+    Keep ``max_workers`` at 1 when rows of a file depend on rows of another chunk.
+
+    Args:
+        client (UnifieldClient): Logged in (or not yet) Unifield client
+        sync_result (dict): Output of ``sync_dataframes_with_old_new``
+        chunk_size (int): Maximum number of rows per import call
+        max_retries (int): Retries of a chunk raising an exception before it is split
+        max_workers (int): Chunks imported concurrently
+        sheet_name (str): Worksheet name of the import files
+
+    Returns:
+        dict: ``accepted`` (imported rows) and ``rejected`` (rows that failed alone, with
+            their ``context`` and ``error``) DataFrames, and ``imports`` (one row per
+            import call: context, rows, state, error)
+    """
+    changes = prepare_cost_center_changes(sync_result)
+    imports = []
+    accepted = {'create': [], 'update': []}
+    rejected = {'create': [], 'update': []}
+    lock = threading.Lock()
+
+    def attempt(df, context):
+        for retry in range(max_retries + 1):
+            try:
+                result = client.import_dataframe(df, context, sheet_name=sheet_name)
+                exception = None
+            except Exception as e:
+                result, exception = dict.fromkeys(SUMMARY_FIELDS), f"{type(e).__name__}: {e}"
+            with lock:
+                imports.append({'context': context, 'rows': len(df), 'state': result['state'],
+                                'error': exception or result['error_message'] or None})
+            if exception is None:
+                break
+            logger.info(f"Unifield import of {len(df)} rows ({context}) failed, attempt {retry + 1}: {exception}")
+        return result, exception
+
+    def reject(df, context, error):
+        with lock:
+            rejected[context].append(df.assign(context=context, error=error))
+
+    def push(df, context):
+        result, exception = attempt(df, context)
+        if not _import_failed(result, exception):
+            with lock:
+                accepted[context].append(df.assign(context=context))
+            return
+        error = exception or result['error_message'] or f"state {result['state']}"
+        line_errors = {} if exception else _line_errors(result['error_message'], len(df))
+        if line_errors:
+            positions = sorted(line_errors)
+            failed = df.iloc[positions]
+            reject(failed, context, [line_errors[i] for i in positions])
+            others = df.drop(index=failed.index)
+            if result['state'] == 'error':
+                if len(others):
+                    push(others, context)  # rolled back: the other rows were not imported
+            elif len(others):
+                with lock:
+                    accepted[context].append(others.assign(context=context))
+        elif len(df) == 1 or (not exception and result['state'] != 'error'):
+            reject(df, context, error)
+        else:
+            middle = len(df) // 2
+            push(df.iloc[:middle], context)
+            push(df.iloc[middle:], context)
+
+    for context in ('create', 'update'):
+        df = changes[context]
+        chunks = [df.iloc[start:start + chunk_size] for start in range(0, len(df), chunk_size)]
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            list(executor.map(lambda chunk: push(chunk, context), chunks))
+
+    # Back to the input order, creations first
+    def combine(frames: dict, extra_columns: list) -> pd.DataFrame:
+        frames = [pd.concat(frames[context]).sort_index() for context in ('create', 'update') if frames[context]]
+        if not frames:
+            return pd.DataFrame(columns=[*changes['create'].columns, *extra_columns])
+        return pd.concat(frames, ignore_index=True)
+
+    accepted = combine(accepted, ['context'])
+    rejected = combine(rejected, ['context', 'error'])
+    logger.info(f"Unifield cost centers: {len(accepted)} rows accepted, {len(rejected)} rejected "
+                f"in {len(imports)} import calls")
+    return {
+        'accepted': accepted,
+        'rejected': rejected,
+        'imports': pd.DataFrame(imports, columns=['context', 'rows', 'state', 'error']),
+    }
+
 
 def update_cost_centers(file_to_import: str, dbname: str, user: str, password: str, host: str, port: int, context: str = "update", **kwargs):
-    lang_context = {'lang': 'en_MF'}  # or fr_MF
-    
-    url = 'http://%s:%s/xmlrpc/' % (host, port)
-
-    # retrieve the user id : http://<host>:<xmlrpcport>/xmlrpc/common
-    sock = xmlrpc.client.ServerProxy(url + 'common')
-    user_id = sock.login(dbname, user, password)
-
-
-    # to query the server: http://<host>:<xmlrpcport>/xmlrpc/object
-    sock = xmlrpc.client.ServerProxy(url + 'object', allow_none=1)
-
-    # the content of the file must be base64 encoded
-    b64_file_content = base64.b64encode(open(file_to_import, 'rb').read())
-    model_list_selection = 'cost_centers_update' if context == "update" else 'cost_centers'
-
-    # create and populate the wizard to update CC
-    wiz_id = sock.execute(dbname, user_id, password, 'msf.import.export', 'create', {
-        'model_list_selection': model_list_selection,
-        'import_file': str(b64_file_content, 'utf8'),
-    }, lang_context)
-
-    # launch the import
-    sock.execute(dbname, user_id, password,
-                'msf.import.export', 'button_import_xml', wiz_id, lang_context)
-
-    # get the summary
-    result = sock.execute(
-        dbname, user_id, password,
-        'msf.import.export', 'read', wiz_id,
-        ['state', 'info_message', 'error_message', 'warning_message'],
-        lang_context)
-    
+    with UnifieldClient(host, port, dbname, user, password) as client:
+        result = client.import_file(file_to_import, "update" if context == "update" else "create")
+
     logger.info('State: %s' % result['state'])
     logger.info('Message: %s' % result['info_message'])
     logger.info('Error Message: %s' % result['error_message'])
     logger.info('Warning Message: %s' % result['warning_message'])
-    return result
\ No newline at end of file
+    return result
@@ -15,9 +15,12 @@ setup(
         "xlutils==2.0.0",
         "psycopg2-binary==2.9.10",
         "pyspark==4.0.1",
-        "pyarrow==21.0.0"
+        "pyarrow==21.0.0",
+        "openpyxl==3.1.5",
+        "requests>=2.31"
     ],
     extras_require={
+        "duckdb": ["duckdb>=1.0"],
         "dev": [
             "pytest>=7.0",
             "pytest-cov>=7.0.0"  # optional for coverage reports
@@ -0,0 +1,175 @@
+# tests/conftest.py
+import base64
+import json
+import threading
+from types import SimpleNamespace
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from socketserver import ThreadingMixIn
+from urllib.parse import urlsplit
+from xmlrpc.server import MultiPathXMLRPCServer, SimpleXMLRPCDispatcher, SimpleXMLRPCRequestHandler
+
+import pytest
+
+
+class StubHTTPServer(ThreadingHTTPServer):
+    """
+    Local HTTP server answering canned responses.
+
+    ``add(method, path, status, body, headers)`` queues a response for a route;
+    responses of a route are served in order and the last one is repeated.
+    Every received request is recorded in ``requests`` (command, path, headers,
+    body and client_address), a keep-alive connection reusing its handler.
+    """
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), StubHandler)
+        self.routes = {}
+        self.requests = []
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def add(self, method, path, status=200, body=None, headers=None):
+        if callable(body):
+            response = body
+        else:
+            response = (status, body, headers or {})
+        self.routes.setdefault((method.upper(), path), []).append(response)
+
+    def respond(self, handler):
+        with self.lock:
+            self.requests.append(SimpleNamespace(
+                command=handler.command, path=handler.path, headers=handler.headers,
+                body=handler.body, client_address=handler.client_address))
+            responses = self.routes.get((handler.command, urlsplit(handler.path).path))
+            if not responses:
+                return 404, {"error": "not found"}, {}
+            response = responses.pop(0) if len(responses) > 1 else responses[0]
+        return response(handler) if callable(response) else response
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def __getattr__(self, name):
+        # do_GET, do_POST, do_PATCH... all go through _handle
+        if name.startswith("do_"):
+            return self._handle
+        raise AttributeError(name)
+
+    def _handle(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        self.body = self.rfile.read(length) if length else b""
+        status, body, headers = self.server.respond(self)
+        if isinstance(body, (dict, list)):
+            data = json.dumps(body).encode()
+            headers = {"Content-Type": "application/json", **headers}
+        elif isinstance(body, str):
+            data = body.encode()
+        else:
+            data = body or b""
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    server = StubHTTPServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+class StubUnifieldServer(ThreadingMixIn, MultiPathXMLRPCServer):
+    """
+    Local Unifield answering ``/xmlrpc/common`` (login) and ``/xmlrpc/object``
+    (``execute`` of the ``msf.import.export`` wizard).
+
+    ``import_handler(model_list_selection, content) -> dict`` decides the wizard
+    summary of an import (default: state 'done'). Logins, ``execute`` calls and
+    the client address of every request are recorded.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, user="talend", password="secret"):
+        super().__init__(("127.0.0.1", 0), requestHandler=StubUnifieldHandler, allow_none=True, logRequests=False)
+        self.credentials = (user, password)
+        self.logins = 0
+        self.calls = []
+        self.client_addresses = []
+        self.wizards = {}
+        self.lock = threading.Lock()
+        self.import_handler = lambda model_list_selection, content: {"state": "done", "info_message": "ok"}
+
+        common = SimpleXMLRPCDispatcher(allow_none=True)
+        common.register_function(self.login, "login")
+        obj = SimpleXMLRPCDispatcher(allow_none=True)
+        obj.register_function(self.execute, "execute")
+        self.add_dispatcher("/xmlrpc/common", common)
+        self.add_dispatcher("/xmlrpc/object", obj)
+
+    @property
+    def host(self):
+        return self.server_address[0]
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def login(self, dbname, user, password):
+        with self.lock:
+            self.logins += 1
+        return 1 if (user, password) == self.credentials else False
+
+    def execute(self, dbname, user_id, password, model, method, *args):
+        with self.lock:
+            self.calls.append((model, method))
+            if method == "create":
+                wiz_id = len(self.wizards) + 1
+                self.wizards[wiz_id] = {"values": args[0], "summary": {"state": "draft"}}
+                return wiz_id
+        wizard = self.wizards[args[0]]
+        if method == "button_import_xml":
+            content = base64.b64decode(wizard["values"]["import_file"])
+            summary = {"state": "done", "info_message": "", "error_message": "", "warning_message": ""}
+            summary.update(self.import_handler(wizard["values"]["model_list_selection"], content))
+            wizard["summary"] = summary
+            return True
+        if method == "read":
+            return [{"id": args[0], **{field: wizard["summary"].get(field) for field in args[1]}}]
+        raise ValueError(f"Unexpected method {method}")
+
+
+class StubUnifieldHandler(SimpleXMLRPCRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    rpc_paths = ()
+
+    def do_POST(self):
+        with self.server.lock:
+            self.server.client_addresses.append(self.client_address)
+        super().do_POST()
+
+
+@pytest.fixture
+def unifield_server():
+    server = StubUnifieldServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
@@ -0,0 +1,153 @@
+# tests/test_api_utils.py
+import json
+import pytest
+import requests
+
+from msfutilspkg.utils.api_utils import RETRY_METHODS, ApiClient, call_api
+
+
+def test_retries_on_503_honouring_retry_after(stub_server):
+    stub_server.add("GET", "/positions", 503, {"error": "busy"}, {"Retry-After": "0"})
+    stub_server.add("GET", "/positions", 429, {"error": "throttled"}, {"Retry-After": "0"})
+    stub_server.add("GET", "/positions", 200, {"value": [1, 2]})
+
+    with ApiClient(stub_server.url, backoff_factor=0) as client:
+        response = client.get("/positions")
+    assert response.json() == {"value": [1, 2]}
+    assert len(stub_server.requests) == 3
+
+
+def test_gives_up_after_max_retries(stub_server):
+    stub_server.add("GET", "/down", 500, {"error": "down"})
+    with ApiClient(stub_server.url, max_retries=2, backoff_factor=0) as client:
+        with pytest.raises(requests.HTTPError):
+            client.get("/down")
+        assert client.get("/down", raise_for_status=False).status_code == 500
+    assert len(stub_server.requests) == 6
+
+
+def test_post_is_only_retried_when_opted_in(stub_server):
+    for _ in range(2):
+        stub_server.add("POST", "/imports", 503, {"error": "busy"}, {"Retry-After": "0"})
+    stub_server.add("POST", "/imports", 201, {"id": 1})
+
+    with ApiClient(stub_server.url, backoff_factor=0) as client:
+        assert client.post("/imports", {"a": 1}, raise_for_status=False).status_code == 503
+    assert len(stub_server.requests) == 1
+
+    with ApiClient(stub_server.url, backoff_factor=0, retry_methods=RETRY_METHODS | {"POST"}) as client:
+        assert client.post("/imports", {"a": 1}).status_code == 201
+    assert len(stub_server.requests) == 3
+
+
+def test_all_verbs_and_connection_reuse(stub_server):
+    for method in ["GET", "POST", "PUT", "PATCH", "DELETE"]:
+        stub_server.add(method, "/items/1", 200, {"method": method})
+
+    with ApiClient(stub_server.url) as client:
+        for method in ["GET", "POST", "PUT", "PATCH", "DELETE"]:
+            assert client.request(method, "items/1", payload={"a": 1}).json() == {"method": method}
+
+    assert json.loads(stub_server.requests[1].body) == {"a": 1}
+    # Keep-alive: every request went through the same connection
+    assert len({handler.client_address for handler in stub_server.requests}) == 1
+
+
+def test_call_api_sends_authorization_and_supports_any_verb(stub_server):
+    stub_server.add("PATCH", "/workspace", 200, {"ok": True})
+    response = call_api(f"{stub_server.url}/workspace", "Bearer token", payload={"name": "x"}, method="PATCH")
+    assert response.json() == {"ok": True}
+    assert stub_server.requests[0].headers["Authorization"] == "Bearer token"
+
+
+def test_call_api_batch_collects_errors_without_aborting(stub_server):
+    from msfutilspkg.utils.api_utils import call_api_batch
+
+    stub_server.add("GET", "/employees/1", 200, {"id": 1})
+    stub_server.add("GET", "/employees/2", 404, {"error": "missing"})
+    stub_server.add("GET", "/employees/3", 200, {"id": 3})
+
+    with ApiClient(stub_server.url, max_retries=0) as client:
+        result = call_api_batch([{"url": f"/employees/{i}"} for i in (1, 2, 3)], client=client, max_workers=3)
+    assert sorted(result["responses"]) == [0, 2]
+    assert result["responses"][2].json() == {"id": 3}
+    assert isinstance(result["errors"][1], requests.HTTPError)
+
+
+def test_rate_limiter_spaces_requests_per_host():
+    import time
+    from msfutilspkg.utils.api_utils import RateLimiter
+
+    limiter = RateLimiter(requests_per_second=20)
+    start = time.monotonic()
+    for _ in range(5):
+        limiter.wait("http://host-a/x")
+    limiter.wait("http://host-b/x")  # other host: not delayed by host-a
+    assert 0.2 - 0.05 <= time.monotonic() - start < 1
+
+
+@pytest.mark.parametrize("style", ["odata", "continuation", "page"])
+def test_pagination_styles_into_dataframe(stub_server, style):
+    from msfutilspkg.utils.api_utils import read_api_to_dataframe, iter_api_frames
+
+    def page(handler):
+        query = handler.path.partition("?")[2]
+        if style == "odata":
+            if "skip=2" in query:
+                return 200, {"value": [{"id": 3}]}, {}
+            return 200, {"value": [{"id": 1}, {"id": 2}], "@odata.nextLink": f"{stub_server.url}/items?skip=2"}, {}
+        if style == "continuation":
+            if "continuationToken=abc" in query:
+                return 200, {"value": [{"id": 3}]}, {}
+            return 200, {"value": [{"id": 1}, {"id": 2}], "continuationToken": "abc"}, {}
+        pages = {"page=1": [{"id": 1}, {"id": 2}], "page=2": [{"id": 3}]}
+        return 200, pages.get(query, []), {}
+
+    stub_server.add("GET", "/items", body=page)
+    with ApiClient(stub_server.url) as client:
+        df = read_api_to_dataframe("/items", client=client, style=style)
+        batches = list(iter_api_frames("/items", client=client, style=style, as_arrow=True))
+    assert df["id"].tolist() == [1, 2, 3]
+    assert [batch.num_rows for batch in batches] == [2, 1]
+
+
+def test_http_cache_max_age_and_etag_revalidation(stub_server, tmp_path):
+    from msfutilspkg.utils.http_cache import HttpCache
+
+    def lookup(handler):
+        if handler.headers.get("If-None-Match") == '"v1"':
+            return 304, None, {"ETag": '"v1"'}
+        return 200, {"codes": ["A", "B"]}, {"ETag": '"v1"', "Cache-Control": "max-age=60"}
+
+    stub_server.add("GET", "/lookups", body=lookup)
+    cache = HttpCache(cache_dir=str(tmp_path))
+    with ApiClient(stub_server.url, cache=cache) as client:
+        assert client.get("/lookups").json() == {"codes": ["A", "B"]}
+        assert client.get("/lookups").json() == {"codes": ["A", "B"]}  # fresh: no request
+        assert client.get("/lookups", cache_ttl=0).json() == {"codes": ["A", "B"]}  # stale: 304
+        client.get("/lookups", use_cache=False)
+
+    assert cache.stats() == {"hits": 1, "revalidations": 1, "misses": 1}
+    assert len(stub_server.requests) == 3
+
+    # The on-disk store survives a new cache instance (e.g. the next run)
+    with ApiClient(stub_server.url, cache=HttpCache(cache_dir=str(tmp_path))) as client:
+        assert client.get("/lookups").json() == {"codes": ["A", "B"]}
+        assert client.cache.stats()["misses"] == 0
+
+
+def test_backoff_max_on_urllib3_without_the_keyword(monkeypatch):
+    from urllib3.util.retry import Retry
+    from msfutilspkg.utils import api_utils
+
+    class LegacyRetry(Retry):  # urllib3 1.26 signature: no backoff_max
+        def __init__(self, *args, backoff_max=None, **kwargs):
+            if backoff_max is not None:
+                raise TypeError("unexpected keyword argument 'backoff_max'")
+            super().__init__(*args, **kwargs)
+
+    monkeypatch.setattr(api_utils, "Retry", LegacyRetry)
+    with ApiClient(backoff_max=7) as client:
+        retry = client.session.get_adapter("https://example.org").max_retries
+    # urllib3 1.26 caps the backoff with the class attribute
+    assert isinstance(retry, LegacyRetry) and retry.DEFAULT_BACKOFF_MAX == 7
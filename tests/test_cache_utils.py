@@ -0,0 +1,68 @@
+# tests/test_cache_utils.py
+import os
+import time
+import pandas as pd
+
+from msfutilspkg.utils.cache_utils import QueryCache
+
+
+def sample_df(rows=10):
+    return pd.DataFrame({
+        "id": pd.array(range(rows), dtype="Int64"),
+        "name": pd.array([f"cc_{i}" if i % 3 else None for i in range(rows)], dtype="string"),
+        "active": pd.array([i % 2 == 0 for i in range(rows)], dtype="boolean"),
+    })
+
+
+def test_key_normalises_sql_and_separates_connections():
+    assert QueryCache.normalize_sql("SELECT *\n   FROM  t ;") == "SELECT * FROM t"
+    cache = QueryCache.__new__(QueryCache)
+    assert cache.key("db1", "SELECT * FROM t") == cache.key("db1", "SELECT  *\n FROM t;")
+    assert cache.key("db1", "SELECT * FROM t") != cache.key("db2", "SELECT * FROM t")
+    assert cache.key("db1", "SELECT * FROM t", {"a": 1}) != cache.key("db1", "SELECT * FROM t", {"a": 2})
+
+
+def test_put_get_roundtrip_keeps_dtypes(tmp_path):
+    cache = QueryCache(str(tmp_path))
+    key = cache.key("db", "SELECT * FROM t")
+    assert cache.get(key) is None
+    cache.put(key, sample_df())
+
+    cached = cache.get(key)
+    pd.testing.assert_frame_equal(cached, sample_df())
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_ttl_expiry(tmp_path):
+    cache = QueryCache(str(tmp_path), ttl_seconds=60)
+    key = cache.key("db", "SELECT 1")
+    cache.put(key, sample_df())
+    path = os.path.join(str(tmp_path), key + QueryCache.SUFFIX)
+    old = time.time() - 120
+    os.utime(path, (old, old))
+
+    assert cache.get(key) is None
+    assert not os.path.exists(path)
+
+
+def test_lru_eviction_and_invalidation(tmp_path):
+    cache = QueryCache(str(tmp_path))
+    keys = [cache.key("db", f"SELECT {i}") for i in range(3)]
+    for i, key in enumerate(keys):
+        cache.put(key, sample_df(1000))
+        path = os.path.join(str(tmp_path), key + QueryCache.SUFFIX)
+        os.utime(path, (time.time() - 100 + i, time.time()))
+    entry_size = os.path.getsize(path)
+
+    # Touch the oldest entry so that the second one becomes the least recently used
+    cache.get(keys[0])
+    cache.max_size_bytes = 2 * entry_size
+    cache.evict()
+    assert cache.get(keys[0]) is not None
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[2]) is not None
+
+    cache.max_size_bytes = 10 * entry_size
+    cache.put(cache.key("other_db", "SELECT 0"), sample_df())
+    assert cache.invalidate(connection_id="db") == 2
+    assert cache.invalidate() == 1
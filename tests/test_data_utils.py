@@ -132,3 +132,19 @@ def test_pandas_to_spark_schema_basic():
         # Always nullable (important for Fabric!)
         assert field.nullable is True
 
+
+
+def test_enforce_schema_keeps_typed_columns_and_input():
+    df = pd.DataFrame({
+        "id": pd.array([1, None, 3], dtype="Int64"),
+        "code": pd.array(["A", None, "C"], dtype="string"),
+        "raw": ["1", "x", None],
+    })
+    df_clean = enforce_schema(df, {"id": "Int64", "code": "str", "raw": "Int64"})
+
+    # Already typed columns are passed through untouched
+    assert df_clean["id"].array is df["id"].array
+    assert df_clean["code"].dtype.name in ["string", "object"]
+    # Others are converted, without modifying the input frame
+    assert df_clean["raw"].dtype.name == "Int64"
+    assert df["raw"].dtype == object
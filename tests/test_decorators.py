@@ -0,0 +1,154 @@
+# tests/test_decorators.py
+import threading
+import pytest
+from deltalake import DeltaTable
+
+from msfutilspkg.utils.decorators import BufferedStatusLogger, log_etl_status_factory
+
+
+def test_log_etl_status_rust_engine_appends_row(tmp_path):
+    table_path = str(tmp_path / "job_status")
+
+    @log_etl_status_factory(table_path, job_name="test_job", engine="rust")
+    def job():
+        return {"records_processed": 3, "records_created": 1}
+
+    assert job() == {"records_processed": 3, "records_created": 1}
+    df = DeltaTable(table_path).to_pandas()
+    assert len(df) == 1
+    assert df.loc[0, "status"] == "SUCCESS"
+    assert df.loc[0, "records_processed"] == 3
+
+
+def test_buffered_logger_flushes_by_size_and_on_close():
+    batches = []
+    written = threading.Event()
+
+    def write_batch(batch):
+        batches.append(batch)
+        written.set()
+
+    status_logger = BufferedStatusLogger(write_batch, max_batch_size=2, flush_interval=60)
+    status_logger.log({"job_name": "a"})
+    assert batches == []
+    status_logger.log({"job_name": "b"})
+    assert written.wait(5)
+    assert [record["job_name"] for record in batches[0]] == ["a", "b"]
+
+    status_logger.log({"job_name": "c"})
+    status_logger.close()
+    assert [record["job_name"] for record in batches[-1]] == ["c"]
+    assert status_logger.pending() == 0
+
+
+def test_buffered_logger_requeues_failed_batch():
+    calls = []
+
+    def write_batch(batch):
+        calls.append(list(batch))
+        if len(calls) == 1:
+            raise IOError("lakehouse unavailable")
+
+    status_logger = BufferedStatusLogger(write_batch, max_batch_size=100, flush_interval=60)
+    status_logger.log({"job_name": "a"}, flush=True)
+    assert status_logger.pending() == 1
+    status_logger.close()
+    assert calls[-1] == [{"job_name": "a"}]
+
+
+def test_buffered_decorator_persists_failed_job_immediately(tmp_path):
+    table_path = str(tmp_path / "job_status")
+    decorator = log_etl_status_factory(table_path, job_name="failing_job", engine="rust", buffered=True, flush_interval=3600)
+
+    @decorator
+    def ok_job():
+        return {"records_processed": 1}
+
+    @decorator
+    def failing_job():
+        raise RuntimeError("boom")
+
+    ok_job()
+    with pytest.raises(RuntimeError):
+        failing_job()
+
+    # The failure triggers a synchronous flush of everything queued so far
+    df = DeltaTable(table_path).to_pandas().sort_values("start_time")
+    assert df["status"].tolist() == ["SUCCESS", "FAILURE"]
+    assert df["error_message"].iloc[1] == "boom"
+
+
+def test_spans_are_persisted_in_child_table(tmp_path):
+    from msfutilspkg.utils.instrumentation import span
+
+    table_path, spans_path = str(tmp_path / "job_status"), str(tmp_path / "job_status_spans")
+
+    @log_etl_status_factory(table_path, job_name="instrumented_job", engine="rust", spans_path=spans_path)
+    def job():
+        with span("read") as s:
+            s.rows = 42
+        return {"records_processed": 42}
+
+    job()
+    status = DeltaTable(table_path).to_pandas()
+    spans = DeltaTable(spans_path).to_pandas()
+    assert spans["span_name"].tolist() == ["read"]
+    assert spans.loc[0, "rows"] == 42
+    assert spans.loc[0, "job_id"] == status.loc[0, "job_id"]
+
+
+def test_partition_by_applies_to_the_spans_table(tmp_path):
+    from msfutilspkg.utils.instrumentation import span
+
+    table_path, spans_path = str(tmp_path / "job_status"), str(tmp_path / "job_status_spans")
+
+    @log_etl_status_factory(table_path, job_name="partitioned_job", engine="rust", spans_path=spans_path,
+                            partition_by=["job_date"])
+    def job():
+        with span("read"):
+            pass
+        return {}
+
+    job()
+    assert DeltaTable(table_path).metadata().partition_columns == ["job_date"]
+    assert DeltaTable(spans_path).metadata().partition_columns == ["job_date"]
+    status = DeltaTable(table_path).to_pandas()
+    assert DeltaTable(spans_path).to_pandas().loc[0, "job_date"] == status.loc[0, "job_date"]
+
+
+def test_each_invocation_gets_its_own_job_id(tmp_path):
+    table_path = str(tmp_path / "job_status")
+
+    @log_etl_status_factory(table_path, job_name="repeated_job", engine="rust")
+    def job():
+        return {"records_processed": 1}
+
+    job()
+    job()
+    assert DeltaTable(table_path).to_pandas()["job_id"].nunique() == 2
+
+
+def test_spark_status_writer_builds_rows_without_pandas():
+    from datetime import datetime
+    from msfutilspkg.utils.decorators import SparkStatusWriter
+
+    writer = SparkStatusWriter("lakehouse.job_status")
+    rows = writer.to_rows([{"job_id": 123, "job_name": "job", "start_time": datetime(2025, 1, 1), "records_processed": 5}])
+    assert len(rows) == 1 and len(rows[0]) == len(writer.schema.fields)
+    assert rows[0][0] == "123"
+    assert rows[0][writer._fields.index("records_processed")] == 5
+    assert rows[0][writer._fields.index("error_message")] is None
+
+
+def test_status_table_partitioned_by_job_date(tmp_path):
+    table_path = str(tmp_path / "job_status")
+
+    @log_etl_status_factory(table_path, job_name="job", engine="rust", partition_by=["job_date"])
+    def job():
+        return {}
+
+    job()
+    job()
+    dt = DeltaTable(table_path)
+    assert dt.metadata().partition_columns == ["job_date"]
+    assert len(dt.to_pandas()) == 2
@@ -0,0 +1,148 @@
+# tests/test_delta_utils.py
+import threading
+from types import SimpleNamespace
+
+import pytest
+import pandas as pd
+from deltalake import DeltaTable
+from deltalake.writer import write_deltalake
+
+from msfutilspkg.utils.data_utils import sync_dataframes_with_old_new
+from msfutilspkg.utils.delta_utils import (
+    DeltaSnapshotCache, TableMaintainer, apply_scd2_changes, count_small_files, maintain_delta_table, maintain_delta_table_spark,
+    read_scd2_as_of)
+
+
+def test_maintain_delta_table_compacts_small_files(tmp_path):
+    table_path = str(tmp_path / "job_status")
+    for i in range(6):
+        write_deltalake(table_path, pd.DataFrame({"job_id": [str(i)], "records_processed": [i]}), mode="append")
+
+    report = maintain_delta_table(table_path, small_file_threshold=5, retention_hours=0)
+    assert report["small_files"] == 6
+    assert report["compacted"] and report["checkpointed"]
+    assert report["vacuumed_files"] == 6
+
+    dt = DeltaTable(table_path)
+    assert count_small_files(dt, 8 * 1024 ** 2) == 1
+    assert sorted(dt.to_pandas()["records_processed"]) == list(range(6))
+
+    # Under the threshold: nothing to compact
+    assert maintain_delta_table(table_path, small_file_threshold=5)["compacted"] is False
+
+
+def test_table_maintainer_runs_in_background_every_n_writes():
+    started, release = threading.Event(), threading.Event()
+    runs = []
+
+    def maintain():
+        runs.append(1)
+        started.set()
+        release.wait(5)
+        return "done"
+
+    maintainer = TableMaintainer(maintain, every_n_writes=2)
+    maintainer.notify_write()
+    assert runs == []
+    maintainer.notify_write()
+    assert started.wait(5)
+    # A maintenance is already running: the next due one is skipped, not queued
+    assert maintainer.run_in_background() is False
+    release.set()
+    maintainer.wait(5)
+    assert runs == [1] and maintainer.last_report == "done"
+
+
+def test_delta_snapshot_cache_hits_then_refreshes_incrementally(tmp_path):
+    table_path = str(tmp_path / "cost_centers")
+    write_deltalake(table_path, pd.DataFrame({"code": ["A", "B", "C"], "country": ["CD", "ML", "CD"], "amount": [1.0, 2.0, 3.0]}),
+                    partition_by=["country"])
+    cache = DeltaSnapshotCache(str(tmp_path / "cache"))
+    read = lambda: cache.read(table_path, columns=["code", "amount"], filters=[("country", "=", "CD")])
+
+    first = read()
+    assert sorted(first["code"]) == ["A", "C"] and list(first.columns) == ["code", "amount"]
+    assert cache.last_refresh["files_read"] == 1
+    pd.testing.assert_frame_equal(read(), first)
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    # New version: only the added file is read, the cached fragment is reused
+    write_deltalake(table_path, pd.DataFrame({"code": ["D"], "country": ["CD"], "amount": [4.0]}),
+                    mode="append", partition_by=["country"])
+    assert sorted(read()["code"]) == ["A", "C", "D"]
+    assert cache.last_refresh == {"version": 1, "previous_version": 0, "files_read": 1, "files_reused": 1,
+                                  "files_dropped": 0}
+
+    # A rewritten file replaces its fragment
+    DeltaTable(table_path).delete("code = 'A'")
+    assert sorted(read()["code"]) == ["C", "D"]
+    assert cache.last_refresh["files_dropped"] == 1
+
+    assert cache.invalidate(table_path) == 1
+
+
+def test_scd2_closes_and_inserts_versions_in_one_merge(tmp_path):
+    table_path = str(tmp_path / "cost_center_history")
+    empty = pd.DataFrame({"code": pd.Series([], dtype=object), "name": pd.Series([], dtype=object),
+                          "country": pd.Series([], dtype=object)})
+    day1 = pd.DataFrame({"code": ["A", "B", "C"], "name": ["a", "b", "c"], "country": ["CD", "ML", "CD"]})
+    day2 = pd.DataFrame({"code": ["A", "B", "D"], "name": ["a2", "b", "d"], "country": ["CD", "NE", "CD"]})
+
+    created = apply_scd2_changes(table_path, sync_dataframes_with_old_new(day1, empty, ["code"], True), ["code"],
+                                 effective_date="2024-01-01")
+    assert (created["inserted"], created["version"]) == (3, 0)
+
+    # Only "name" is versioned: B's country change overwrites its current row
+    report = apply_scd2_changes(table_path, sync_dataframes_with_old_new(day2, day1, ["code"], True), ["code"],
+                                tracked_columns=["name"], effective_date="2024-02-01")
+    assert {k: report[k] for k in ("inserted", "closed", "overwritten", "version")} == \
+        {"inserted": 2, "closed": 2, "overwritten": 1, "version": 1}
+    assert DeltaTable(table_path).history(1)[0]["operation"] == "MERGE"
+
+    history = DeltaTable(table_path).to_pandas().sort_values(["code", "valid_from"]).reset_index(drop=True)
+    assert history["code"].tolist() == ["A", "A", "B", "C", "D"]
+    assert history["is_current"].tolist() == [False, True, True, False, True]
+    assert history.loc[2, "country"] == "NE"
+
+    current = read_scd2_as_of(table_path).sort_values("code")
+    assert current[["code", "name"]].values.tolist() == [["A", "a2"], ["B", "b"], ["D", "d"]]
+    january = read_scd2_as_of(table_path, "2024-01-15", columns=["code", "name"]).sort_values("code")
+    assert january.values.tolist() == [["A", "a"], ["B", "b"], ["C", "c"]]
+    assert read_scd2_as_of(table_path, "2023-12-31").empty
+
+
+def test_scd2_tracked_columns_need_changed_columns(tmp_path):
+    old = pd.DataFrame({"code": ["A"], "name": ["a"]})
+    new = pd.DataFrame({"code": ["A"], "name": ["b"]})
+    with pytest.raises(ValueError):
+        apply_scd2_changes(str(tmp_path / "history"), sync_dataframes_with_old_new(new, old, ["code"], False),
+                           ["code"], tracked_columns=["name"])
+
+
+class FakeSparkSession:
+    def __init__(self, conf=None):
+        self.conf = SimpleNamespace(get=lambda key, default=None: (conf or {}).get(key, default))
+        self.statements = []
+
+    def sql(self, statement):
+        self.statements.append(statement)
+
+
+def test_maintain_delta_table_spark_reports_what_ran_and_checks_retention(monkeypatch):
+    from pyspark.sql import SparkSession
+
+    session = FakeSparkSession()
+    monkeypatch.setattr(SparkSession.Builder, "getOrCreate", lambda self: session)
+    report = maintain_delta_table_spark("/lakehouse/Tables/job_status", zorder_by=["job_date"])
+    assert report == {"compacted": True, "zordered": True, "vacuumed": True, "retention_hours": 168}
+    assert session.statements == ["OPTIMIZE delta.`/lakehouse/Tables/job_status` ZORDER BY (job_date)",
+                                  "VACUUM delta.`/lakehouse/Tables/job_status` RETAIN 168 HOURS"]
+
+    session.statements.clear()
+    with pytest.raises(ValueError, match="retentionDurationCheck"):
+        maintain_delta_table_spark("job_status", retention_hours=0)
+    assert session.statements == []
+
+    session = FakeSparkSession({"spark.databricks.delta.retentionDurationCheck.enabled": "false"})
+    assert maintain_delta_table_spark("job_status", retention_hours=0)["vacuumed"]
+    assert session.statements[-1] == "VACUUM job_status RETAIN 0 HOURS"
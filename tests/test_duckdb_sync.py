@@ -0,0 +1,66 @@
+import pandas as pd
+import pytest
+from deltalake import write_deltalake
+
+from msfutilspkg.utils.data_utils import sync_dataframes_with_old_new
+
+pytest.importorskip("duckdb")
+
+
+@pytest.fixture
+def frames():
+    old = pd.DataFrame({"id": [1, 2, 3, 5], "name": ["A", "B", "C", "E"], "amount": [1.0, 2.0, 3.0, 5.0]})
+    new = pd.DataFrame({"id": [2, 3, 4, 5], "name": ["B", "Charles", "D", "E"], "amount": [2.0, 3.5, 4.0, 5.0]})
+    return new, old
+
+
+@pytest.mark.parametrize("showChangedCol", [False, True])
+def test_duckdb_engine_matches_pandas(frames, showChangedCol):
+    new, old = frames
+    expected = sync_dataframes_with_old_new(new, old, ["id"], showChangedCol)
+    result = sync_dataframes_with_old_new(new, old, ["id"], showChangedCol, engine="duckdb", threads=2)
+
+    assert result.keys() == expected.keys()
+    for name in expected:
+        pd.testing.assert_frame_equal(result[name], expected[name].reset_index(drop=True))
+    if showChangedCol:
+        assert result["to_update"]["changed_columns"].tolist() == [["name", "amount"]]
+
+
+def test_duckdb_engine_reads_delta_and_parquet_in_place(frames, tmp_path):
+    new, old = frames
+    write_deltalake(str(tmp_path / "historic"), old)
+    new.to_parquet(tmp_path / "new.parquet")
+
+    result = sync_dataframes_with_old_new(
+        str(tmp_path / "new.parquet"), str(tmp_path / "historic"), ["id"], False,
+        engine="duckdb", memory_limit="256MB", temp_directory=str(tmp_path / "spill"),
+    )
+
+    assert result["to_create"]["id"].tolist() == [4]
+    assert result["to_update"]["id"].tolist() == [3]
+    assert result["to_delete"]["id"].tolist() == [1]
+    assert result["to_keep"]["id"].tolist() == [2, 5]
+
+
+def test_duckdb_engine_leaves_a_caller_connection_clean(frames, tmp_path):
+    import duckdb
+
+    new, old = frames
+    new.to_parquet(tmp_path / "new.parquet")
+    con = duckdb.connect()
+    result = sync_dataframes_with_old_new(
+        str(tmp_path / "new.parquet"), old, ["id"], False,
+        engine="duckdb", connection=con, temp_directory=str(tmp_path / "O'Brien spill"),
+    )
+
+    assert result["to_create"]["id"].tolist() == [4]
+    assert con.execute("SELECT count(*) FROM duckdb_views() WHERE NOT internal").fetchone()[0] == 0
+    assert con.execute("SELECT count(*) FROM duckdb_tables()").fetchone()[0] == 0
+    assert con.execute("SELECT current_setting('temp_directory')").fetchone()[0] == str(tmp_path / "O'Brien spill")
+
+
+def test_unknown_engine_raises(frames):
+    new, old = frames
+    with pytest.raises(ValueError):
+        sync_dataframes_with_old_new(new, old, ["id"], False, engine="polars")
@@ -0,0 +1,93 @@
+import gzip
+import io
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+import pytest
+
+from msfutilspkg.utils.export_utils import export_table, iter_excel_2003_xml
+
+
+@pytest.fixture
+def df():
+    return pd.DataFrame({
+        "code": [f"CC{i:03d}" for i in range(25)],
+        "amount": [1.5, None] * 12 + [2.0],
+        "start": pd.date_range("2024-01-01", periods=25),
+    })
+
+
+def test_export_table_streams_chunks_by_extension(df, tmp_path):
+    chunks = (df.iloc[i:i + 10] for i in range(0, len(df), 10))
+    assert export_table(chunks, tmp_path / "out.parquet", row_group_size=10) == 25
+    assert pq.ParquetFile(tmp_path / "out.parquet").metadata.num_row_groups == 3
+    pd.testing.assert_frame_equal(pd.read_parquet(tmp_path / "out.parquet"), df)
+
+    export_table(df, tmp_path / "out.feather", row_group_size=10)
+    with pa.memory_map(str(tmp_path / "out.feather")) as source:
+        reader = ipc.open_file(source)
+        assert reader.num_record_batches == 3
+        pd.testing.assert_frame_equal(reader.read_all().to_pandas(), df)
+
+    export_table(df, tmp_path / "out.csv.gz")
+    with gzip.open(tmp_path / "out.csv.gz", "rt") as f:
+        assert f.readline().strip() == '"code","amount","start"'
+
+    chunks = (df.iloc[i:i + 10] for i in range(0, len(df), 10))
+    export_table(chunks, tmp_path / "out.xlsx", row_group_size=10)
+    assert pd.read_excel(tmp_path / "out.xlsx")["code"].tolist() == df["code"].tolist()
+
+
+def test_export_table_excel_2003_xml_matches_single_frame_writer(df):
+    buffer = io.StringIO()
+    chunks = (df.iloc[i:i + 10] for i in range(0, len(df), 10))
+    export_table(chunks, buffer, format="excel_2003_xml")
+    assert buffer.getvalue() == "".join(iter_excel_2003_xml(df))
+
+
+def test_export_table_format_errors(df, tmp_path):
+    with pytest.raises(ValueError):
+        export_table(df, tmp_path / "out.unknown")
+    with pytest.raises(ValueError):
+        export_table(df, io.BytesIO())
+    with pytest.raises(ValueError):
+        export_table(df, tmp_path / "out.bin", format="orc")
+
+
+@pytest.mark.parametrize("extension", ["parquet", "arrow", "csv"])
+def test_export_table_types_columns_from_the_whole_frame(tmp_path, extension):
+    # "note" is all-null in the first row group only
+    df = pd.DataFrame({"id": range(10), "note": [None] * 5 + ["x"] * 5})
+    assert export_table(df, tmp_path / f"out.{extension}", row_group_size=5) == 10
+    if extension == "parquet":
+        assert pd.read_parquet(tmp_path / "out.parquet")["note"].tolist() == [None] * 5 + ["x"] * 5
+
+
+def test_export_table_chunks_are_cast_to_the_first_schema_or_raise(tmp_path):
+    chunks = [pd.DataFrame({"v": [1.5, 2.0]}), pd.DataFrame({"v": [None, None]}, dtype=object),
+              pd.DataFrame({"v": [3, 4]})]
+    export_table(iter(chunks), tmp_path / "ok.parquet")
+    assert pd.read_parquet(tmp_path / "ok.parquet")["v"].tolist()[-2:] == [3.0, 4.0]
+
+    chunks = [pd.DataFrame({"v": [1, 2]}), pd.DataFrame({"v": [3.5]})]
+    with pytest.raises(ValueError, match="schema="):
+        export_table(iter(chunks), tmp_path / "int.parquet")
+    export_table(iter(chunks), tmp_path / "float.parquet", schema=pa.schema([("v", pa.float64())]))
+    assert pd.read_parquet(tmp_path / "float.parquet")["v"].tolist() == [1.0, 2.0, 3.5]
+
+
+@pytest.mark.parametrize("extension", ["parquet", "arrow", "csv", "xlsx", "xls"])
+def test_export_table_empty_iterator(tmp_path, extension):
+    path = tmp_path / f"out.{extension}"
+    with pytest.raises(ValueError, match="schema="):
+        export_table(iter([]), path)
+    assert not path.exists()
+
+    schema = pa.schema([("code", pa.string()), ("amount", pa.float64())])
+    assert export_table(iter([]), path, schema=schema) == 0
+    if extension == "parquet":
+        assert pq.read_schema(path).names == ["code", "amount"]
+    elif extension == "xls":
+        assert path.read_text() == "".join(iter_excel_2003_xml(pd.DataFrame(columns=["code", "amount"])))
@@ -0,0 +1,145 @@
+# tests/test_import_utils.py
+import datetime
+import numpy as np
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine
+
+from msfutilspkg.utils import import_utils
+from msfutilspkg.utils.import_utils import PostgresReader, _partition_ranges
+
+
+@pytest.fixture
+def reader(tmp_path, monkeypatch):
+    # PostgresReader on top of a local SQLite file (shared by all pooled connections)
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    monkeypatch.setattr(import_utils, "create_engine", lambda *args, **kwargs: engine)
+    df = pd.DataFrame({
+        "id": list(range(1, 101)) + [None],
+        "name": [f"name_{i}" for i in range(101)],
+    })
+    df.to_sql("journal_items", engine, index=False)
+    return PostgresReader(host="localhost", port=5432, dbname="test", user="user", password="password")
+
+
+def test_partition_ranges_numeric_and_dates():
+    assert _partition_ranges(0, 100, 4) == [(0, 25), (25, 50), (50, 75), (75, 100)]
+    # Fewer distinct values than partitions
+    assert _partition_ranges(1, 2, 4) == [(1, 2)]
+    ranges = _partition_ranges(datetime.date(2025, 1, 1), datetime.date(2025, 1, 31), 3)
+    assert ranges[0][0] == datetime.date(2025, 1, 1)
+    assert ranges[-1][1] == datetime.date(2025, 1, 31)
+    assert all(lower < upper for lower, upper in ranges)
+    with pytest.raises(ValueError):
+        _partition_ranges(10, 0, 2)
+
+
+def test_partition_ranges_mixed_numpy_and_python_bounds():
+    expected = [(0, 25), (25, 50), (50, 75), (75, 100)]
+    assert _partition_ranges(0, np.int64(100), 4) == expected
+    assert _partition_ranges(np.int64(0), 100, 4) == expected
+    assert all(type(bound) is int for bounds in _partition_ranges(0, np.int64(100), 4) for bound in bounds)
+    ranges = _partition_ranges(datetime.datetime(2025, 1, 1), np.datetime64("2025-01-05T00:00:00.000000000"), 4)
+    assert ranges[0] == (datetime.datetime(2025, 1, 1), datetime.datetime(2025, 1, 2))
+    assert ranges[-1][1] == datetime.datetime(2025, 1, 5)
+
+
+def test_query_partitioned_matches_single_query(reader):
+    full = reader.query("SELECT * FROM journal_items")
+    partitioned = reader.query_partitioned("SELECT * FROM journal_items", "id", num_partitions=4)
+
+    assert len(partitioned) == len(full)
+
+    # Partitions come back in key order, NULL keys in the first one
+    frames = list(reader.iter_query_partitioned("SELECT * FROM journal_items", "id", num_partitions=4))
+    assert frames[0]["id"].isna().any()
+    for previous, current in zip(frames, frames[1:]):
+        assert previous["id"].max() < current["id"].min()
+
+
+def test_query_partitioned_explicit_bounds_do_not_filter(reader):
+    frames = list(reader.iter_query_partitioned(
+        "SELECT * FROM journal_items", "id", num_partitions=2, lower_bound=40, upper_bound=60
+    ))
+    assert len(frames) == 2
+    assert sum(len(df) for df in frames) == 101
+
+
+def test_query_cache_skips_database_on_hit(reader, tmp_path, monkeypatch):
+    from msfutilspkg.utils.cache_utils import QueryCache
+
+    reader.cache = QueryCache(str(tmp_path / "cache"))
+    first = reader.query("SELECT * FROM journal_items")
+
+    monkeypatch.setattr(reader, "_read", lambda sql_query: pytest.fail("database was queried on a cache hit"))
+    second = reader.query("SELECT *  FROM journal_items;")
+    pd.testing.assert_frame_equal(first, second)
+    assert reader.cache.hits == 1
+
+
+def test_query_cache_invalidates_typed_reads(reader, tmp_path):
+    from msfutilspkg.utils.cache_utils import QueryCache
+
+    reader.cache = QueryCache(str(tmp_path / "cache"))
+    reader.query("SELECT * FROM journal_items")
+    reader.query("SELECT * FROM journal_items", schema={"id": "Int64", "name": "str"})
+    assert reader.cache.misses == 2  # typed and untyped reads are cached apart
+
+    assert reader.cache.invalidate(reader.connection_id, "SELECT * FROM journal_items", dtype_backend="numpy_nullable") == 1
+    reader.query("SELECT * FROM journal_items", schema={"id": "Int64", "name": "str"})
+    assert reader.cache.misses == 3
+    # without dtype_backend, every read of the query is dropped
+    assert reader.cache.invalidate(reader.connection_id, "SELECT * FROM journal_items") == 2
+
+
+def test_build_select_query_binds_values():
+    from msfutilspkg.utils.import_utils import build_select_query
+
+    query, params = build_select_query(
+        "public.cost_center",
+        ["code", "name"],
+        [("active", "=", True), {"column": "code", "op": "in", "value": ("A", "B")}, ("parent_id", "is null")],
+    )
+    assert query == (
+        'SELECT "code", "name" FROM public.cost_center '
+        'WHERE "active" = :_filter_0 AND "code" IN :_filter_1 AND "parent_id" IS NULL'
+    )
+    assert params == {"_filter_0": True, "_filter_1": ["A", "B"]}
+    with pytest.raises(ValueError):
+        build_select_query("t", filters=[("a", "~", 1)])
+
+
+def test_read_msf_tables_projection_filters_and_schema(reader, tmp_path):
+    from msfutilspkg.utils.import_utils import read_msf_tables
+
+    connections = tmp_path / "connections.json"
+    connections.write_text(
+        '{"test": {"msf_db": {"host": "localhost", "port": 5432, "dbname": "test", "user": "user", "password": "password"}}}'
+    )
+    tables = read_msf_tables(
+        ["msf_db"],
+        ["journal_items"],
+        table_filters=[[("id", "in", [1, 2, 3]), ("name", "!=", "name_1")]],
+        path_to_connections=str(connections),
+        table_schemas=[{"id": "Int64"}],
+    )
+    df = tables["journal_items"]
+    assert list(df.columns) == ["id"]
+    assert df["id"].dtype.name == "Int64"
+    assert df["id"].tolist() == [1, 3]
+
+
+def test_query_with_schema_reads_nullable_dtypes(reader):
+    df = reader.query("SELECT id, name FROM journal_items", schema={"id": "Int64", "name": "str"})
+    assert df["id"].dtype.name == "Int64"
+    assert df["name"].dtype.name == "string"
+    assert df["id"].isna().sum() == 1
+
+
+def test_iter_query_streams_chunks(reader):
+    frames = list(reader.iter_query("SELECT * FROM journal_items WHERE id <= :max_id", {"max_id": 50},
+                                    chunksize=20, schema={"id": "Int64", "name": "str"}))
+    assert [len(df) for df in frames] == [20, 20, 10]
+    assert all(df["id"].dtype == "Int64" for df in frames)
+    with pytest.raises(Exception):
+        list(reader.iter_query("SELECT * FROM missing_table"))
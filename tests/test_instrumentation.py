@@ -0,0 +1,33 @@
+# tests/test_instrumentation.py
+import pandas as pd
+
+from msfutilspkg.utils.data_utils import enforce_schema, sync_dataframes_with_old_new
+from msfutilspkg.utils.instrumentation import collect_spans, instrumented, span
+
+
+def test_spans_are_not_recorded_outside_a_collector():
+    with span("outside") as s:
+        s.rows = 10
+    assert s.rows is None
+
+
+def test_span_and_instrumented_functions_are_collected():
+    @instrumented("double", rows=lambda result, values: len(values))
+    def double(values):
+        return [v * 2 for v in values]
+
+    old = pd.DataFrame({"id": [1, 2], "name": ["A", "B"]})
+    new = pd.DataFrame({"id": [2, 3], "name": ["B", "C"]})
+    with collect_spans() as spans:
+        with span("stage") as s:
+            double(list(range(100)))
+            enforce_schema(new, {"id": "Int64", "name": "str"})
+            sync_dataframes_with_old_new(new, old, key=["id"], showChangedCol=False)
+            s.rows = 100
+
+    assert [s.name for s in spans] == ["double", "enforce_schema", "sync_dataframes_with_old_new", "stage"]
+    record = spans[0].to_dict()
+    assert record["rows"] == 100
+    assert record["wall_seconds"] >= 0 and record["cpu_seconds"] >= 0
+    assert record["rows_per_second"] > 0
+    assert spans[2].rows == 3  # create + delete + keep
@@ -0,0 +1,141 @@
+# tests/test_pipeline.py
+import threading
+import time
+
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+from msfutilspkg.utils.data_utils import enforce_schema, sync_dataframes_with_old_new
+from msfutilspkg.utils.instrumentation import collect_spans
+from msfutilspkg.utils.pipeline import Pipeline
+
+HISTORIC = pd.DataFrame({"code": [f"CC{i}" for i in range(100)], "budget": [float(i) for i in range(100)]})
+NEW = pd.concat([HISTORIC.iloc[10:], pd.DataFrame({"code": ["NEW1", "NEW2"], "budget": [1.0, 2.0]})],
+                ignore_index=True)
+NEW.loc[NEW["code"].isin(["CC20", "CC55"]), "budget"] = -1.0
+
+
+def batches(df, size):
+    return lambda: (df.iloc[start:start + size] for start in range(0, len(df), size))
+
+
+def test_streaming_sync_matches_full_sync():
+    results = []
+    with collect_spans() as spans:
+        stats = (Pipeline(queue_size=2)
+                 .source("extract", batches(NEW, 7))
+                 .map("enforce_schema", lambda df: enforce_schema(df, {"code": "str", "budget": "Float64"}), workers=2)
+                 .sync("sync", historic=lambda: HISTORIC, key=["code"], showChangedCol=True)
+                 .sink("write", results.append)
+                 .run())
+
+    expected = sync_dataframes_with_old_new(NEW, HISTORIC, ["code"], True)
+    for name, frame in expected.items():
+        streamed = pd.concat([result[name] for result in results if len(result[name])])
+        assert sorted(streamed["code"]) == sorted(frame["code"]), name
+
+    stats = stats.set_index("stage")
+    assert stats.loc["extract", "rows_out"] == len(NEW)
+    assert stats.loc["sync", "rows_in"] == len(NEW) and stats.loc["sync", "full_view"] == "historic"
+    assert stats.loc["write", "batches_in"] == 15  # 14 batches of new records + the deletions
+    # spans of instrumented functions called in the stage threads are collected
+    assert {"enforce_schema", "sync_dataframes_with_old_new"} <= {s.name for s in spans}
+
+
+def test_queues_bound_batches_in_flight():
+    produced, consumed, in_flight = [0], [0], []
+    lock = threading.Lock()
+
+    def source():
+        for i in range(50):
+            with lock:
+                produced[0] += 1
+                in_flight.append(produced[0] - consumed[0])
+            yield pa.table({"i": [i]})
+
+    def slow_sink(batch):
+        time.sleep(0.002)
+        with lock:
+            consumed[0] += 1
+
+    stats = Pipeline(queue_size=2).source("source", source).map("identity", lambda b: b).sink("sink", slow_sink).run()
+    assert consumed[0] == 50
+    # 2 queues of 2 batches + one batch held by each stage
+    assert max(in_flight) <= 2 * 2 + 3
+    assert stats["rows_in"].tolist() == [0, 50, 50]
+
+
+def test_collect_stage_and_errors():
+    totals = []
+    (Pipeline()
+     .source("extract", batches(HISTORIC, 30))
+     .collect("total", lambda df: df.assign(total=df["budget"].sum()))
+     .sink("write", totals.append)
+     .run())
+    assert len(totals) == 1 and len(totals[0]) == 100 and totals[0]["total"].iat[0] == HISTORIC["budget"].sum()
+
+    def fail(df):
+        raise RuntimeError("boom")
+
+    pipeline = Pipeline(queue_size=1).source("extract", batches(HISTORIC, 1)).map("fail", fail).sink("write", print)
+    with pytest.raises(RuntimeError, match="boom"):
+        pipeline.run()
+    with pytest.raises(ValueError):
+        Pipeline().collect("total", len).run()  # no source
+
+
+def test_failing_sink_does_not_deadlock_on_full_queue():
+    def slow(batch):
+        time.sleep(0.01)
+        return batch
+
+    def fail(batch):
+        raise RuntimeError("sink down")
+
+    pipeline = Pipeline(queue_size=2).source("extract", batches(HISTORIC, 1)).map("slow", slow).sink("write", fail)
+    errors = []
+    thread = threading.Thread(target=lambda: errors.append(pytest.raises(RuntimeError, pipeline.run)), daemon=True)
+    thread.start()
+    thread.join(10)
+    assert not thread.is_alive()
+    assert "sink down" in str(errors[0].value)
+
+
+@pytest.mark.parametrize("showChangedCol", [False, True])
+def test_sync_stage_yields_the_same_columns_for_every_batch(showChangedCol):
+    results = []
+    # the first batch matches no historic row, the last dict only holds deletions
+    new = pd.concat([NEW.tail(2), NEW.head(20)], ignore_index=True)
+    (Pipeline()
+     .source("extract", batches(new, 2))
+     .sync("sync", historic=HISTORIC, key=["code"], showChangedCol=showChangedCol)
+     .sink("write", results.append)
+     .run())
+
+    expected = sync_dataframes_with_old_new(NEW, HISTORIC, ["code"], showChangedCol)
+    for name, frame in expected.items():
+        assert {tuple(result[name].columns) for result in results} == {tuple(frame.columns)}, name
+
+
+def test_failing_sink_stops_and_closes_an_infinite_source():
+    pulled, closed = [0], []
+
+    def source():
+        try:
+            while True:
+                pulled[0] += 1
+                yield pd.DataFrame({"i": [pulled[0]]})
+        finally:
+            closed.append(True)  # e.g. the server-side cursor of iter_query is released
+
+    def fail(batch):
+        time.sleep(0.01)
+        raise RuntimeError("sink down")
+
+    pipeline = Pipeline(queue_size=2).source("extract", source).map("identity", lambda b: b).sink("write", fail)
+    with pytest.raises(RuntimeError, match="sink down"):
+        pipeline.run()
+    # the queues and one batch per stage at most, not thousands
+    assert pulled[0] <= 2 * 2 + 3
+    assert closed == [True]
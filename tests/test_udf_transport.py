@@ -0,0 +1,53 @@
+# tests/test_udf_transport.py
+import json
+
+import pandas as pd
+import pytest
+
+from msfutilspkg.utils.data_utils import sync_dataframes_with_old_new
+from msfutilspkg.utils.udf_transport import (
+    decode_dataframe, decode_result, encode_dataframe, sync_dataframes_with_old_new_arrow)
+
+OLD = pd.DataFrame({"code": ["a", "b", "c"], "n": [1, 2, 3], "x": [0.5, None, 1.0],
+                    "d": pd.to_datetime(["2024-01-01", "2024-01-02", "2024-01-02"])})
+NEW = pd.DataFrame({"code": ["b", "c", "d"], "n": [2, 5, 7], "x": [None, 2.0, 1.0],
+                    "d": pd.to_datetime(["2024-01-02", "2024-01-03", "2024-01-04"])})
+
+
+@pytest.mark.parametrize("compression", [None, "zstd"])
+def test_arrow_round_trip_through_json(compression):
+    df = OLD.assign(n=pd.array([1, None, 3], dtype="Int64"))
+    envelope = json.loads(json.dumps(encode_dataframe(df, compression=compression)))
+    assert envelope["format"] == "arrow-ipc" and envelope["compression"] == compression
+    pd.testing.assert_frame_equal(decode_dataframe(envelope), df)
+
+
+def test_json_fallback_for_mixed_object_columns():
+    df = pd.DataFrame({"mixed": [1, "a", None]})
+    envelope = encode_dataframe(df)
+    assert envelope["format"] == "json"
+    assert decode_dataframe(json.loads(json.dumps(envelope)))["mixed"].tolist()[:2] == [1, "a"]
+
+
+@pytest.mark.parametrize("format", ["arrow-ipc", "json"])
+def test_sync_entry_point_matches_direct_call(format):
+    expected = sync_dataframes_with_old_new(NEW, OLD, ["code"], True)
+    result = sync_dataframes_with_old_new_arrow(encode_dataframe(NEW, format), encode_dataframe(OLD, format),
+                                                ["code"], True)
+    assert {envelope["format"] for envelope in result.values()} == {format}
+
+    frames = decode_result(json.loads(json.dumps(result)))
+    for name, frame in expected.items():
+        if format == "arrow-ipc":
+            pd.testing.assert_frame_equal(frames[name], frame)
+        else:
+            # JSON cannot tell all-null object columns apart from float ones
+            assert frames[name].astype(object).where(frames[name].notna(), None).values.tolist() == \
+                frame.astype(object).where(frame.notna(), None).values.tolist()
+
+
+def test_sync_entry_point_accepts_plain_records():
+    result = sync_dataframes_with_old_new_arrow(NEW.drop(columns="d").to_dict("records"),
+                                                OLD.drop(columns="d").to_dict("records"), ["code"])
+    assert result["to_create"]["format"] == "json"
+    assert decode_result(result)["to_create"]["code"].tolist() == ["d"]
@@ -0,0 +1,65 @@
+# tests/test_udf_utils.py
+import base64
+import json
+
+import pandas as pd
+
+from msfutilspkg.utils.api_utils import ApiClient
+from msfutilspkg.utils.udf_utils import build_udf_payload, bundle_functions, deploy_udfs, read_content_hash
+
+SYNC = "msfutilspkg.utils.data_utils.sync_dataframes_with_old_new"
+
+
+def test_bundle_is_self_contained():
+    source = bundle_functions([SYNC, "msfutilspkg.utils.data_utils.enforce_schema"])
+
+    assert "import pandas as pd" in source
+    assert "def _has_target_dtype(" in source
+    # library-internal decorators are stripped: no instrumentation in the UDF
+    assert "instrumented" not in source and "ContextVar" not in source and "class Span" not in source
+    assert "def pandas_to_spark_schema(" not in source and "pyspark" not in source
+
+    namespace = {}
+    exec(compile(source, "udf_source.py", "exec"), namespace)
+    result = namespace["sync_dataframes_with_old_new"](
+        pd.DataFrame({"id": [1, 2], "v": [1, 3]}), pd.DataFrame({"id": [1, 3], "v": [1, 1]}), ["id"], False)
+    assert result["to_create"]["id"].tolist() == [2]
+
+
+def test_decorators_are_kept_unless_stripped():
+    source = bundle_functions([SYNC], strip_decorators=())
+    assert '@instrumented("sync_dataframes_with_old_new"' in source and "def instrumented(" in source
+
+
+def test_build_is_incremental(tmp_path):
+    output_file = tmp_path / "udf_payload.json"
+    payload = build_udf_payload([SYNC], "sync", output_file=str(output_file))
+    assert read_content_hash(payload["source"]) == payload["contentHash"]
+    assert json.loads(output_file.read_text())["contentHash"] == payload["contentHash"]
+
+    mtime = output_file.stat().st_mtime_ns
+    assert build_udf_payload([SYNC], "sync", output_file=str(output_file)) == payload
+    assert output_file.stat().st_mtime_ns == mtime
+
+
+def test_deploy_skips_unchanged_items(stub_server):
+    payload = build_udf_payload([SYNC], "sync")
+    deployed_source = base64.b64encode(payload["source"].encode()).decode()
+    stub_server.add("GET", "/workspaces/ws/items", 200, {"value": [{"id": "item-1", "displayName": "sync"}]})
+    stub_server.add("POST", "/workspaces/ws/items", 201, {"id": "item-2", "displayName": "schema"})
+    stub_server.add("POST", "/workspaces/ws/items/item-1/getDefinition", 200, {
+        "definition": {"parts": [{"path": "udf_source.py", "payload": deployed_source, "payloadType": "InlineBase64"}]}})
+    stub_server.add("POST", "/workspaces/ws/items/item-2/getDefinition", 200, {"definition": {"parts": []}})
+    stub_server.add("POST", "/workspaces/ws/items/item-2/updateDefinition", 200, {})
+
+    with ApiClient(stub_server.url) as client:
+        reports = deploy_udfs(client, "ws", [
+            {"functions": [SYNC], "display_name": "sync"},
+            {"functions": ["msfutilspkg.utils.data_utils.enforce_schema"], "display_name": "schema"},
+        ])
+
+    assert [r["deployed"] for r in reports] == [False, True]
+    updates = [h for h in stub_server.requests if h.path.endswith("updateDefinition")]
+    assert len(updates) == 1
+    part = json.loads(updates[0].body)["definition"]["parts"][0]
+    assert read_content_hash(base64.b64decode(part["payload"]).decode()) == reports[1]["contentHash"]
@@ -0,0 +1,167 @@
+# tests/test_update_unifield_cc.py
+import pandas as pd
+import pytest
+
+from msfutilspkg.utils.update_unifield_cc import UnifieldClient, update_cost_centers
+
+
+def make_client(server, **kwargs):
+    return UnifieldClient(server.host, server.port, "OCBHQ", "talend", "secret", **kwargs)
+
+
+def test_import_file_logs_in_once_and_reuses_connection(unifield_server, tmp_path):
+    path = tmp_path / "cc_update.xls"
+    path.write_bytes(b"<Workbook/>")
+
+    with make_client(unifield_server) as client:
+        first = client.import_file(str(path), "update")
+        second = client.import_file(b"<Workbook/>", "create")
+
+    assert first["state"] == "done" and second["state"] == "done"
+    assert unifield_server.logins == 1
+    assert [w["values"]["model_list_selection"] for w in unifield_server.wizards.values()] == [
+        "cost_centers_update", "cost_centers"]
+    # 1 login + 2 x (create, button_import_xml, read) on two keep-alive connections (common, object)
+    assert len(unifield_server.client_addresses) == 7
+    assert len(set(unifield_server.client_addresses)) == 2
+
+
+def test_import_files_summary(unifield_server, tmp_path):
+    def import_handler(model_list_selection, content):
+        if b"BAD" in content:
+            return {"state": "error", "error_message": "Line 2: unknown parent"}
+        return {"state": "done", "info_message": f"{model_list_selection} imported"}
+    unifield_server.import_handler = import_handler
+
+    files = []
+    for i, content in enumerate([b"ok", b"BAD", b"ok"]):
+        path = tmp_path / f"cc_{i}.xls"
+        path.write_bytes(content)
+        files.append(str(path))
+    files = [(files[0], "create"), files[1], files[2], str(tmp_path / "missing.xls")]
+
+    summary = make_client(unifield_server).import_files(files, context="update", max_workers=3)
+
+    assert isinstance(summary, pd.DataFrame)
+    assert summary["file"].tolist()[:3] == [files[0][0], files[1], files[2]]
+    assert summary["context"].tolist() == ["create", "update", "update", "update"]
+    assert summary["state"].tolist()[:3] == ["done", "error", "done"]
+    assert summary.loc[1, "error_message"] == "Line 2: unknown parent"
+    assert summary.loc[3, "exception"].startswith("FileNotFoundError")
+    assert unifield_server.logins == 1
+
+
+def test_login_failure_and_update_cost_centers(unifield_server, tmp_path):
+    client = UnifieldClient(unifield_server.host, unifield_server.port, "OCBHQ", "talend", "wrong")
+    with pytest.raises(ValueError):
+        client.login()
+
+    path = tmp_path / "cc.xls"
+    path.write_bytes(b"<Workbook/>")
+    result = update_cost_centers(str(path), "OCBHQ", "talend", "secret", unifield_server.host,
+                                 unifield_server.port, context="create")
+    assert result["state"] == "done"
+    assert unifield_server.wizards[1]["values"]["model_list_selection"] == "cost_centers"
+
+
+def test_push_cost_center_changes_isolates_bad_rows(unifield_server):
+    from msfutilspkg.utils.data_utils import sync_dataframes_with_old_new
+    from msfutilspkg.utils.update_unifield_cc import push_cost_center_changes
+
+    def import_handler(model_list_selection, content):
+        if b"BAD" in content:
+            return {"state": "error", "error_message": "Unknown parent cost center"}
+        return {"state": "done"}
+    unifield_server.import_handler = import_handler
+
+    historic = pd.DataFrame({"code": [f"CC{i}" for i in range(10)], "name": [f"cc {i}" for i in range(10)]})
+    new = historic.copy()
+    new.loc[[2, 7], "name"] = ["renamed", "BAD rename"]
+    new = pd.concat([new, pd.DataFrame({"code": [f"CC{i}" for i in range(10, 17)],
+                                        "name": ["new"] * 4 + ["BAD"] + ["new"] * 2})], ignore_index=True)
+    sync = sync_dataframes_with_old_new(new, historic, ["code"], showChangedCol=True)
+
+    result = push_cost_center_changes(make_client(unifield_server), sync, chunk_size=4)
+
+    assert result["accepted"]["code"].tolist() == ["CC10", "CC11", "CC12", "CC13", "CC15", "CC16", "CC2"]
+    assert result["rejected"][["code", "context", "error"]].values.tolist() == [
+        ["CC14", "create", "Unknown parent cost center"],
+        ["CC7", "update", "Unknown parent cost center"],
+    ]
+    assert list(result["accepted"].columns) == ["code", "name", "context"]
+    # create: [CC10-13] ok, [CC14-16] -> [CC14] + [CC15, CC16]; update: [CC2, CC7] -> [CC2] + [CC7]
+    assert result["imports"]["rows"].tolist() == [4, 3, 1, 2, 2, 1, 1]
+    # no row sent twice once accepted
+    sent = [w["values"]["model_list_selection"] for w in unifield_server.wizards.values()]
+    assert sent.count("cost_centers") == 4 and sent.count("cost_centers_update") == 3
+
+
+@pytest.mark.parametrize("state", ["done", "error"])
+def test_push_cost_center_changes_uses_row_errors(unifield_server, state):
+    """'done': Unifield imported the valid rows of the file; 'error': it rolled the file back."""
+    import re
+    from msfutilspkg.utils.data_utils import sync_dataframes_with_old_new
+    from msfutilspkg.utils.update_unifield_cc import push_cost_center_changes
+
+    imported = []
+
+    def import_handler(model_list_selection, content):
+        codes = re.findall(rb'<Data ss:Type="String">(CC\d+)</Data>', content)
+        bad = [i for i, row in enumerate(content.split(b"<Row>")[2:]) if b"BAD" in row]
+        if bad and state == "error":
+            return {"state": "error", "error_message": "\n".join(f"Line {i + 2}: Unknown parent" for i in bad)}
+        imported.extend(code.decode() for i, code in enumerate(codes) if i not in bad)
+        return {"state": "done", "error_message": "\n".join(f"Line {i + 2}: Unknown parent" for i in bad)}
+    unifield_server.import_handler = import_handler
+
+    new = pd.DataFrame({"code": [f"CC{i}" for i in range(6)], "name": ["new", "BAD", "new", "new", "BAD", "new"]})
+    sync = sync_dataframes_with_old_new(new, new.iloc[0:0], ["code"], showChangedCol=True)
+
+    result = push_cost_center_changes(make_client(unifield_server), sync, chunk_size=3)
+
+    assert result["accepted"]["code"].tolist() == ["CC0", "CC2", "CC3", "CC5"]
+    assert result["rejected"][["code", "error"]].values.tolist() == [["CC1", "Unknown parent"], ["CC4", "Unknown parent"]]
+    # accepted rows are imported exactly once, the bad ones never
+    assert sorted(imported) == ["CC0", "CC2", "CC3", "CC5"]
+    # 'error': each chunk is sent again without its bad row, no bisection
+    assert result["imports"]["rows"].tolist() == ([3, 3] if state == "done" else [3, 2, 3, 2])
+
+
+def test_import_dataframe_in_memory_matches_file(unifield_server, tmp_path):
+    import base64
+    import io
+    from msfutilspkg.utils.export_utils import write_excel_2003_xml_from_df
+    from msfutilspkg.utils.update_unifield_cc import Base64Writer
+
+    df = pd.DataFrame({"code": ["CC1", "CC2"], "amount": [1.5, None],
+                       "start": [pd.Timestamp("2024-01-31"), pd.NaT]})
+    path = tmp_path / "cc.xls"
+    write_excel_2003_xml_from_df(df, str(path))
+
+    buffer = io.BytesIO()
+    write_excel_2003_xml_from_df(df, buffer)
+    assert buffer.getvalue() == path.read_bytes()
+
+    writer = Base64Writer()
+    for size in (1, 2, 5, 7):  # odd chunk sizes exercise the pending bytes
+        writer.write(b"x" * size)
+    assert writer.getvalue() == base64.b64encode(b"x" * 15).decode()
+
+    client = make_client(unifield_server)
+    client.import_dataframe(df, "create")
+    with open(path, "rb") as f:
+        client.import_file(f, "create")
+    uploads = [w["values"]["import_file"] for w in unifield_server.wizards.values()]
+    assert uploads == [base64.b64encode(path.read_bytes()).decode()] * 2
+
+
+def test_close_closes_the_worker_threads_connections(unifield_server):
+    client = make_client(unifield_server)
+    client.import_files([b"<Workbook/>"] * 4, max_workers=2)
+    proxies = list(client._proxies)
+    assert len(proxies) > 2  # common + object of the worker threads
+
+    client.close()
+    assert all(proxy("transport")._connection[1] is None for proxy in proxies)
+    assert client._proxies == []
+    assert client.import_file(b"<Workbook/>")["state"] == "done"  # reconnects after close